@@ -0,0 +1,109 @@
+"""
+Cold-start benchmark: how long does a fresh worker take to import the app?
+
+Every scale-up of an autoscaled worker pays this cost, so importing must stay
+free of network calls, file writes and graph compilation. Each sample imports
+the target module in a fresh interpreter with outbound sockets disabled, so an
+accidental network call at import time fails the benchmark instead of slowing
+it down.
+
+Usage:
+    python -m benchmarks.cold_start [--runs N] [--budget SECONDS] [--output FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Default budget for the median import time, in seconds
+DEFAULT_BUDGET = float(os.getenv("SELF_RAG_COLD_START_BUDGET", "5.0"))
+
+# Refuse outbound connections, then import the target module
+_BOOTSTRAP = """
+import socket
+
+def _blocked(*args, **kwargs):
+    raise RuntimeError("network access at import time")
+
+socket.socket.connect = _blocked
+socket.create_connection = _blocked
+
+import {module}
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str = "main", cwd: str = REPO_ROOT) -> float:
+    """
+    Import ``module`` in a fresh interpreter with networking disabled.
+
+    Args:
+        module: Module to import
+        cwd: Working directory of the interpreter
+
+    Returns:
+        float: Wall-clock seconds for interpreter start-up plus import
+
+    Raises:
+        RuntimeError: If the import fails, e.g. because it touched the network
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _BOOTSTRAP.format(module=module)],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return elapsed
+
+
+def run(runs: int, module: str = "main") -> Dict[str, float]:
+    """
+    Collect cold-start samples and summarize them.
+
+    Args:
+        runs: Number of fresh interpreters to start
+        module: Module to import
+
+    Returns:
+        Dict[str, float]: Median, min and max import time in seconds
+    """
+    samples: List[float] = [measure_import(module) for _ in range(runs)]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import-time cold start of the app.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Maximum median in seconds")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.module)
+    results["budget_s"] = args.budget
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if results["median_s"] > args.budget:
+        print(f"Cold start {results['median_s']:.2f}s exceeds budget {args.budget:.2f}s", file=sys.stderr)
+        sys.exit(1)
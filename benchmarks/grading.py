@@ -0,0 +1,150 @@
+"""
+Relevance grading benchmark: per-document calls vs. a single batch call.
+
+Grades the same questions and documents with both grading modes and reports,
+per mode, the latency of grading one question, the prompt and completion
+tokens spent, and how often the verdicts agree with the per-document mode.
+This talks to the OpenAI API and spends tokens.
+
+Cases are read from a JSONL file with one ``{"question": ..., "documents":
+[...]}`` object per line. Without ``--cases``, the sample questions are
+answered from the persisted knowledge base with the retriever.
+
+Usage:
+    python -m benchmarks.grading [--cases FILE] [--runs N] [--output FILE]
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from dotenv import load_dotenv
+from langchain.schema import Document
+from langchain_community.callbacks import get_openai_callback
+
+from graph.nodes.grade_documents import grade_relevance
+from graph.stats import percentile
+
+MODES = ["concurrent", "batch"]
+
+SAMPLE_QUESTIONS = [
+    "What is retrieval-augmented generation?",
+    "How are large language models trained?",
+    "What is chain-of-thought prompting?",
+    "Who won the 2018 FIFA World Cup?",
+]
+
+Case = Tuple[str, List[Document]]
+
+
+def load_cases(path: str) -> List[Case]:
+    """
+    Read benchmark cases from a JSONL file.
+
+    Args:
+        path: File with one ``{"question", "documents"}`` object per line
+
+    Returns:
+        List[Case]: Questions and their documents
+    """
+    cases = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                case = json.loads(line)
+                cases.append((case["question"], [Document(page_content=text) for text in case["documents"]]))
+    return cases
+
+
+def retrieve_cases(questions: Sequence[str]) -> List[Case]:
+    """
+    Build benchmark cases from the persisted knowledge base.
+
+    Args:
+        questions: Questions to retrieve documents for
+
+    Returns:
+        List[Case]: Questions and their retrieved documents
+    """
+    from ingestion import get_retriever
+
+    return [(question, get_retriever().invoke(question)) for question in questions]
+
+
+def run_mode(mode: str, cases: List[Case], runs: int = 1) -> Tuple[Dict[str, float], List[List[bool]]]:
+    """
+    Grade every case with one grading mode.
+
+    Args:
+        mode: Grading mode, see ``graph.nodes.grade_documents.grade_relevance``
+        cases: Questions and their documents
+        runs: Number of times every case is graded
+
+    Returns:
+        Tuple[Dict[str, float], List[List[bool]]]: Summary of the mode and the
+        verdicts of the last run
+    """
+    latencies: List[float] = []
+    verdicts: List[List[bool]] = []
+    with get_openai_callback() as usage:
+        for _ in range(runs):
+            verdicts = []
+            for question, documents in cases:
+                start = time.perf_counter()
+                verdicts.append(grade_relevance(question, documents, mode=mode))
+                latencies.append(time.perf_counter() - start)
+
+    graded = runs * len(cases)
+    return {
+        "mode": mode,
+        "questions": graded,
+        "latency_mean_s": statistics.mean(latencies),
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "llm_calls_per_question": usage.successful_requests / graded,
+        "prompt_tokens_per_question": usage.prompt_tokens / graded,
+        "completion_tokens_per_question": usage.completion_tokens / graded,
+        "total_tokens_per_question": usage.total_tokens / graded,
+    }, verdicts
+
+
+def run(cases: List[Case], runs: int = 1) -> List[Dict[str, float]]:
+    """
+    Benchmark every grading mode on the same cases.
+
+    Args:
+        cases: Questions and their documents
+        runs: Number of times every case is graded per mode
+
+    Returns:
+        List[Dict[str, float]]: One summary per mode, with the share of
+        verdicts agreeing with the first mode
+    """
+    results = []
+    reference: List[List[bool]] = []
+    for mode in MODES:
+        summary, verdicts = run_mode(mode, cases, runs)
+        if not reference:
+            reference = verdicts
+        pairs = [(a, b) for ref, got in zip(reference, verdicts) for a, b in zip(ref, got)]
+        summary["agreement"] = sum(a == b for a, b in pairs) / len(pairs) if pairs else 1.0
+        results.append(summary)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare tokens and latency of the relevance grading modes.")
+    parser.add_argument("--cases", help="JSONL file of questions and documents (default: retrieve samples)")
+    parser.add_argument("--runs", type=int, default=1, help="Number of times every case is graded per mode")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    cases = load_cases(args.cases) if args.cases else retrieve_cases(SAMPLE_QUESTIONS)
+    results = run(cases, args.runs)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,162 @@
+"""
+Generation check benchmark: two grader chains vs. one combined reflection call.
+
+Runs the post-generation check on the same generations with the two-chain path
+(hallucination grader, then answer grader) and with the combined reflection
+grader, and reports, per mode, latency, requests, prompt and completion tokens,
+and how often the routing decision ("useful", "not useful", "not supported")
+agrees with the two-chain path. This talks to the OpenAI API and spends tokens.
+
+Cases are read from a JSONL file with one ``{"question": ..., "documents":
+[...], "generation": ...}`` object per line. Without ``--cases``, the sample
+questions are answered from the persisted knowledge base first.
+
+Usage:
+    python -m benchmarks.reflection [--cases FILE] [--runs N] [--output FILE]
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from dotenv import load_dotenv
+from langchain.schema import Document
+from langchain_community.callbacks import get_openai_callback
+
+from benchmarks.grading import SAMPLE_QUESTIONS
+from graph.graph import check_generation
+from graph.stats import percentile
+
+MODES = ["sequential", "combined"]
+
+Case = Tuple[str, List[Document], str]
+
+
+def load_cases(path: str) -> List[Case]:
+    """
+    Read benchmark cases from a JSONL file.
+
+    Args:
+        path: File with one ``{"question", "documents", "generation"}`` object per line
+
+    Returns:
+        List[Case]: Questions, their documents and generations
+    """
+    cases = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                case = json.loads(line)
+                documents = [Document(page_content=text) for text in case["documents"]]
+                cases.append((case["question"], documents, case["generation"]))
+    return cases
+
+
+def generate_cases(questions: Sequence[str]) -> List[Case]:
+    """
+    Build benchmark cases by answering questions from the knowledge base.
+
+    Args:
+        questions: Questions to answer
+
+    Returns:
+        List[Case]: Questions, their retrieved documents and generations
+    """
+    from graph.chains.generation import get_generation_chain
+    from ingestion import get_retriever
+
+    cases = []
+    for question in questions:
+        documents = get_retriever().invoke(question)
+        generation = get_generation_chain().invoke({"context": documents, "question": question})
+        cases.append((question, documents, generation))
+    return cases
+
+
+def route(question: str, documents: List[Document], generation: str, mode: str) -> str:
+    """Run the generation check with ``mode`` and return the routing decision."""
+    grounded, answers_question = check_generation(question, documents, generation, mode=mode)
+    if not grounded:
+        return "not supported"
+    return "useful" if answers_question() else "not useful"
+
+
+def run_mode(mode: str, cases: List[Case], runs: int = 1) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Check every generation with one mode.
+
+    Args:
+        mode: Generation check mode, see ``graph.graph.check_generation``
+        cases: Questions, their documents and generations
+        runs: Number of times every case is checked
+
+    Returns:
+        Tuple[Dict[str, float], List[str]]: Summary of the mode and the
+        routing decisions of the last run
+    """
+    latencies: List[float] = []
+    decisions: List[str] = []
+    with get_openai_callback() as usage:
+        for _ in range(runs):
+            decisions = []
+            for question, documents, generation in cases:
+                start = time.perf_counter()
+                decisions.append(route(question, documents, generation, mode))
+                latencies.append(time.perf_counter() - start)
+
+    checked = runs * len(cases)
+    return {
+        "mode": mode,
+        "generations": checked,
+        "latency_mean_s": statistics.mean(latencies),
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "llm_calls_per_generation": usage.successful_requests / checked,
+        "prompt_tokens_per_generation": usage.prompt_tokens / checked,
+        "completion_tokens_per_generation": usage.completion_tokens / checked,
+        "total_tokens_per_generation": usage.total_tokens / checked,
+    }, decisions
+
+
+def run(cases: List[Case], runs: int = 1) -> List[Dict[str, float]]:
+    """
+    Benchmark both generation check paths on the same cases.
+
+    Args:
+        cases: Questions, their documents and generations
+        runs: Number of times every case is checked per mode
+
+    Returns:
+        List[Dict[str, float]]: One summary per mode, with the share of
+        routing decisions agreeing with the two-chain path
+    """
+    results = []
+    reference: List[str] = []
+    for mode in MODES:
+        summary, decisions = run_mode(mode, cases, runs)
+        if not reference:
+            reference = decisions
+        agreeing = sum(a == b for a, b in zip(reference, decisions))
+        summary["agreement"] = agreeing / len(decisions) if decisions else 1.0
+        results.append(summary)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the two-chain and combined generation checks.")
+    parser.add_argument(
+        "--cases", help="JSONL file of questions, documents and generations (default: generate samples)"
+    )
+    parser.add_argument("--runs", type=int, default=1, help="Number of times every case is checked per mode")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    load_dotenv()
+    cases = load_cases(args.cases) if args.cases else generate_cases(SAMPLE_QUESTIONS)
+    results = run(cases, args.runs)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,718 @@
+"""
+Offline workflow benchmark: the compiled graph against scripted fakes.
+
+Runs the full Self-RAG graph with a fake chat model, fake embeddings and a
+fake web search provider, so it costs nothing, needs no network and can run
+in CI. The fakes sleep for latencies drawn from configurable distributions
+and return scripted verdicts: every grader verdict is derived from a hash of
+the prompt, so the same prompt always takes the same route, at any
+concurrency. The real chains are built around the fake model, so
+prompt assembly, context packing and output parsing are part of the
+measurement.
+
+For every concurrency level, the questions are answered ``--repeats`` times
+and the benchmark reports throughput, end-to-end p50/p95/p99 latency, LLM
+calls and tokens per question, and the latency of every node, route, LLM and
+search call (from the telemetry spans). Results are written as JSON; with
+``--baseline``, they are compared to an earlier run and the command fails on
+regressions.
+
+Latency distributions are given as ``constant:SECONDS``,
+``uniform:LOW:HIGH``, ``normal:MEAN:STDDEV`` or ``lognormal:MEDIAN:SIGMA``.
+
+Questions are read from a JSONL file with one ``{"question": ...}`` object per
+line; an object may override the verdict rates (``relevant``, ``grounded``,
+``useful``) for its question.
+
+Usage:
+    python -m benchmarks.workflow [--questions FILE] [--concurrency 1,4,16] [--repeats N]
+        [--llm-latency SPEC] [--generation-latency SPEC] [--embedding-latency SPEC]
+        [--search-latency SPEC] [--seed N] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from unittest.mock import patch
+
+from langchain.schema import Document
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+from langchain_core.runnables import Runnable
+from langchain_core.vectorstores import InMemoryVectorStore
+from pydantic import Field, PrivateAttr
+
+from benchmarks.grading import SAMPLE_QUESTIONS
+from graph.search import HedgedSearch, LocalCorpusProvider, SearchResults
+from graph.stats import percentile
+
+# Documents of the fake knowledge base
+KNOWLEDGE_BASE = [
+    {"url": "https://example.com/rag", "title": "Retrieval-augmented generation",
+     "content": "Retrieval-augmented generation grounds language model answers in documents retrieved "
+                "from a knowledge base, so answers can cite sources and stay up to date."},
+    {"url": "https://example.com/self-rag", "title": "Self-RAG",
+     "content": "Self-RAG grades retrieved documents for relevance and checks generations for "
+                "hallucinations and usefulness before returning an answer."},
+    {"url": "https://example.com/training", "title": "Training large language models",
+     "content": "Large language models are pretrained on large text corpora with next-token prediction, "
+                "then fine-tuned on instructions and aligned with human feedback."},
+    {"url": "https://example.com/cot", "title": "Chain-of-thought prompting",
+     "content": "Chain-of-thought prompting asks a model to write out intermediate reasoning steps, "
+                "which improves accuracy on arithmetic and multi-step questions."},
+    {"url": "https://example.com/embeddings", "title": "Embeddings",
+     "content": "Embedding models map text to dense vectors so that semantically similar passages are "
+                "close to each other and can be found by nearest-neighbour search."},
+    {"url": "https://example.com/agents", "title": "LLM agents",
+     "content": "Agents combine a language model with planning, memory and tools, calling the model "
+                "repeatedly to decide on the next action."},
+    {"url": "https://example.com/prompting", "title": "Prompt engineering",
+     "content": "Prompt engineering structures instructions, examples and context so that language "
+                "models produce the expected output format."},
+    {"url": "https://example.com/chunking", "title": "Chunking",
+     "content": "Documents are split into overlapping chunks before indexing so that each chunk fits "
+                "the embedding model and retrieval returns focused passages."},
+]
+
+# Documents of the fake web search provider
+WEB_CORPUS = [
+    {"url": "https://example.org/world-cup-2018", "title": "2018 FIFA World Cup",
+     "content": "France won the 2018 FIFA World Cup, beating Croatia 4-2 in the final in Moscow."},
+    {"url": "https://example.org/rag-survey", "title": "A survey of retrieval-augmented generation",
+     "content": "Retrieval-augmented generation combines a retriever with a generator; variants "
+                "differ in when and how often they retrieve."},
+    {"url": "https://example.org/llm-training", "title": "How large language models are trained",
+     "content": "Training large language models takes pretraining on trillions of tokens followed by "
+                "supervised fine-tuning and reinforcement learning from human feedback."},
+    {"url": "https://example.org/reasoning", "title": "Reasoning in language models",
+     "content": "Chain-of-thought prompting and self-consistency let language models solve multi-step "
+                "reasoning problems more reliably."},
+]
+
+# Questions answered when no questions file is given
+BENCHMARK_QUESTIONS = SAMPLE_QUESTIONS + [
+    "How does Self-RAG check its answers?",
+    "Why are documents split into chunks?",
+    "What are LLM agents?",
+    "What do embedding models do?",
+]
+
+DEFAULT_CONCURRENCY = [1, 4, 16]
+
+# Share of relevant documents, grounded and useful generations by default
+DEFAULT_RATES = {"relevant": 0.6, "grounded": 0.9, "useful": 0.85}
+
+# Metrics compared against a baseline; True where higher is better
+TRACKED_METRICS = {
+    "throughput_qps": True,
+    "latency_p50_s": False,
+    "latency_p95_s": False,
+    "latency_p99_s": False,
+    "llm_calls_per_question": False,
+    "input_tokens_per_question": False,
+    "output_tokens_per_question": False,
+}
+
+# Number of each document block packed by graph.context.render_document
+_DOCUMENT_HEADER = re.compile(r"^\s*\[(\d+)\] ", re.MULTILINE)
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count, at four characters per token."""
+    return max(1, len(text) // 4)
+
+
+def _draw(seed: int, *keys: Any) -> float:
+    """Deterministic number in [0, 1) for ``keys``."""
+    digest = hashlib.sha256("\x1f".join(map(str, (seed, *keys))).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+@dataclass
+class Latency:
+    """
+    Latency distribution of a fake.
+
+    Attributes:
+        distribution: "constant", "uniform", "normal" or "lognormal"
+        a: Seconds for "constant", lower bound for "uniform", mean for
+            "normal" and median for "lognormal"
+        b: Upper bound for "uniform", standard deviation for "normal" and
+            sigma of the underlying normal for "lognormal"
+    """
+
+    distribution: str = "constant"
+    a: float = 0.0
+    b: float = 0.0
+
+    DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """
+        Parse a latency specification such as ``lognormal:0.05:0.5``.
+
+        Args:
+            spec: Distribution name and its parameters, separated by colons
+
+        Returns:
+            Latency: The distribution
+
+        Raises:
+            ValueError: For unknown distributions or invalid parameters
+        """
+        name, *params = spec.split(":")
+        if name not in cls.DISTRIBUTIONS or len(params) != (1 if name == "constant" else 2):
+            raise ValueError(f"Invalid latency specification: {spec}")
+        values = [float(param) for param in params]
+        if any(value < 0 for value in values):
+            raise ValueError(f"Invalid latency specification: {spec}")
+        return cls(name, *values)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds, never negative."""
+        if self.distribution == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.distribution == "normal":
+            return max(0.0, rng.gauss(self.a, self.b))
+        if self.distribution == "lognormal":
+            return rng.lognormvariate(math.log(self.a), self.b) if self.a else 0.0
+        return self.a
+
+    def __str__(self) -> str:
+        if self.distribution == "constant":
+            return f"constant:{self.a}"
+        return f"{self.distribution}:{self.a}:{self.b}"
+
+
+class _Sampler:
+    """Seeded latency source shared by the threads and tasks using a fake."""
+
+    def __init__(self, latency: Latency, seed: int):
+        self.latency = latency
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        with self._lock:
+            return self.latency.sample(self._rng)
+
+
+@dataclass
+class Script:
+    """
+    Scripted grader verdicts.
+
+    Each verdict is positive when a hash of the seed and the prompt falls
+    below the rate of its kind, so it only depends on what the grader is
+    asked, not on timing.
+
+    Attributes:
+        relevant: Share of documents graded relevant
+        grounded: Share of generations graded grounded
+        useful: Share of generations graded as addressing the question
+        seed: Seed of the verdicts
+        overrides: Rates by question, for the prompts mentioning the question
+    """
+
+    relevant: float = DEFAULT_RATES["relevant"]
+    grounded: float = DEFAULT_RATES["grounded"]
+    useful: float = DEFAULT_RATES["useful"]
+    seed: int = 0
+    overrides: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def rate(self, kind: str, prompt: str) -> float:
+        """Rate of ``kind`` verdicts for a prompt."""
+        for question, rates in self.overrides.items():
+            if kind in rates and question in prompt:
+                return rates[kind]
+        return getattr(self, kind)
+
+    def verdict(self, kind: str, prompt: str, *keys: Any) -> bool:
+        """Verdict of one ``kind`` ("relevant", "grounded" or "useful") for a prompt."""
+        return _draw(self.seed, kind, prompt, *keys) < self.rate(kind, prompt)
+
+    def arguments(self, tool: str, prompt: str) -> Dict[str, Any]:
+        """
+        Arguments of the structured output call the graders expect.
+
+        Args:
+            tool: Name of the output schema, e.g. "GradeDocuments"
+            prompt: Text of the prompt
+
+        Returns:
+            Dict[str, Any]: Tool call arguments matching the schema
+        """
+        if tool == "GradeDocuments":
+            return {"binary_score": "yes" if self.verdict("relevant", prompt) else "no"}
+        if tool == "GradeDocumentsBatch":
+            indices = [int(index) for index in _DOCUMENT_HEADER.findall(prompt)]
+            return {"grades": [
+                {"index": index, "binary_score": "yes" if self.verdict("relevant", prompt, index) else "no"}
+                for index in indices
+            ]}
+        if tool == "GradeHallucinations":
+            return {"binary_score": self.verdict("grounded", prompt)}
+        if tool == "GradeAnswer":
+            return {"binary_score": self.verdict("useful", prompt)}
+        if tool == "GradeReflection":
+            return {
+                "grounded": self.verdict("grounded", prompt),
+                "answers_question": self.verdict("useful", prompt),
+            }
+        raise ValueError(f"No scripted verdict for {tool}")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Fake chat model with a latency distribution and scripted verdicts.
+
+    Structured output calls (tool calls, as bound by the graders) get the
+    verdicts of the script; plain calls get an answer made of words of the
+    prompt. Token usage is reported like a provider would, estimated by
+    :func:`count_tokens`.
+    """
+
+    script: Script = Field(default_factory=Script)
+    latency: Latency = Field(default_factory=Latency)
+    answer_tokens: int = 48
+    seed: int = 0
+    _sampler: _Sampler = PrivateAttr()
+
+    def model_post_init(self, context: Any) -> None:
+        self._sampler = _Sampler(self.latency, self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def with_structured_output(self, schema: Any, *, method: str = "function_calling", **kwargs: Any) -> Runnable:
+        # The chains ask for OpenAI function calling, which is how this model answers anyway
+        return super().with_structured_output(schema, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if tools:
+            name = tools[0]["function"]["name"]
+            arguments = self.script.arguments(name, prompt)
+            message = AIMessage(content="", tool_calls=[{"name": name, "args": arguments, "id": "call_0"}])
+            output = json.dumps(arguments)
+        else:
+            words = prompt.split() or ["answer"]
+            start = int(_draw(self.seed, "answer", prompt) * len(words))
+            output = " ".join(words[(start + i) % len(words)] for i in range(self.answer_tokens))
+            message = AIMessage(content=output)
+        message.usage_metadata = {
+            "input_tokens": count_tokens(prompt),
+            "output_tokens": count_tokens(output),
+            "total_tokens": count_tokens(prompt) + count_tokens(output),
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._sampler())
+        return self._respond(messages, kwargs.get("tools"))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._sampler())
+        return self._respond(messages, kwargs.get("tools"))
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash embeddings with a latency distribution per call."""
+
+    def __init__(self, latency: Latency, seed: int = 0, size: int = 64):
+        self.embeddings = DeterministicFakeEmbedding(size=size)
+        self.sampler = _Sampler(latency, seed)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.sampler())
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.sampler())
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.sampler())
+        return self.embeddings.embed_query(text)
+
+
+class FakeSearchProvider(LocalCorpusProvider):
+    """Offline corpus search with a latency distribution per call."""
+
+    name = "fake"
+
+    def __init__(self, documents: Sequence[Dict[str, str]], latency: Latency, seed: int = 0, k: int = 5):
+        super().__init__(documents, k=k)
+        self.sampler = _Sampler(latency, seed)
+
+    def search(self, query: str) -> SearchResults:
+        time.sleep(self.sampler())
+        return self._rank(query)
+
+    async def asearch(self, query: str) -> SearchResults:
+        await asyncio.sleep(self.sampler())
+        return self._rank(query)
+
+
+class UsageHandler(BaseCallbackHandler):
+    """Counts the LLM calls and tokens of one request."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        from graph.telemetry import token_usage
+
+        self.calls += 1
+        usage = token_usage(response) or {}
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+
+
+@dataclass
+class Fakes:
+    """
+    Latencies and verdicts of the fakes the workflow runs against.
+
+    Attributes:
+        llm: Latency of grader calls
+        generation: Latency of generation calls
+        embedding: Latency of query embeddings
+        search: Latency of web searches
+        script: Grader verdicts
+        seed: Seed of the latency samples
+    """
+
+    llm: Latency = field(default_factory=lambda: Latency("lognormal", 0.02, 0.5))
+    generation: Latency = field(default_factory=lambda: Latency("lognormal", 0.08, 0.5))
+    embedding: Latency = field(default_factory=lambda: Latency("constant", 0.005))
+    search: Latency = field(default_factory=lambda: Latency("lognormal", 0.1, 0.8))
+    script: Script = field(default_factory=Script)
+    seed: int = 0
+
+    def describe(self) -> Dict[str, Any]:
+        """Settings of the fakes, as recorded with the results."""
+        return {
+            "llm_latency": str(self.llm),
+            "generation_latency": str(self.generation),
+            "embedding_latency": str(self.embedding),
+            "search_latency": str(self.search),
+            "rates": {kind: getattr(self.script, kind) for kind in DEFAULT_RATES},
+            "overrides": self.script.overrides,
+            "seed": self.seed,
+        }
+
+
+def _getter(value: Any) -> Callable[[], Any]:
+    """A getter always returning ``value``."""
+    return lambda: value
+
+
+@contextlib.contextmanager
+def fake_environment(fakes: Fakes, tracer: Any) -> Iterator[HedgedSearch]:
+    """
+    Point the workflow at the fakes and the benchmark tracer.
+
+    The retriever searches the fake knowledge base in memory, every chain
+    calls a scripted model, web search goes through a hedged fake provider,
+    and the web search cache and write-back are off.
+
+    Args:
+        fakes: Latencies and verdicts of the fakes
+        tracer: Tracer receiving the spans of the run
+
+    Yields:
+        HedgedSearch: The web search used by the workflow, for its statistics
+    """
+    from graph.chains.answer_grader import create_answer_grader
+    from graph.chains.batch_retrieval_grader import create_batch_retrieval_grader
+    from graph.chains.generation import create_generation_chain
+    from graph.chains.hallucination_grader import create_hallucination_grader
+    from graph.chains.reflection_grader import create_reflection_grader
+    from graph.chains.retrieval_grader import create_retrieval_grader
+
+    grader = ScriptedChatModel(script=fakes.script, latency=fakes.llm, seed=fakes.seed, cache=False)
+    writer = ScriptedChatModel(script=fakes.script, latency=fakes.generation, seed=fakes.seed + 1, cache=False)
+    vectorstore = InMemoryVectorStore(FakeEmbeddings(fakes.embedding, seed=fakes.seed + 2))
+    vectorstore.add_documents([
+        Document(page_content=doc["content"], metadata={"source": doc["url"], "title": doc["title"]})
+        for doc in KNOWLEDGE_BASE
+    ])
+    retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+    search = HedgedSearch(FakeSearchProvider(WEB_CORPUS, fakes.search, seed=fakes.seed + 3))
+
+    targets = {
+        "graph.nodes.retrieve.get_retriever": _getter(retriever),
+        "graph.nodes.grade_documents.get_retrieval_grader": _getter(create_retrieval_grader(grader)),
+        "graph.nodes.grade_documents.get_batch_retrieval_grader": _getter(create_batch_retrieval_grader(grader)),
+        "graph.nodes.generate.get_generation_chain": _getter(create_generation_chain(writer)),
+        "graph.graph.get_hallucination_grader": _getter(create_hallucination_grader(grader)),
+        "graph.graph.get_answer_grader": _getter(create_answer_grader(grader)),
+        "graph.graph.get_reflection_grader": _getter(create_reflection_grader(grader)),
+        "graph.nodes.web_search.get_search": _getter(search),
+        "graph.nodes.web_search.get_search_cache": _getter(None),
+        "graph.nodes.web_search.WEB_WRITE_BACK": False,
+        "graph.telemetry.tracer": tracer,
+        "graph.search.tracer": tracer,
+    }
+    with contextlib.ExitStack() as stack:
+        for target, value in targets.items():
+            stack.enter_context(patch(target, value))
+        yield search
+
+
+async def _answer_all(app: Any, questions: Sequence[str], concurrency: int, tracer: Any) -> List[Dict[str, Any]]:
+    """Answer the questions, ``concurrency`` at a time, recording latency and usage."""
+    from graph.telemetry import TelemetryCallbackHandler
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(question: str) -> Dict[str, Any]:
+        async with semaphore:
+            usage = UsageHandler()
+            start = time.perf_counter()
+            state = await app.ainvoke(
+                {"question": question},
+                config={"callbacks": [TelemetryCallbackHandler(tracer), usage]},
+            )
+            return {
+                "latency": time.perf_counter() - start,
+                "llm_calls": usage.calls,
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "generations": state.get("generation_attempts", 0),
+                "web_searches": state.get("web_search_attempts", 0),
+            }
+
+    return await asyncio.gather(*(answer(question) for question in questions))
+
+
+def run_level(app: Any, questions: Sequence[str], concurrency: int, fakes: Fakes) -> Dict[str, Any]:
+    """
+    Answer every question at one concurrency level.
+
+    Args:
+        app: Compiled workflow
+        questions: Questions to answer, repeats included
+        concurrency: Number of questions in flight at a time
+        fakes: Latencies and verdicts of the fakes
+
+    Returns:
+        Dict[str, Any]: Throughput, latency percentiles, usage per question,
+        web search and pre-filter statistics and the latency of every stage
+    """
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    from graph.prefilter import PrefilterStats
+    from graph.telemetry import summarize
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("benchmarks.workflow")
+
+    prefilter_stats = PrefilterStats()
+    with fake_environment(fakes, tracer) as search, patch("graph.prefilter.stats", prefilter_stats):
+        start = time.perf_counter()
+        records = asyncio.run(_answer_all(app, questions, concurrency, tracer))
+        wall = time.perf_counter() - start
+    provider.shutdown()
+
+    latencies = [record["latency"] for record in records]
+    answered = len(records)
+    return {
+        "concurrency": concurrency,
+        "questions": answered,
+        "wall_s": wall,
+        "throughput_qps": answered / wall if wall else 0.0,
+        "latency_mean_s": statistics.mean(latencies),
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "latency_p99_s": percentile(latencies, 0.99),
+        **{
+            f"{key}_per_question": sum(record[key] for record in records) / answered
+            for key in ("llm_calls", "input_tokens", "output_tokens", "generations", "web_searches")
+        },
+        "search": search.stats(),
+        "prefilter": prefilter_stats.as_dict(),
+        "stages": summarize([json.loads(span.to_json()) for span in exporter.get_finished_spans()]),
+    }
+
+
+def run(
+    questions: Sequence[str],
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+    repeats: int = 1,
+    fakes: Optional[Fakes] = None,
+    grading_mode: Optional[str] = None,
+    check_mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Benchmark the workflow at several concurrency levels.
+
+    Args:
+        questions: Questions to answer
+        concurrency: Concurrency levels to measure
+        repeats: Number of times every question is answered per level
+        fakes: Latencies and verdicts of the fakes, the defaults if omitted
+        grading_mode: Relevance grading mode, ``GRADING_MODE`` by default
+        check_mode: Generation check mode, ``GENERATION_CHECK_MODE`` by default
+
+    Returns:
+        Dict[str, Any]: Settings of the run and one summary per concurrency level
+    """
+    import graph.config as config
+    from graph.graph import create_workflow
+
+    fakes = fakes or Fakes()
+    grading_mode = grading_mode or config.GRADING_MODE
+    check_mode = check_mode or config.GENERATION_CHECK_MODE
+    app = create_workflow().compile()
+
+    levels = []
+    with patch("graph.nodes.grade_documents.GRADING_MODE", grading_mode), \
+            patch("graph.graph.GENERATION_CHECK_MODE", check_mode):
+        for level in concurrency:
+            levels.append(run_level(app, list(questions) * repeats, level, fakes))
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {
+            "questions": len(questions),
+            "repeats": repeats,
+            "grading_mode": grading_mode,
+            "generation_check_mode": check_mode,
+            "max_generations": config.MAX_GENERATIONS,
+            "max_web_searches": config.MAX_WEB_SEARCHES,
+            **fakes.describe(),
+        },
+        "levels": levels,
+    }
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """
+    Find the tracked metrics that got worse than in a baseline run.
+
+    Levels are matched by concurrency; levels missing from either run are
+    skipped.
+
+    Args:
+        baseline: Results of an earlier run
+        results: Results of this run
+        tolerance: Relative change allowed before a metric counts as a regression
+
+    Returns:
+        List[str]: One description per regressed metric
+    """
+    earlier = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in results["levels"]:
+        before = earlier.get(level["concurrency"])
+        if before is None:
+            continue
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            old, new = before.get(metric), level.get(metric)
+            if old is None or new is None:
+                continue
+            worse = new < old * (1 - tolerance) if higher_is_better else new > old * (1 + tolerance)
+            if worse:
+                regressions.append(f"concurrency {level['concurrency']}: {metric} {old:.4g} -> {new:.4g}")
+    return regressions
+
+
+def load_questions(path: str) -> Script:
+    """
+    Read benchmark questions and their verdict rates from a JSONL file.
+
+    Args:
+        path: File with one ``{"question"[, "relevant", "grounded", "useful"]}`` object per line
+
+    Returns:
+        Script: Default rates, with the rates given in the file as overrides by question;
+        the questions are the keys of ``overrides``
+    """
+    overrides = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                overrides[row["question"]] = {kind: float(row[kind]) for kind in DEFAULT_RATES if kind in row}
+    return Script(overrides=overrides)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the workflow offline against scripted fakes.")
+    parser.add_argument("--questions", help="JSONL file of questions and verdict rates (default: samples)")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of times every question is answered per level")
+    parser.add_argument("--llm-latency", type=Latency.parse, default=Fakes().llm, help="Latency of grader calls")
+    parser.add_argument("--generation-latency", type=Latency.parse, default=Fakes().generation,
+                        help="Latency of generation calls")
+    parser.add_argument("--embedding-latency", type=Latency.parse, default=Fakes().embedding,
+                        help="Latency of query embeddings")
+    parser.add_argument("--search-latency", type=Latency.parse, default=Fakes().search, help="Latency of web searches")
+    for kind, rate in DEFAULT_RATES.items():
+        parser.add_argument(f"--{kind}", type=float, default=rate, help=f"Default rate of {kind} verdicts")
+    parser.add_argument("--grading-mode", choices=["concurrent", "batch"], help="Relevance grading mode")
+    parser.add_argument("--check-mode", choices=["sequential", "parallel", "combined"], help="Generation check mode")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of verdicts and latencies")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with the JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change tolerated against the baseline")
+    args = parser.parse_args()
+
+    script = load_questions(args.questions) if args.questions else Script()
+    questions = list(script.overrides) or BENCHMARK_QUESTIONS
+    script.relevant, script.grounded, script.useful = args.relevant, args.grounded, args.useful
+    script.seed = args.seed
+    fakes = Fakes(args.llm_latency, args.generation_latency, args.embedding_latency, args.search_latency,
+                  script, args.seed)
+
+    # The nodes print progress banners; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(questions, [int(level) for level in args.concurrency.split(",")], args.repeats, fakes,
+                      args.grading_mode, args.check_mode)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
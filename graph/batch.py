@@ -0,0 +1,174 @@
+"""
+Batch answering of questions from a file, for evaluation and backfill jobs.
+
+Questions are read from a JSONL file (one ``{"id": ..., "question": ...}``
+object per line) or a CSV file with ``id`` and ``question`` columns; rows
+without an ID are numbered by their position. A pool of async workers runs
+them through the workflow, and every result is appended to a JSONL file as
+soon as it completes, so the output is in completion order and survives an
+interruption. Running the same batch again skips the IDs already answered and
+retries the ones that failed.
+"""
+import asyncio
+import csv
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Set, TextIO, Tuple
+
+from graph.config import BATCH_CONCURRENCY
+from graph.stats import percentile
+
+logger = logging.getLogger("self_rag.batch")
+
+Question = Tuple[str, str]
+
+
+def read_questions(path: str) -> List[Question]:
+    """
+    Read the questions of a batch.
+
+    Args:
+        path (str): JSONL file, or CSV file if its name ends in ``.csv``
+
+    Returns:
+        List[Question]: (ID, question) pairs in file order
+    """
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [
+        (str(i) if row.get("id") in (None, "") else str(row["id"]), row["question"])
+        for i, row in enumerate(rows, start=1)
+    ]
+
+
+def completed_ids(path: str) -> Set[str]:
+    """
+    Collect the IDs already answered in an output file.
+
+    Failed questions and a line cut short by an interruption do not count.
+
+    Args:
+        path (str): JSONL output of an earlier run
+
+    Returns:
+        Set[str]: IDs with a result
+    """
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in record:
+                done.add(str(record["id"]))
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _record(question_id: str, question: str, state: Dict[str, Any], latency: float) -> Dict[str, Any]:
+    return {
+        "id": question_id,
+        "question": question,
+        "generation": state.get("generation", ""),
+        "verdict": "budget exhausted" if state.get("budget_exhausted") else "useful",
+        "sources": [doc.metadata.get("source") for doc in state.get("documents") or []],
+        "latency_s": round(latency, 3),
+    }
+
+
+async def _worker(app: Any, queue: asyncio.Queue, output: TextIO, latencies: List[float], failures: List[str]) -> None:
+    while True:
+        try:
+            question_id, question = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            state = await app.ainvoke({"question": question})
+        except Exception as e:
+            logger.error(f"Question {question_id} failed: {str(e)}")
+            record = {"id": question_id, "question": question, "error": str(e)}
+            failures.append(question_id)
+        else:
+            latency = time.perf_counter() - start
+            record = _record(question_id, question, state, latency)
+            latencies.append(latency)
+        # Written right away, so finished results survive an interruption
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+
+async def run_batch(
+    questions: List[Question],
+    output_path: str,
+    concurrency: Optional[int] = None,
+    app: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Answer a batch of questions, appending results to a JSONL file.
+
+    Args:
+        questions (List[Question]): (ID, question) pairs
+        output_path (str): JSONL file results are appended to; IDs already
+            answered in it are skipped
+        concurrency (Optional[int]): Questions in flight at once, ``BATCH_CONCURRENCY`` by default
+        app (Optional[Any]): Compiled workflow, the application by default
+
+    Returns:
+        Dict[str, Any]: Throughput and latency summary of the run
+    """
+    if app is None:
+        from graph.graph import get_app
+
+        app = get_app()
+
+    done = completed_ids(output_path)
+    queue: asyncio.Queue = asyncio.Queue()
+    for question_id, question in questions:
+        if question_id not in done:
+            queue.put_nowait((question_id, question))
+    skipped = len(questions) - queue.qsize()
+    workers = max(1, min(concurrency or BATCH_CONCURRENCY, queue.qsize()))
+    logger.info(f"Answering {queue.qsize()} questions with {workers} workers, skipping {skipped} already done")
+
+    latencies: List[float] = []
+    failures: List[str] = []
+    start = time.perf_counter()
+    with open(output_path, "a") as output:
+        if output.tell() > 0 and not _ends_with_newline(output_path):
+            # Terminate a line cut short by an interruption
+            output.write("\n")
+        await asyncio.gather(*(_worker(app, queue, output, latencies, failures) for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    summary: Dict[str, Any] = {
+        "questions": len(questions),
+        "skipped": skipped,
+        "answered": len(latencies),
+        "failed": len(failures),
+        "concurrency": workers,
+        "wall_time_s": round(elapsed, 3),
+        "throughput_qps": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+    if latencies:
+        summary.update(
+            latency_mean_s=round(statistics.mean(latencies), 3),
+            latency_p50_s=round(percentile(latencies, 0.5), 3),
+            latency_p95_s=round(percentile(latencies, 0.95), 3),
+            latency_max_s=round(max(latencies), 3),
+        )
+    return summary
@@ -0,0 +1,26 @@
+"""
+LangChain chains used in the graph.
+
+Every chain builds its OpenAI client on first use through its ``get_*``
+getter, so importing the chains needs no API key.
+"""
+
+
+def build_chains() -> None:
+    """Build every chain and its OpenAI client, e.g. while warming up a server."""
+    from graph.chains.answer_grader import get_answer_grader
+    from graph.chains.batch_retrieval_grader import get_batch_retrieval_grader
+    from graph.chains.generation import get_generation_chain
+    from graph.chains.hallucination_grader import get_hallucination_grader
+    from graph.chains.reflection_grader import get_reflection_grader
+    from graph.chains.retrieval_grader import get_retrieval_grader
+
+    for getter in (
+        get_answer_grader,
+        get_batch_retrieval_grader,
+        get_generation_chain,
+        get_hallucination_grader,
+        get_reflection_grader,
+        get_retrieval_grader,
+    ):
+        getter()
@@ -1,16 +1,15 @@
 """
 Chain for grading whether an answer addresses a question.
 """
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
 from graph.chains.models import GradeAnswer
 
-# Initialize the LLM
-llm = ChatOpenAI(temperature=0)
-structured_llm_grader = llm.with_structured_output(GradeAnswer, method="function_calling")
-
 # Define the system prompt
 system = """You are a grader assessing whether an answer addresses / resolves a question.
 Give a binary score 'yes' or 'no'. 'Yes' means that the answer resolves the question."""
@@ -23,5 +22,26 @@ answer_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-# Create the grader chain
-answer_grader: RunnableSequence = answer_prompt | structured_llm_grader
+
+def create_answer_grader(llm: BaseChatModel) -> RunnableSequence:
+    """
+    Build the answer grader around a chat model.
+
+    Args:
+        llm (BaseChatModel): Chat model supporting structured output
+
+    Returns:
+        RunnableSequence: Chain returning a ``GradeAnswer``
+    """
+    return answer_prompt | llm.with_structured_output(GradeAnswer, method="function_calling")
+
+
+@lru_cache(maxsize=1)
+def get_answer_grader() -> RunnableSequence:
+    """
+    Build the answer grader and its OpenAI client on first use.
+
+    Returns:
+        RunnableSequence: The answer grader chain
+    """
+    return create_answer_grader(ChatOpenAI(temperature=0))
@@ -0,0 +1,62 @@
+"""
+Chain for grading the relevance of all retrieved documents in a single call.
+
+Compared with ``retrieval_grader``, the system prompt and the question are sent
+once per question instead of once per document. The documents are numbered and
+packed into the context token budget like in the other chains, so callers only
+pass the documents that fit it uncut (see ``graph.context.fitting_documents``).
+"""
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+from langchain_openai import ChatOpenAI
+
+from graph.chains.models import GradeDocumentsBatch
+from graph.config import GRADING_TIMEOUT
+from graph.context import packed
+
+# Define the system prompt
+system = """You are a grader assessing relevance of numbered retrieved documents to a user question.
+If a document contains keyword(s) or semantic meaning related to the question, grade it as relevant.
+For every document, give its number (shown in brackets before it) and a binary score 'yes' or 'no' to indicate whether it is relevant to the question."""
+
+# Create the prompt template
+batch_grade_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Retrieved documents: \n\n {documents} \n\n User question: {question}"),
+    ]
+)
+
+
+def create_batch_retrieval_grader(llm: BaseChatModel) -> RunnableSequence:
+    """
+    Build the batch relevance grader around a chat model.
+
+    The chain takes the ``question`` and the list of ``documents`` to grade.
+
+    Args:
+        llm (BaseChatModel): Chat model supporting structured output
+
+    Returns:
+        RunnableSequence: Chain returning a ``GradeDocumentsBatch``
+    """
+    return packed("documents") | batch_grade_prompt | llm.with_structured_output(
+        GradeDocumentsBatch, method="function_calling"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_batch_retrieval_grader() -> RunnableSequence:
+    """
+    Build the batch relevance grader and its OpenAI client on first use.
+
+    Grading calls give up after ``GRADING_TIMEOUT`` seconds.
+
+    Returns:
+        RunnableSequence: The batch relevance grader chain
+    """
+    return create_batch_retrieval_grader(ChatOpenAI(temperature=0, timeout=GRADING_TIMEOUT))
+
@@ -1,17 +1,54 @@
 """
 Chain for generating answers based on retrieved documents.
 """
-from langchain import hub
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
-# Initialize the LLM with temperature 0 for consistent outputs
-llm = ChatOpenAI(temperature=0)
+from graph.context import packed
+
+# The RAG prompt from LangChain Hub (rlm/rag-prompt), kept locally so that
+# importing the chain needs no network round trip
+template = """You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise.
+Question: {question}
+Context: {context}
+Answer:"""
+
+prompt = ChatPromptTemplate.from_messages([("human", template)])
+
+# Tag of the generation LLM calls, used to pick their tokens out of the stream
+GENERATION_TAG = "generation"
+
+
+
+def create_generation_chain(llm: BaseChatModel) -> RunnableSequence:
+    """
+    Build the generation chain around a chat model.
+
+    The chain takes context (documents) and a question, and generates an
+    answer; the documents are packed into a token-budgeted context first.
+
+    Args:
+        llm (BaseChatModel): Chat model generating the answer
+
+    Returns:
+        RunnableSequence: Chain returning the answer as a string
+    """
+    return packed("context") | prompt | llm.with_config(tags=[GENERATION_TAG]) | StrOutputParser()
+
+
+@lru_cache(maxsize=1)
+def get_generation_chain() -> RunnableSequence:
+    """
+    Build the generation chain and its OpenAI client on first use.
 
-# Pull the RAG prompt from LangChain Hub
-# This prompt is designed for retrieval-augmented generation
-prompt = hub.pull("rlm/rag-prompt")
+    The model runs at temperature 0 for consistent outputs.
 
-# Create the generation chain
-# This chain takes context (documents) and a question, and generates an answer
-generation_chain = prompt | llm | StrOutputParser()
+    Returns:
+        RunnableSequence: The generation chain
+    """
+    return create_generation_chain(ChatOpenAI(temperature=0))
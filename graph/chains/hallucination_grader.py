@@ -1,15 +1,15 @@
 """
 Chain for grading whether an answer is grounded in the provided documents.
 """
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
 from graph.chains.models import GradeHallucinations
-
-# Initialize the LLM
-llm = ChatOpenAI(temperature=0)
-structured_llm_grader = llm.with_structured_output(GradeHallucinations, method="function_calling")
+from graph.context import packed
 
 # Define the system prompt
 system = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts.
@@ -23,5 +23,28 @@ hallucination_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-# Create the grader chain
-hallucination_grader: RunnableSequence = hallucination_prompt | structured_llm_grader
+
+def create_hallucination_grader(llm: BaseChatModel) -> RunnableSequence:
+    """
+    Build the hallucination grader around a chat model.
+
+    Args:
+        llm (BaseChatModel): Chat model supporting structured output
+
+    Returns:
+        RunnableSequence: Chain returning a ``GradeHallucinations``
+    """
+    return packed("documents") | hallucination_prompt | llm.with_structured_output(
+        GradeHallucinations, method="function_calling"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_hallucination_grader() -> RunnableSequence:
+    """
+    Build the hallucination grader and its OpenAI client on first use.
+
+    Returns:
+        RunnableSequence: The hallucination grader chain
+    """
+    return create_hallucination_grader(ChatOpenAI(temperature=0))
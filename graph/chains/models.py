@@ -1,6 +1,8 @@
 """
 Shared Pydantic models for the RAG system.
 """
+from typing import List
+
 from pydantic import BaseModel, Field
 
 
@@ -20,9 +22,39 @@ class GradeHallucinations(BaseModel):
     )
 
 
+class GradeReflection(BaseModel):
+    """Model for grading groundedness and usefulness of an answer in one call."""
+
+    grounded: bool = Field(
+        description="Answer is grounded in the facts, 'yes' or 'no'"
+    )
+    answers_question: bool = Field(
+        description="Answer addresses the question, 'yes' or 'no'"
+    )
+
+
 class GradeDocuments(BaseModel):
     """Model for grading whether documents are relevant to a question."""
 
     binary_score: str = Field(
         description="Documents are relevant to the question, 'yes' or 'no'"
     )
+
+
+class DocumentGrade(BaseModel):
+    """Relevance verdict for one document of a batch."""
+
+    index: int = Field(
+        description="Number of the document, as given in the prompt"
+    )
+    binary_score: str = Field(
+        description="Document is relevant to the question, 'yes' or 'no'"
+    )
+
+
+class GradeDocumentsBatch(BaseModel):
+    """Model for grading the relevance of several documents in one call."""
+
+    grades: List[DocumentGrade] = Field(
+        description="One verdict per document"
+    )
@@ -0,0 +1,59 @@
+"""
+Chain for grading, in a single call, whether an answer is grounded in the
+provided documents and whether it addresses the question.
+
+Replaces ``hallucination_grader`` followed by ``answer_grader``, which send the
+generation twice and take two requests.
+"""
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
+from langchain_openai import ChatOpenAI
+
+from graph.chains.models import GradeReflection
+from graph.context import packed
+
+# Define the system prompt
+system = """You are a grader assessing an LLM generation against a set of retrieved facts and a user question.
+Give two binary scores 'yes' or 'no':
+- grounded: 'Yes' means that the answer is grounded in / supported by the set of facts.
+- answers_question: 'Yes' means that the answer resolves the question."""
+
+# Create the prompt template
+reflection_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        (
+            "human",
+            "Set of facts: \n\n {documents} \n\n User question: \n\n {question} \n\n LLM generation: {generation}",
+        ),
+    ]
+)
+
+
+def create_reflection_grader(llm: BaseChatModel) -> RunnableSequence:
+    """
+    Build the reflection grader around a chat model.
+
+    Args:
+        llm (BaseChatModel): Chat model supporting structured output
+
+    Returns:
+        RunnableSequence: Chain returning a ``GradeReflection``
+    """
+    return packed("documents") | reflection_prompt | llm.with_structured_output(
+        GradeReflection, method="function_calling"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_reflection_grader() -> RunnableSequence:
+    """
+    Build the reflection grader and its OpenAI client on first use.
+
+    Returns:
+        RunnableSequence: The reflection grader chain
+    """
+    return create_reflection_grader(ChatOpenAI(temperature=0))
@@ -1,14 +1,15 @@
 """
 Chain for grading whether documents are relevant to a question.
 """
+from functools import lru_cache
+
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 
 from graph.chains.models import GradeDocuments
-
-# Initialize the LLM
-llm = ChatOpenAI(temperature=0)
-structured_llm_grader = llm.with_structured_output(GradeDocuments, method="function_calling")
+from graph.config import GRADING_TIMEOUT
 
 # Define the system prompt
 system = """You are a grader assessing relevance of a retrieved document to a user question.
@@ -23,5 +24,28 @@ grade_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-# Create the grader chain
-retrieval_grader = grade_prompt | structured_llm_grader
+
+def create_retrieval_grader(llm: BaseChatModel) -> RunnableSequence:
+    """
+    Build the relevance grader around a chat model.
+
+    Args:
+        llm (BaseChatModel): Chat model supporting structured output
+
+    Returns:
+        RunnableSequence: Chain returning a ``GradeDocuments``
+    """
+    return grade_prompt | llm.with_structured_output(GradeDocuments, method="function_calling")
+
+
+@lru_cache(maxsize=1)
+def get_retrieval_grader() -> RunnableSequence:
+    """
+    Build the relevance grader and its OpenAI client on first use.
+
+    Grading calls give up after ``GRADING_TIMEOUT`` seconds.
+
+    Returns:
+        RunnableSequence: The relevance grader chain
+    """
+    return create_retrieval_grader(ChatOpenAI(temperature=0, timeout=GRADING_TIMEOUT))
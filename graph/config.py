@@ -0,0 +1,105 @@
+"""
+Configuration for the Self-RAG workflow.
+"""
+import os
+from typing import Optional
+
+
+def _optional_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+# Relevance grading: maximum concurrent grader calls (per question when async,
+# per process otherwise), and timeout in seconds of each attempt; the OpenAI
+# client retries a timed-out attempt, and the grading node waits at most one
+# timeout per round of calls. A document whose grading fails or times out
+# counts as not relevant.
+GRADING_CONCURRENCY = int(os.getenv("SELF_RAG_GRADING_CONCURRENCY", "8"))
+GRADING_TIMEOUT = float(os.getenv("SELF_RAG_GRADING_TIMEOUT", "30"))
+
+# How retrieved documents are graded: "concurrent" makes one grader call per
+# document in parallel, "batch" grades all documents in a single call
+GRADING_MODE = os.getenv("SELF_RAG_GRADING_MODE", "concurrent")
+
+# Relevance pre-filter: lexical-overlap scores from which documents are
+# accepted, and up to which they are rejected, without LLM grading. Unset
+# thresholds send every document to the grader; fit them with
+# `python -m graph.prefilter calibrate`.
+PREFILTER_ACCEPT = _optional_float("SELF_RAG_PREFILTER_ACCEPT")
+PREFILTER_REJECT = _optional_float("SELF_RAG_PREFILTER_REJECT")
+
+# JSONL log of LLM relevance grades and their pre-filter scores (unset: off)
+GRADE_LOG_PATH = os.getenv("SELF_RAG_GRADE_LOG")
+
+# Post-generation check: "sequential" grades the answer only once the
+# generation is known to be grounded; "parallel" grades both at once, so the
+# check costs one LLM latency (the answer grade is wasted when the generation
+# turns out not to be grounded); "combined" asks for both verdicts in a single
+# call, halving requests and the tokens spent re-sending the generation
+GENERATION_CHECK_MODE = os.getenv("SELF_RAG_GENERATION_CHECK_MODE", "sequential")
+
+# Budgets bounding the worst case of a question: maximum generations (the
+# first answer plus regenerations), maximum web searches, and seconds from the
+# start of the request after which the best answer so far is returned
+MAX_GENERATIONS = int(os.getenv("SELF_RAG_MAX_GENERATIONS", "3"))
+MAX_WEB_SEARCHES = int(os.getenv("SELF_RAG_MAX_WEB_SEARCHES", "2"))
+REQUEST_TIMEOUT = float(os.getenv("SELF_RAG_REQUEST_TIMEOUT", "120"))
+
+# Batch mode (python main.py batch): questions in flight at once
+BATCH_CONCURRENCY = int(os.getenv("SELF_RAG_BATCH_CONCURRENCY", "8"))
+
+# HTTP server (python server.py): questions answered at once, and requests
+# allowed to wait for a slot; further requests are shed with 429
+SERVER_CONCURRENCY = int(os.getenv("SELF_RAG_SERVER_CONCURRENCY", "32"))
+SERVER_QUEUE_SIZE = int(os.getenv("SELF_RAG_SERVER_QUEUE_SIZE", "64"))
+
+# Persistent LLM response cache shared by every chain: the chains run at
+# temperature 0, so identical prompts are answered from disk. SELF_RAG_LLM_CACHE=0
+# bypasses it; the least recently used responses beyond the size are evicted.
+LLM_CACHE = os.getenv("SELF_RAG_LLM_CACHE", "1") not in ("", "0")
+LLM_CACHE_PATH = os.getenv("SELF_RAG_LLM_CACHE_PATH", "./.cache/llm.sqlite3")
+LLM_CACHE_SIZE = int(os.getenv("SELF_RAG_LLM_CACHE_SIZE", "10000"))
+
+# Token budget of the retrieved context rendered into generation and
+# hallucination grading prompts; documents are packed in relevance order
+CONTEXT_TOKEN_BUDGET = int(os.getenv("SELF_RAG_CONTEXT_TOKENS", "2000"))
+
+# Web search results cached by normalized question: maximum entries (0
+# disables the cache) and time-to-live in seconds
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("SELF_RAG_WEB_SEARCH_CACHE_SIZE", "256"))
+WEB_SEARCH_CACHE_TTL = float(os.getenv("SELF_RAG_WEB_SEARCH_CACHE_TTL", "21600"))
+
+# Write-back of web search results into the knowledge base (off by default):
+# results the search engine scored at least WEB_WRITE_BACK_MIN_SCORE are
+# chunked, embedded and upserted in the background, so recurring topics are
+# answered by local retrieval next time
+WEB_WRITE_BACK = os.getenv("SELF_RAG_WEB_WRITE_BACK", "0") not in ("", "0")
+WEB_WRITE_BACK_MIN_SCORE = float(os.getenv("SELF_RAG_WEB_WRITE_BACK_MIN_SCORE", "0.5"))
+
+# Web search provider: "tavily" (live) or "local" (offline search over the
+# JSONL corpus at SELF_RAG_LOCAL_CORPUS, one {"url", "title", "content"} per line)
+SEARCH_PROVIDER = os.getenv("SELF_RAG_SEARCH_PROVIDER", "tavily")
+LOCAL_CORPUS_PATH = os.getenv("SELF_RAG_LOCAL_CORPUS")
+
+# Web search resilience: seconds a search may take; latency quantile after
+# which a slow call is hedged with a duplicate request, once that many calls
+# were observed (quantile 0 disables hedging); consecutive failed searches
+# after which the provider is skipped, and for how many seconds
+WEB_SEARCH_TIMEOUT = float(os.getenv("SELF_RAG_WEB_SEARCH_TIMEOUT", "10"))
+WEB_SEARCH_HEDGE_QUANTILE = float(os.getenv("SELF_RAG_WEB_SEARCH_HEDGE_QUANTILE", "0.95"))
+WEB_SEARCH_HEDGE_MIN_SAMPLES = int(os.getenv("SELF_RAG_WEB_SEARCH_HEDGE_MIN_SAMPLES", "20"))
+WEB_SEARCH_BREAKER_FAILURES = int(os.getenv("SELF_RAG_WEB_SEARCH_BREAKER_FAILURES", "5"))
+WEB_SEARCH_BREAKER_RESET = float(os.getenv("SELF_RAG_WEB_SEARCH_BREAKER_RESET", "30"))
+
+# Web search results added to the context: each result is its own document,
+# scored by its overlap with the question (the pre-filter score); results
+# below the minimum score are dropped and the best ones are kept
+WEB_RESULTS_MAX = int(os.getenv("SELF_RAG_WEB_RESULTS", "3"))
+WEB_RESULT_MIN_SCORE = float(os.getenv("SELF_RAG_WEB_RESULT_MIN_SCORE", "0.2"))
+
+# Telemetry (OpenTelemetry traces and metrics): "file" appends them as JSON
+# lines to SELF_RAG_TELEMETRY_FILE, "otlp" exports them to the collector set
+# with OTEL_EXPORTER_OTLP_ENDPOINT, "console" prints them; unset disables it
+TELEMETRY_EXPORTER = os.getenv("SELF_RAG_TELEMETRY", "")
+TELEMETRY_FILE = os.getenv("SELF_RAG_TELEMETRY_FILE", "./rag_traces.jsonl")
@@ -0,0 +1,164 @@
+"""
+Token-budgeted rendering of documents into prompt context.
+
+Documents are rendered compactly, one numbered block per document with its
+source and whitespace-collapsed content, instead of the repr of a list of
+``Document`` objects. Blocks are added in relevance order (the order of the
+list) until ``CONTEXT_TOKEN_BUDGET`` tokens are used; the document that
+crosses the budget is cut on a word boundary and the rest are dropped.
+
+The generation chain and the grounding graders pack their ``documents`` with
+the same function and budget, so an answer is graded against exactly the
+context it was generated from.
+"""
+import logging
+import math
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Union
+
+from langchain.schema import Document
+from langchain_core.runnables import Runnable, RunnablePassthrough
+
+from graph.config import CONTEXT_TOKEN_BUDGET
+
+logger = logging.getLogger("self_rag.context")
+
+# Blocks shorter than this are not worth adding once the budget is nearly used
+MIN_BLOCK_TOKENS = 32
+
+
+@lru_cache(maxsize=1)
+def token_counter() -> Callable[[str], int]:
+    """
+    Create the token counter on first use.
+
+    Returns:
+        Callable[[str], int]: tiktoken counter, or an estimate of four
+        characters per token if the encoding cannot be loaded
+    """
+    from ingestion.embeddings import tiktoken_length
+
+    try:
+        return tiktoken_length()
+    except Exception as e:
+        logger.warning(f"Could not load the tiktoken encoding, estimating token counts: {str(e)}")
+        return lambda text: math.ceil(len(text) / 4)
+
+
+def render_document(doc: Union[Document, str], number: int) -> str:
+    """
+    Render one document as a compact, numbered block.
+
+    Args:
+        doc (Union[Document, str]): Document, or plain text
+        number (int): Position of the document in the context
+
+    Returns:
+        str: "[number] (source) content" with collapsed whitespace
+    """
+    if isinstance(doc, Document):
+        content, source = doc.page_content, doc.metadata.get("source")
+    else:
+        content, source = str(doc), None
+    content = " ".join(content.split())
+    return f"[{number}] ({source}) {content}" if source else f"[{number}] {content}"
+
+
+def _truncate(text: str, max_tokens: int, length_function: Callable[[str], int]) -> str:
+    """Longest word prefix of ``text`` within ``max_tokens``."""
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if length_function(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def pack_context(
+    documents: Union[Sequence[Union[Document, str]], str, None],
+    max_tokens: Optional[int] = None,
+    length_function: Optional[Callable[[str], int]] = None,
+) -> str:
+    """
+    Render documents into a prompt context within a token budget.
+
+    Args:
+        documents: Documents in relevance order; a string is taken as an
+            already rendered context and returned unchanged
+        max_tokens (Optional[int]): Token budget, ``CONTEXT_TOKEN_BUDGET`` by default
+        length_function (Optional[Callable[[str], int]]): Token counter, tiktoken by default
+
+    Returns:
+        str: Rendered blocks separated by blank lines
+    """
+    if isinstance(documents, str):
+        return documents
+    budget = CONTEXT_TOKEN_BUDGET if max_tokens is None else max_tokens
+    length_function = length_function or token_counter()
+
+    blocks: List[str] = []
+    used = 0
+    documents = documents or []
+    for number, doc in enumerate(documents, start=1):
+        block = render_document(doc, number)
+        # Blocks are separated by a blank line, roughly one token
+        tokens = length_function(block) + (1 if blocks else 0)
+        if used + tokens <= budget:
+            blocks.append(block)
+            used += tokens
+            continue
+        remaining = budget - used - (1 if blocks else 0)
+        if remaining >= MIN_BLOCK_TOKENS:
+            blocks.append(_truncate(block, remaining, length_function))
+            used = budget
+        break
+
+    if len(blocks) < len(documents) or used >= budget:
+        logger.info(f"Packed {len(blocks)}/{len(documents)} documents into the {budget}-token context budget")
+    return "\n\n".join(blocks)
+
+
+def fitting_documents(
+    documents: Sequence[Union[Document, str]],
+    max_tokens: Optional[int] = None,
+    length_function: Optional[Callable[[str], int]] = None,
+) -> int:
+    """
+    Count the leading documents that fit the token budget in full.
+
+    :func:`pack_context` renders exactly these documents without cutting them,
+    so callers can handle the others instead of losing them to the budget.
+
+    Args:
+        documents: Documents in relevance order
+        max_tokens (Optional[int]): Token budget, ``CONTEXT_TOKEN_BUDGET`` by default
+        length_function (Optional[Callable[[str], int]]): Token counter, tiktoken by default
+
+    Returns:
+        int: Number of leading documents packed uncut
+    """
+    budget = CONTEXT_TOKEN_BUDGET if max_tokens is None else max_tokens
+    length_function = length_function or token_counter()
+
+    used = 0
+    for number, doc in enumerate(documents, start=1):
+        used += length_function(render_document(doc, number)) + (1 if number > 1 else 0)
+        if used > budget:
+            return number - 1
+    return len(documents)
+
+
+def packed(key: str) -> Runnable:
+    """
+    Chain step packing the documents under ``key`` of the chain input.
+
+    Args:
+        key (str): Input variable holding the documents
+
+    Returns:
+        Runnable: Step replacing the documents with their packed context
+    """
+    return RunnablePassthrough.assign(**{key: lambda inputs: pack_context(inputs[key])})
@@ -1,35 +1,81 @@
+import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langgraph.graph import END, StateGraph
 
-from graph.chains.answer_grader import answer_grader
-from graph.chains.hallucination_grader import hallucination_grader
-from graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
-from graph.nodes import generate, grade_documents, retrieve, web_search
+from graph.chains.answer_grader import get_answer_grader
+from graph.chains.hallucination_grader import get_hallucination_grader
+from graph.chains.reflection_grader import get_reflection_grader
+from graph.config import GENERATION_CHECK_MODE, LLM_CACHE, MAX_GENERATIONS, MAX_WEB_SEARCHES
+from graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH, FINALIZE
+from graph.nodes import (
+    agenerate,
+    agrade_documents,
+    aretrieve,
+    aweb_search,
+    finalize,
+    generate,
+    grade_documents,
+    retrieve,
+    web_search,
+)
 from graph.state import GraphState
+from graph.telemetry import traced
 
 # Load environment variables first
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("rag_system.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("self_rag")
 
 
+def configure_logging(log_file: Optional[str] = "rag_system.log") -> None:
+    """
+    Configure logging for command line entry points.
+
+    Importing the graph never touches logging configuration; entry points call
+    this explicitly.
+
+    Args:
+        log_file: File to write logs to in addition to the console, or None
+    """
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+
+def deadline_passed(state: Dict[str, Any]) -> bool:
+    """
+    Check whether the latency budget of the request is used up.
+
+    Args:
+        state: Current state of the workflow
+
+    Returns:
+        bool: True if the state carries a deadline that has passed
+    """
+    deadline = state.get("deadline")
+    return deadline is not None and time.time() >= deadline
+
+
 def decide_to_generate(state: Dict[str, Any]) -> str:
     """
     Decide whether to generate an answer or perform web search based on document relevance.
 
+    Web search is skipped once its budget or the deadline is exhausted.
+
     Args:
         state: Current state of the workflow
 
@@ -39,7 +85,13 @@ def decide_to_generate(state: Dict[str, Any]) -> str:
     logger.info("Assessing graded documents")
     print("---ASSESS GRADED DOCUMENTS---")
 
-    if state["web_search"]:
+    if state["web_search"] and (
+        state.get("web_search_attempts", 0) >= MAX_WEB_SEARCHES or deadline_passed(state)
+    ):
+        logger.info("Decision: Web search budget exhausted, generate answer from documents")
+        print("---DECISION: WEB SEARCH BUDGET EXHAUSTED, GENERATE---")
+        return GENERATE
+    elif state["web_search"]:
         logger.info("Decision: Not all documents are relevant to question, including web search")
         print(
             "---DECISION: NOT ALL DOCUMENTS ARE NOT RELEVANT TO QUESTION, INCLUDE WEB SEARCH---"
@@ -51,48 +103,221 @@ def decide_to_generate(state: Dict[str, Any]) -> str:
         return GENERATE
 
 
+def _grade_answer_speculatively(inputs: Dict[str, Any]) -> Callable[[], Any]:
+    """Start grading the answer in the background; return a function awaiting the grade."""
+    executor = ContextThreadPoolExecutor(max_workers=1)
+    future = executor.submit(get_answer_grader().invoke, inputs)
+    executor.shutdown(wait=False)
+    return future.result
+
+
+def check_generation(
+    question: str, documents: Any, generation: str, mode: Optional[str] = None
+) -> Tuple[bool, Callable[[], bool]]:
+    """
+    Grade a generation for groundedness and usefulness.
+
+    Args:
+        question: User question
+        documents: Documents the generation is based on
+        generation: Generated answer
+        mode: "sequential", "parallel" or "combined", ``GENERATION_CHECK_MODE`` by default
+
+    Returns:
+        Tuple[bool, Callable[[], bool]]: Whether the generation is grounded, and
+        a function returning whether it addresses the question
+    """
+    mode = mode or GENERATION_CHECK_MODE
+    if mode == "combined":
+        reflection = get_reflection_grader().invoke(
+            {"documents": documents, "question": question, "generation": generation}
+        )
+        return reflection.grounded, lambda: reflection.answers_question
+
+    answer_inputs = {"question": question, "generation": generation}
+    if mode == "parallel":
+        answer_result = _grade_answer_speculatively(answer_inputs)
+    else:
+        def answer_result():
+            return get_answer_grader().invoke(answer_inputs)
+
+    # Check if generation is grounded in documents
+    hallucination_score = get_hallucination_grader().invoke(
+        {"documents": documents, "generation": generation}
+    )
+    return hallucination_score.binary_score, lambda: answer_result().binary_score
+
+
+async def acheck_generation(
+    question: str, documents: Any, generation: str, mode: Optional[str] = None
+) -> Tuple[bool, Callable[[], Awaitable[bool]]]:
+    """
+    Async version of :func:`check_generation`.
+
+    Args:
+        question: User question
+        documents: Documents the generation is based on
+        generation: Generated answer
+        mode: "sequential", "parallel" or "combined", ``GENERATION_CHECK_MODE`` by default
+
+    Returns:
+        Tuple[bool, Callable[[], Awaitable[bool]]]: Whether the generation is
+        grounded, and a coroutine function returning whether it addresses the question
+    """
+    mode = mode or GENERATION_CHECK_MODE
+    if mode == "combined":
+        reflection = await get_reflection_grader().ainvoke(
+            {"documents": documents, "question": question, "generation": generation}
+        )
+
+        async def reflected() -> bool:
+            return reflection.answers_question
+
+        return reflection.grounded, reflected
+
+    answer_inputs = {"question": question, "generation": generation}
+    answer_task = None
+    if mode == "parallel":
+        answer_task = asyncio.ensure_future(get_answer_grader().ainvoke(answer_inputs))
+
+    async def answers_question() -> bool:
+        score = await answer_task if answer_task else await get_answer_grader().ainvoke(answer_inputs)
+        return score.binary_score
+
+    # Check if generation is grounded in documents
+    try:
+        hallucination_score = await get_hallucination_grader().ainvoke(
+            {"documents": documents, "generation": generation}
+        )
+    except BaseException:
+        if answer_task:
+            answer_task.cancel()
+        raise
+    if answer_task and not hallucination_score.binary_score:
+        # The answer grade is not needed for an ungrounded generation
+        answer_task.cancel()
+    return hallucination_score.binary_score, answers_question
+
+
 def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
     """
     Grade whether the generated answer is grounded in documents and addresses the question.
 
+    With ``GENERATION_CHECK_MODE`` set to "parallel", the answer is graded
+    while groundedness is checked, so the check costs one LLM latency instead
+    of two; with "combined", both verdicts come from a single grader call.
+    Routing is the same in every mode.
+
+    Instead of another generation or web search, the answer is returned as
+    "budget exhausted" once ``MAX_GENERATIONS`` answers were generated,
+    ``MAX_WEB_SEARCHES`` searches were run or the deadline has passed.
+
     Args:
         state: Current state of the workflow
 
     Returns:
-        str: Result of grading ("useful", "not useful", or "not supported")
+        str: Result of grading ("useful", "not useful", "not supported" or "budget exhausted")
     """
+    if _check_deadline(state):
+        return "budget exhausted"
+
     logger.info("Checking for hallucinations")
     print("---CHECK HALLUCINATIONS---")
 
-    question = state["question"]
-    documents = state["documents"]
-    generation = state["generation"]
+    grounded, answers_question = check_generation(state["question"], state["documents"], state["generation"])
+    return _route_generation(state, grounded, answers_question)
 
-    # Check if generation is grounded in documents
-    hallucination_score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
+
+async def agrade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
+    """
+    Async version of :func:`grade_generation_grounded_in_documents_and_question`.
+
+    Args:
+        state: Current state of the workflow
+
+    Returns:
+        str: Result of grading ("useful", "not useful", "not supported" or "budget exhausted")
+    """
+    if _check_deadline(state):
+        return "budget exhausted"
+
+    logger.info("Checking for hallucinations")
+    print("---CHECK HALLUCINATIONS---")
+
+    grounded, answers_question = await acheck_generation(
+        state["question"], state["documents"], state["generation"]
     )
+    answered = await answers_question() if grounded else False
+    return _route_generation(state, grounded, lambda: answered)
+
+
+def _check_deadline(state: GraphState) -> bool:
+    """Whether the answer must be returned unchecked because the deadline has passed."""
+    if deadline_passed(state):
+        logger.warning("Deadline reached, returning the answer without checking it")
+        print("---DECISION: DEADLINE REACHED, RETURN ANSWER---")
+        return True
+    return False
+
+
+def _route_generation(state: GraphState, grounded: bool, answers_question: Callable[[], bool]) -> str:
+    """Route a checked generation; ``answers_question`` is only called for grounded ones."""
+    generations_left = state.get("generation_attempts", 0) < MAX_GENERATIONS
+    searches_left = state.get("web_search_attempts", 0) < MAX_WEB_SEARCHES
 
-    if hallucination_score.binary_score:
+    if grounded:
         logger.info("Generation is grounded in documents")
         print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
         print("---GRADE GENERATION vs QUESTION---")
 
         # Check if generation addresses the question
-        answer_score = answer_grader.invoke({"question": question, "generation": generation})
-
-        if answer_score.binary_score:
+        if answers_question():
             logger.info("Generation addresses question")
             print("---DECISION: GENERATION ADDRESSES QUESTION---")
             return "useful"
-        else:
+        elif generations_left and searches_left:
             logger.info("Generation does not address question")
             print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
             return "not useful"
-    else:
+        else:
+            logger.warning("Generation does not address question, but the retry budget is exhausted")
+            print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION, BUDGET EXHAUSTED---")
+            return "budget exhausted"
+    elif generations_left:
         logger.info("Generation is not grounded in documents, retrying")
         print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
         return "not supported"
+    else:
+        logger.warning("Generation is not grounded in documents, but the retry budget is exhausted")
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, BUDGET EXHAUSTED---")
+        return "budget exhausted"
+
+
+def _runnable(func: Callable, afunc: Optional[Callable] = None, kind: str = "node") -> RunnableLambda:
+    """
+    Wrap a node or routing function so that async runs never hop to a thread.
+
+    Both implementations report a telemetry span named after ``func``.
+
+    Args:
+        func: Synchronous implementation, used by ``invoke`` and ``stream``
+        afunc: Async implementation, used by ``ainvoke`` and ``astream``; by
+            default ``func`` is called directly on the event loop, which suits
+            functions that do no I/O
+        kind: "node" or "route", the kind of telemetry span
+
+    Returns:
+        RunnableLambda: Runnable with both implementations
+    """
+    if afunc is None:
+        async def afunc(state: GraphState) -> Any:
+            return func(state)
+
+    return RunnableLambda(
+        traced(func, kind, func.__name__),
+        afunc=traced(afunc, kind, func.__name__),
+        name=func.__name__,
+    )
 
 
 def create_workflow() -> StateGraph:
@@ -106,11 +331,12 @@ def create_workflow() -> StateGraph:
     logger.info("Creating workflow graph")
     workflow = StateGraph(GraphState)
 
-    # Add nodes to the graph
-    workflow.add_node(RETRIEVE, retrieve)
-    workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-    workflow.add_node(GENERATE, generate)
-    workflow.add_node(WEBSEARCH, web_search)
+    # Add nodes to the graph; each has a native async variant for ainvoke/astream
+    workflow.add_node(RETRIEVE, _runnable(retrieve, aretrieve))
+    workflow.add_node(GRADE_DOCUMENTS, _runnable(grade_documents, agrade_documents))
+    workflow.add_node(GENERATE, _runnable(generate, agenerate))
+    workflow.add_node(WEBSEARCH, _runnable(web_search, aweb_search))
+    workflow.add_node(FINALIZE, _runnable(finalize))
 
     # Set entry point
     workflow.set_entry_point(RETRIEVE)
@@ -119,7 +345,7 @@ def create_workflow() -> StateGraph:
     workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
     workflow.add_conditional_edges(
         GRADE_DOCUMENTS,
-        decide_to_generate,
+        _runnable(decide_to_generate, kind="route"),
         {
             WEBSEARCH: WEBSEARCH,
             GENERATE: GENERATE,
@@ -128,25 +354,69 @@ def create_workflow() -> StateGraph:
 
     workflow.add_conditional_edges(
         GENERATE,
-        grade_generation_grounded_in_documents_and_question,
+        _runnable(
+            grade_generation_grounded_in_documents_and_question,
+            agrade_generation_grounded_in_documents_and_question,
+            kind="route",
+        ),
         {
             "not supported": GENERATE,
             "useful": END,
             "not useful": WEBSEARCH,
+            "budget exhausted": FINALIZE,
         },
     )
     workflow.add_edge(WEBSEARCH, GENERATE)
+    workflow.add_edge(FINALIZE, END)
     workflow.add_edge(GENERATE, END)
 
     return workflow
 
 
-# Create and compile the graph
-workflow = create_workflow()
-app = workflow.compile()
+@lru_cache(maxsize=1)
+def get_app():
+    """
+    Build and compile the workflow graph on first use.
+
+    Unless ``LLM_CACHE`` is off, this also installs the persistent LLM
+    response cache for every chain.
+
+    Returns:
+        CompiledStateGraph: The compiled Self-RAG application
+    """
+    if LLM_CACHE:
+        from langchain_core.globals import set_llm_cache
+
+        from graph.llm_cache import get_llm_cache
+
+        set_llm_cache(get_llm_cache())
+    logger.info("Compiling workflow graph")
+    return create_workflow().compile()
+
+
+def draw_graph(output_file: Optional[str] = None) -> str:
+    """
+    Render the workflow diagram to a PNG file.
+
+    Rendering goes through the remote Mermaid service, so it only happens on
+    explicit request.
+
+    Args:
+        output_file: Path of the PNG file, graph_<timestamp>.png by default
+
+    Returns:
+        str: Path of the written file
+    """
+    if output_file is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = f"graph_{timestamp}.png"
+    logger.info(f"Generating graph visualization: {output_file}")
+    get_app().get_graph().draw_mermaid_png(output_file_path=output_file)
+    return output_file
+
 
-# Generate visualization
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-output_file = f"graph_{timestamp}.png"
-logger.info(f"Generating graph visualization: {output_file}")
-app.get_graph().draw_mermaid_png(output_file_path=output_file)
+def __getattr__(name: str):
+    # Keep `from graph.graph import app` working without compiling at import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,191 @@
+"""
+Persistent LLM response cache.
+
+Every chain calls ``ChatOpenAI`` at temperature 0, so an identical prompt to
+an identical model configuration gets effectively the same answer. Responses
+are stored in SQLite keyed by a hash of the model string (model name and every
+parameter, including the bound structured-output tool) and the rendered
+prompt, and served from disk on repeats. The cache is installed as LangChain's
+global cache by ``graph.graph.get_app``, so it applies to the generation chain
+and to every grader.
+
+Only the ``SELF_RAG_LLM_CACHE_SIZE`` most recently used responses are kept.
+``SELF_RAG_LLM_CACHE=0`` bypasses the cache, and ``bypassed()`` does so for
+the calls made inside it, e.g. to draw a fresh generation after a rejected one.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from graph.config import LLM_CACHE_PATH, LLM_CACHE_SIZE
+from graph.telemetry import record_cache
+
+logger = logging.getLogger("self_rag.llm_cache")
+
+_bypassed: ContextVar[bool] = ContextVar("llm_cache_bypassed", default=False)
+
+
+@contextmanager
+def bypassed() -> Iterator[None]:
+    """Skip the LLM cache, for lookups and updates, within this context."""
+    token = _bypassed.set(True)
+    try:
+        yield
+    finally:
+        _bypassed.reset(token)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Hash a model configuration and a rendered prompt into a cache key.
+
+    Args:
+        prompt (str): Rendered prompt
+        llm_string (str): Model name and parameters
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    SQLite store of LLM responses with least-recently-used eviction.
+
+    There is deliberately no ``__len__``: LangChain tests the truthiness of a
+    model's cache, and an empty cache must not count as "no cache".
+    """
+
+    def __init__(self, path: str, max_entries: int = LLM_CACHE_SIZE, enabled: bool = True):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                generations TEXT NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    def _active(self) -> bool:
+        return self.enabled and not _bypassed.get()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """
+        Look up the response to a prompt.
+
+        Args:
+            prompt (str): Rendered prompt
+            llm_string (str): Model name and parameters
+
+        Returns:
+            Optional[RETURN_VAL_TYPE]: Cached generations, or None on a miss
+        """
+        if not self._active():
+            return None
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT generations FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                record_cache("llm", False)
+                return None
+            self.hits += 1
+            record_cache("llm", True)
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """
+        Store the response to a prompt, evicting the least recently used ones beyond the size.
+
+        Args:
+            prompt (str): Rendered prompt
+            llm_string (str): Model name and parameters
+            return_val (RETURN_VAL_TYPE): Generations of the model
+        """
+        if not self._active():
+            return
+        generations = dumps(list(return_val))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, generations, accessed) VALUES (?, ?, ?)",
+                (cache_key(prompt, llm_string), generations, time.time()),
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters, and the number of cached responses."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": size,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> SQLiteLLMCache:
+    """
+    Open the persistent LLM response cache on first use.
+
+    Returns:
+        SQLiteLLMCache: Cache at ``LLM_CACHE_PATH``
+    """
+    logger.info(f"Opening LLM response cache at {LLM_CACHE_PATH}")
+    return SQLiteLLMCache(LLM_CACHE_PATH, max_entries=LLM_CACHE_SIZE)
@@ -1,6 +1,17 @@
-from graph.nodes.generate import generate
-from graph.nodes.grade_documents import grade_documents
-from graph.nodes.retrieve import retrieve
-from graph.nodes.web_search import web_search
+from graph.nodes.finalize import finalize
+from graph.nodes.generate import agenerate, generate
+from graph.nodes.grade_documents import agrade_documents, grade_documents
+from graph.nodes.retrieve import aretrieve, retrieve
+from graph.nodes.web_search import aweb_search, web_search
 
-__all__ = ["generate", "grade_documents", "retrieve", "web_search"]
+__all__ = [
+    "agenerate",
+    "agrade_documents",
+    "aretrieve",
+    "aweb_search",
+    "finalize",
+    "generate",
+    "grade_documents",
+    "retrieve",
+    "web_search",
+]
@@ -0,0 +1,28 @@
+"""
+Node for returning the best answer so far once a retry or latency budget is exhausted.
+"""
+import logging
+from typing import Any, Dict
+
+from graph.state import GraphState
+
+logger = logging.getLogger("self_rag.finalize")
+
+
+def finalize(state: GraphState) -> Dict[str, Any]:
+    """
+    Flag the latest generation as returned without passing the generation check.
+
+    Args:
+        state (GraphState): The current state of the graph
+
+    Returns:
+        Dict[str, Any]: Updated state with the budget_exhausted flag
+    """
+    logger.warning(
+        f"Budget exhausted after {state.get('generation_attempts', 0)} generations and "
+        f"{state.get('web_search_attempts', 0)} web searches, returning best answer so far"
+    )
+    print("---BUDGET EXHAUSTED: RETURNING BEST ANSWER SO FAR---")
+
+    return {"budget_exhausted": True}
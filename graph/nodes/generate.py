@@ -1,7 +1,9 @@
-from typing import Any, Dict
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict
 import logging
 
-from graph.chains.generation import generation_chain
+from graph.chains.generation import get_generation_chain
+from graph.llm_cache import bypassed
 from graph.state import GraphState
 
 logger = logging.getLogger("self_rag.generate")
@@ -28,10 +30,52 @@ def generate(state: GraphState) -> Dict[str, Any]:
     logger.info(f"Using {doc_count} documents for generation")
 
     # Generate the answer
-    generation = generation_chain.invoke({"context": documents, "question": question})
+    with _cache_scope(state):
+        generation = get_generation_chain().invoke({"context": documents, "question": question})
 
+    return _generation_update(state, generation)
+
+
+async def agenerate(state: GraphState) -> Dict[str, Any]:
+    """
+    Async version of :func:`generate`.
+
+    Args:
+        state (GraphState): The current state of the graph containing documents and question
+
+    Returns:
+        Dict[str, Any]: Updated state with the generated answer
+    """
+    logger.info("Generating answer from retrieved documents")
+    print("---GENERATE---")
+
+    question = state["question"]
+    documents = state["documents"]
+
+    # Log the number of documents being used for generation
+    doc_count = len(documents) if documents else 0
+    logger.info(f"Using {doc_count} documents for generation")
+
+    # Generate the answer
+    with _cache_scope(state):
+        generation = await get_generation_chain().ainvoke({"context": documents, "question": question})
+
+    return _generation_update(state, generation)
+
+
+def _cache_scope(state: GraphState) -> ContextManager:
+    # A regeneration must not be served the rejected answer from the LLM cache
+    return bypassed() if state.get("generation_attempts", 0) else nullcontext()
+
+
+def _generation_update(state: GraphState, generation: str) -> Dict[str, Any]:
     # Log a preview of the generated answer
     preview = generation[:100] + "..." if len(generation) > 100 else generation
     logger.info(f"Generated answer preview: {preview}")
 
-    return {"documents": documents, "question": question, "generation": generation}
+    return {
+        "documents": state["documents"],
+        "question": state["question"],
+        "generation": generation,
+        "generation_attempts": state.get("generation_attempts", 0) + 1,
+    }
@@ -1,21 +1,235 @@
 """
 Node for grading the relevance of retrieved documents to the question.
 """
+import asyncio
 import logging
-from typing import Any, Dict, List
+import math
+from concurrent.futures import Future, wait
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain.schema import Document
-from graph.chains.retrieval_grader import retrieval_grader
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from graph.chains.batch_retrieval_grader import get_batch_retrieval_grader
+from graph.chains.retrieval_grader import get_retrieval_grader
+from graph.config import GRADING_CONCURRENCY, GRADING_MODE, GRADING_TIMEOUT
+from graph.context import fitting_documents
+from graph.prefilter import log_grades, prefilter
 from graph.state import GraphState
 
 logger = logging.getLogger("self_rag.grade_documents")
 
 
+def _is_relevant(future: Future, doc_index: int) -> bool:
+    """Read the grade of one document; failed or unfinished calls count as not relevant."""
+    if not future.done():
+        logger.warning(f"Grading document {doc_index+1} timed out")
+        return False
+    try:
+        score = future.result()
+    except Exception as e:
+        logger.warning(f"Grading document {doc_index+1} failed: {str(e)}")
+        return False
+    return score.binary_score.lower() == "yes"
+
+
+@lru_cache(maxsize=1)
+def _grading_executor() -> ContextThreadPoolExecutor:
+    # Shared by all questions, so at most GRADING_CONCURRENCY grading calls run
+    # at once; the executor copies the context so callbacks and tracing reach
+    # the worker threads
+    return ContextThreadPoolExecutor(max_workers=GRADING_CONCURRENCY, thread_name_prefix="grading")
+
+
+def _batch_verdicts(result: Any, count: int) -> List[bool]:
+    """Map batch grades to the documents sent; documents missing from the grades are not relevant."""
+    relevant = [False] * count
+    for grade in result.grades:
+        if 1 <= grade.index <= count:
+            relevant[grade.index - 1] = grade.binary_score.lower() == "yes"
+    return relevant
+
+
+def grade_concurrently(question: str, documents: List[Document]) -> List[bool]:
+    """
+    Grade each document with its own grader call, all calls in parallel.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+
+    Returns:
+        List[bool]: Relevance of each document, in input order
+    """
+    if not documents:
+        return []
+    workers = max(1, min(GRADING_CONCURRENCY, len(documents)))
+    logger.info(f"Grading {len(documents)} documents with {workers} concurrent calls")
+
+    # Invoke the retrieval grader for every document at once
+    grader = get_retrieval_grader()
+    executor = _grading_executor()
+    futures = [
+        executor.submit(grader.invoke, {"question": question, "document": doc.page_content})
+        for doc in documents
+    ]
+    # Each attempt is bounded by the grader's own timeout; this bounds the
+    # node in case a call retries or ignores it
+    wait(futures, timeout=GRADING_TIMEOUT * math.ceil(len(documents) / workers))
+    for future in futures:
+        future.cancel()
+
+    return [_is_relevant(future, doc_index) for doc_index, future in enumerate(futures)]
+
+
+def grade_in_batch(question: str, documents: List[Document]) -> List[bool]:
+    """
+    Grade all documents with a single grader call.
+
+    Only the documents that fit the context budget uncut are sent; the others
+    are graded one by one, as in concurrent mode. Documents the model saw but
+    left out of its verdicts count as not relevant. If the call itself fails,
+    grading falls back to one call per document.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+
+    Returns:
+        List[bool]: Relevance of each document, in input order
+    """
+    if not documents:
+        return []
+    fitting = fitting_documents(documents)
+    if not fitting:
+        return grade_concurrently(question, documents)
+    logger.info(f"Grading {fitting}/{len(documents)} documents in one call")
+    try:
+        result = get_batch_retrieval_grader().invoke({"question": question, "documents": documents[:fitting]})
+    except Exception as e:
+        logger.warning(f"Batch grading failed, grading documents one by one: {str(e)}")
+        return grade_concurrently(question, documents)
+    return _batch_verdicts(result, fitting) + grade_concurrently(question, documents[fitting:])
+
+
+async def agrade_concurrently(question: str, documents: List[Document]) -> List[bool]:
+    """
+    Async version of :func:`grade_concurrently`.
+
+    At most ``GRADING_CONCURRENCY`` grader calls are in flight at a time, each
+    bounded by ``GRADING_TIMEOUT``.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+
+    Returns:
+        List[bool]: Relevance of each document, in input order
+    """
+    if not documents:
+        return []
+    workers = max(1, min(GRADING_CONCURRENCY, len(documents)))
+    logger.info(f"Grading {len(documents)} documents with {workers} concurrent calls")
+    grader = get_retrieval_grader()
+    semaphore = asyncio.Semaphore(workers)
+
+    async def grade(doc_index: int, doc: Document) -> bool:
+        async with semaphore:
+            try:
+                score = await asyncio.wait_for(
+                    grader.ainvoke({"question": question, "document": doc.page_content}),
+                    timeout=GRADING_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Grading document {doc_index+1} timed out")
+                return False
+            except Exception as e:
+                logger.warning(f"Grading document {doc_index+1} failed: {str(e)}")
+                return False
+        return score.binary_score.lower() == "yes"
+
+    return list(await asyncio.gather(*(grade(i, doc) for i, doc in enumerate(documents))))
+
+
+async def agrade_in_batch(question: str, documents: List[Document]) -> List[bool]:
+    """
+    Async version of :func:`grade_in_batch`.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+
+    Returns:
+        List[bool]: Relevance of each document, in input order
+    """
+    if not documents:
+        return []
+    fitting = fitting_documents(documents)
+    if not fitting:
+        return await agrade_concurrently(question, documents)
+    logger.info(f"Grading {fitting}/{len(documents)} documents in one call")
+
+    async def grade_batch() -> List[bool]:
+        try:
+            result = await get_batch_retrieval_grader().ainvoke(
+                {"question": question, "documents": documents[:fitting]}
+            )
+        except Exception as e:
+            logger.warning(f"Batch grading failed, grading documents one by one: {str(e)}")
+            return await agrade_concurrently(question, documents[:fitting])
+        return _batch_verdicts(result, fitting)
+
+    # Documents beyond the budget are graded alongside the batch call
+    batch, rest = await asyncio.gather(grade_batch(), agrade_concurrently(question, documents[fitting:]))
+    return batch + rest
+
+
+def grade_relevance(question: str, documents: List[Document], mode: Optional[str] = None) -> List[bool]:
+    """
+    Grade the relevance of documents with the configured grading mode.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+        mode (Optional[str]): "concurrent" (one call per document) or "batch"
+            (one call), ``GRADING_MODE`` by default
+
+    Returns:
+        List[bool]: Relevance of each document, in input order
+    """
+    if (mode or GRADING_MODE) == "batch":
+        return grade_in_batch(question, documents)
+    return grade_concurrently(question, documents)
+
+
+async def agrade_relevance(question: str, documents: List[Document], mode: Optional[str] = None) -> List[bool]:
+    """
+    Async version of :func:`grade_relevance`.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+        mode (Optional[str]): "concurrent" or "batch", ``GRADING_MODE`` by default
+
+    Returns:
+        List[bool]: Relevance of each document, in input order
+    """
+    if (mode or GRADING_MODE) == "batch":
+        return await agrade_in_batch(question, documents)
+    return await agrade_concurrently(question, documents)
+
+
 def grade_documents(state: GraphState) -> Dict[str, Any]:
     """
     Determines whether the retrieved documents are relevant to the question.
     If any document is not relevant, we will set a flag to run web search.
 
+    Documents the lexical pre-filter is confident about are decided without
+    an LLM call. The others are graded concurrently (up to
+    ``GRADING_CONCURRENCY`` calls at a time) or, with ``GRADING_MODE`` set to
+    "batch", in a single call, so the node costs at most about one grader
+    round trip. Relevant documents keep their retrieval order.
+
     Args:
         state (GraphState): The current graph state containing documents and question
 
@@ -28,21 +242,64 @@ def grade_documents(state: GraphState) -> Dict[str, Any]:
     question = state["question"]
     documents = state["documents"]
 
-    filtered_docs: List[Document] = []
-    web_search = False
+    # Only documents the pre-filter cannot decide are graded by the LLM
+    verdicts, scores, ambiguous = _prefilter(question, documents)
+    grades = grade_relevance(question, [documents[i] for i in ambiguous])
+    return _filter_documents(question, documents, verdicts, scores, ambiguous, grades)
 
-    # Grade each document for relevance
-    for doc_index, doc in enumerate(documents):
-        logger.info(f"Grading document {doc_index+1}/{len(documents)}")
 
-        # Invoke the retrieval grader to check relevance
-        score = retrieval_grader.invoke(
-            {"question": question, "document": doc.page_content}
-        )
-        grade = score.binary_score
+async def agrade_documents(state: GraphState) -> Dict[str, Any]:
+    """
+    Async version of :func:`grade_documents`.
+
+    Args:
+        state (GraphState): The current graph state containing documents and question
+
+    Returns:
+        Dict[str, Any]: Updated state with filtered documents and web_search flag
+    """
+    logger.info("Checking document relevance to question")
+    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+
+    question = state["question"]
+    documents = state["documents"]
+
+    # Only documents the pre-filter cannot decide are graded by the LLM
+    verdicts, scores, ambiguous = _prefilter(question, documents)
+    grades = await agrade_relevance(question, [documents[i] for i in ambiguous])
+    return _filter_documents(question, documents, verdicts, scores, ambiguous, grades)
+
+
+def _prefilter(
+    question: str, documents: List[Document]
+) -> Tuple[List[Optional[bool]], List[Optional[float]], List[int]]:
+    """Pre-filter the documents; return verdicts, scores and the indices left to grade."""
+    verdicts, scores = prefilter(question, documents)
+    ambiguous = [i for i, verdict in enumerate(verdicts) if verdict is None]
+    if len(ambiguous) < len(documents):
+        logger.info(f"Pre-filter decided {len(documents) - len(ambiguous)}/{len(documents)} documents")
+    return verdicts, scores, ambiguous
+
+
+def _filter_documents(
+    question: str,
+    documents: List[Document],
+    verdicts: List[Optional[bool]],
+    scores: List[Optional[float]],
+    ambiguous: List[int],
+    grades: List[bool],
+) -> Dict[str, Any]:
+    """Merge the LLM grades into the pre-filter verdicts and keep the relevant documents."""
+    log_grades(question, [scores[i] for i in ambiguous], grades)
+    for i, grade in zip(ambiguous, grades):
+        verdicts[i] = grade
+
+    filtered_docs: List[Document] = []
+    web_search = False
 
-        # Process based on relevance grade
-        if grade.lower() == "yes":
+    # Process the grades in retrieval order
+    for doc_index, (doc, relevant) in enumerate(zip(documents, verdicts)):
+        if relevant:
             logger.info(f"Document {doc_index+1} is relevant")
             print("---GRADE: DOCUMENT RELEVANT---")
             filtered_docs.append(doc)
@@ -2,10 +2,12 @@
 Node for retrieving relevant documents from the vector store.
 """
 import logging
+import time
 from typing import Any, Dict
 
+from graph.config import REQUEST_TIMEOUT
 from graph.state import GraphState
-from ingestion import retriever
+from ingestion import get_retriever
 
 logger = logging.getLogger("self_rag.retrieve")
 
@@ -14,19 +16,48 @@ def retrieve(state: GraphState) -> Dict[str, Any]:
     """
     Retrieve relevant documents from the vector store based on the question.
 
+    As the entry point, it also starts the latency budget of the request
+    unless the caller passed a deadline.
+
+    Args:
+        state (GraphState): Current state containing the question
+
+    Returns:
+        Dict[str, Any]: Updated state with retrieved documents and the deadline
+    """
+    logger.info("Retrieving documents for question")
+    print("---RETRIEVE---")
+
+    question = state["question"]
+    # Started before retrieval so that it counts against the budget
+    deadline = state.get("deadline") or time.time() + REQUEST_TIMEOUT
+
+    # Retrieve documents from the vector store
+    documents = get_retriever().invoke(question)
+    logger.info(f"Retrieved {len(documents)} documents")
+
+    return {"documents": documents, "question": question, "deadline": deadline}
+
+
+async def aretrieve(state: GraphState) -> Dict[str, Any]:
+    """
+    Async version of :func:`retrieve`.
+
     Args:
         state (GraphState): Current state containing the question
 
     Returns:
-        Dict[str, Any]: Updated state with retrieved documents
+        Dict[str, Any]: Updated state with retrieved documents and the deadline
     """
     logger.info("Retrieving documents for question")
     print("---RETRIEVE---")
 
     question = state["question"]
+    # Started before retrieval so that it counts against the budget
+    deadline = state.get("deadline") or time.time() + REQUEST_TIMEOUT
 
     # Retrieve documents from the vector store
-    documents = retriever.invoke(question)
+    documents = await get_retriever().ainvoke(question)
     logger.info(f"Retrieved {len(documents)} documents")
 
-    return {"documents": documents, "question": question}
+    return {"documents": documents, "question": question, "deadline": deadline}
@@ -1,21 +1,95 @@
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 import logging
 
 from langchain.schema import Document
-from langchain_community.tools.tavily_search import TavilySearchResults
 
+from graph.config import (
+    WEB_RESULT_MIN_SCORE,
+    WEB_RESULTS_MAX,
+    WEB_SEARCH_CACHE_SIZE,
+    WEB_SEARCH_CACHE_TTL,
+    WEB_WRITE_BACK,
+    WEB_WRITE_BACK_MIN_SCORE,
+)
+from graph.prefilter import overlap_score
+from graph.search import SearchResults, get_search
 from graph.state import GraphState
+from graph.telemetry import record_cache
+from ingestion.web_results import WEB_ORIGIN
 
 logger = logging.getLogger("self_rag.web_search")
 
-# Initialize the web search tool with more results
-web_search_tool = TavilySearchResults(k=5, include_domains=["wikipedia.org", "en.wikipedia.org"])
+
+@lru_cache(maxsize=1)
+def get_search_cache():
+    """
+    Create the cache of web search results on first use.
+
+    Returns:
+        Optional[QueryCache]: Results keyed by normalized question, None when disabled
+    """
+    if not WEB_SEARCH_CACHE_SIZE:
+        return None
+    from ingestion.query_cache import QueryCache
+
+    return QueryCache(WEB_SEARCH_CACHE_SIZE, WEB_SEARCH_CACHE_TTL)
+
+
+@lru_cache(maxsize=1)
+def _write_back_executor() -> ThreadPoolExecutor:
+    # A single worker serializes the upserts and keeps them off the request path
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="web-write-back")
+
+
+def _cached_results(question: str) -> Optional[SearchResults]:
+    """Search results of an earlier identical question, if still cached."""
+    cache = get_search_cache()
+    if cache is None:
+        return None
+    from ingestion.query_cache import normalize_question
+
+    results = cache.get(normalize_question(question))
+    record_cache("web_search", results is not None)
+    if results is not None:
+        logger.info("Using cached web search results")
+    return results
+
+
+def _remember(question: str, search_results: SearchResults) -> None:
+    """Cache fresh search results and schedule their write-back."""
+    cache = get_search_cache()
+    if cache is not None:
+        from ingestion.query_cache import normalize_question
+
+        cache.put(normalize_question(question), search_results)
+    if WEB_WRITE_BACK and search_results:
+        _write_back_executor().submit(_write_back, search_results)
+
+
+def _write_back(search_results: SearchResults) -> None:
+    from ingestion import write_back_web_results
+
+    try:
+        write_back_web_results(search_results, min_score=WEB_WRITE_BACK_MIN_SCORE)
+    except Exception as e:
+        logger.warning(f"Could not write back web search results: {str(e)}")
 
 
 def web_search(state: GraphState) -> Dict[str, Any]:
     """
     Perform a web search to supplement the retrieved documents.
 
+    Each useful result is added as its own document (see
+    :func:`search_documents`); the documents in the state are not modified.
+    The search is bounded by ``WEB_SEARCH_TIMEOUT``, hedged when slow and
+    skipped while the provider is unhealthy (see ``graph.search``); a failed
+    search keeps the documents as they are. Results are cached by normalized
+    question for ``WEB_SEARCH_CACHE_TTL`` seconds. With ``WEB_WRITE_BACK`` on,
+    fresh results scoring at least ``WEB_WRITE_BACK_MIN_SCORE`` are also
+    upserted into the knowledge base in the background.
+
     Args:
         state (GraphState): The current state of the graph containing the question
 
@@ -27,32 +101,129 @@ def web_search(state: GraphState) -> Dict[str, Any]:
 
     question = state["question"]
     documents = state["documents"]
+    attempts = state.get("web_search_attempts", 0) + 1
 
     # Log the search query
     logger.info(f"Searching web for: {question}")
 
     try:
-        # Perform the web search
-        search_results = web_search_tool.invoke({"query": question})
+        # Perform the web search, unless the question was searched recently
+        search_results = _cached_results(question)
+        if search_results is None:
+            search_results = get_search().search(question)
+            _remember(question, search_results)
+        web_documents = search_documents(question, documents, search_results)
+        return {
+            "documents": [*(documents or []), *web_documents],
+            "question": question,
+            "web_search_attempts": attempts,
+        }
 
-        # Log the number of results found
-        logger.info(f"Found {len(search_results)} web search results")
+    except Exception as e:
+        logger.error(f"Error during web search: {str(e)}")
+        # Return the original documents if web search fails
+        return {"documents": list(documents or []), "question": question, "web_search_attempts": attempts}
 
-        # Format the results as a document
-        web_results = "\n\n".join([f"Source: {d['url']}\n{d['content']}" for d in search_results])
-        web_results_doc = Document(page_content=web_results, metadata={"source": "web_search"})
 
-        # Add the web search results to the documents
-        if documents is not None:
-            documents.append(web_results_doc)
-            logger.info(f"Added web search results to documents. Total documents: {len(documents)}")
-        else:
-            documents = [web_results_doc]
-            logger.info("Created new documents list with web search results")
+async def aweb_search(state: GraphState) -> Dict[str, Any]:
+    """
+    Async version of :func:`web_search`.
 
-        return {"documents": documents, "question": question}
+    Args:
+        state (GraphState): The current state of the graph containing the question
+
+    Returns:
+        Dict[str, Any]: Updated state with additional documents from web search
+    """
+    logger.info("Performing web search to supplement retrieved documents")
+    print("---WEB SEARCH---")
+
+    question = state["question"]
+    documents = state["documents"]
+    attempts = state.get("web_search_attempts", 0) + 1
+
+    # Log the search query
+    logger.info(f"Searching web for: {question}")
+
+    try:
+        # Perform the web search, unless the question was searched recently
+        search_results = _cached_results(question)
+        if search_results is None:
+            search_results = await get_search().asearch(question)
+            _remember(question, search_results)
+        web_documents = search_documents(question, documents, search_results)
+        return {
+            "documents": [*(documents or []), *web_documents],
+            "question": question,
+            "web_search_attempts": attempts,
+        }
 
     except Exception as e:
         logger.error(f"Error during web search: {str(e)}")
         # Return the original documents if web search fails
-        return {"documents": documents if documents else [], "question": question}
+        return {"documents": list(documents or []), "question": question, "web_search_attempts": attempts}
+
+
+def _fingerprint(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def search_documents(
+    question: str,
+    documents: Optional[List[Document]],
+    search_results: SearchResults,
+    max_results: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> List[Document]:
+    """
+    Turn search results into documents worth adding to the context.
+
+    Every result becomes its own document with its URL as ``source``. Results
+    already in the documents (same text, or text contained in a document) and
+    pages already added by an earlier web search are dropped. The rest are
+    scored by their overlap with the question, the pre-filter score; results
+    below ``min_score`` are dropped and the best ``max_results`` are kept.
+
+    Args:
+        question (str): User question
+        documents (Optional[List[Document]]): Documents already in the state
+        search_results (SearchResults): Results of the web search
+        max_results (Optional[int]): Results kept, ``WEB_RESULTS_MAX`` by default
+        min_score (Optional[float]): Minimum overlap score, ``WEB_RESULT_MIN_SCORE`` by default
+
+    Returns:
+        List[Document]: New web documents, best first
+    """
+    max_results = WEB_RESULTS_MAX if max_results is None else max_results
+    min_score = WEB_RESULT_MIN_SCORE if min_score is None else min_score
+    documents = documents or []
+
+    seen_urls = {doc.metadata.get("source") for doc in documents if doc.metadata.get("origin") == WEB_ORIGIN}
+    known_texts = [_fingerprint(doc.page_content) for doc in documents]
+
+    scored = []
+    for rank, result in enumerate(search_results):
+        url, content = result.get("url"), result.get("content")
+        if not content:
+            continue
+        text = _fingerprint(content)
+        if url in seen_urls or any(text in known for known in known_texts):
+            logger.info(f"Skipping duplicate web result: {url}")
+            continue
+        score = overlap_score(question, f"{result.get('title', '')} {content}")
+        if score is not None and score < min_score:
+            logger.info(f"Skipping irrelevant web result ({score:.2f}): {url}")
+            continue
+        seen_urls.add(url)
+        known_texts.append(text)
+        metadata = {"source": url, "origin": WEB_ORIGIN, "relevance": score}
+        for key, name in (("title", "title"), ("score", "search_score")):
+            if result.get(key) is not None:
+                metadata[name] = result[key]
+        # Ties keep the search engine's order
+        scored.append((-(score or 0.0), rank, Document(page_content=content, metadata=metadata)))
+
+    scored.sort(key=lambda item: item[:2])
+    kept = [doc for _, _, doc in scored[:max_results]]
+    logger.info(f"Kept {len(kept)}/{len(search_results)} web search results")
+    return kept
@@ -0,0 +1,268 @@
+"""
+Cheap relevance pre-filter that runs before LLM grading.
+
+Every retrieved document gets a local lexical-overlap score: the share of the
+question's content terms that occur in the document. Documents scoring at or
+above ``PREFILTER_ACCEPT`` are accepted and documents scoring at or below
+``PREFILTER_REJECT`` are rejected without an LLM call; only the ambiguous
+middle band goes to the retrieval grader. Both thresholds are unset by
+default, which sends every document to the grader.
+
+Thresholds are fitted offline from logged grades. With ``SELF_RAG_GRADE_LOG``
+set (and the pre-filter off, so that every document is graded), each LLM
+grade is appended to a JSONL log together with its score; then:
+
+    python -m graph.prefilter calibrate rag_grades.jsonl [--precision 0.95]
+
+prints the thresholds to export as ``SELF_RAG_PREFILTER_ACCEPT`` and
+``SELF_RAG_PREFILTER_REJECT``.
+"""
+import argparse
+import json
+import logging
+import re
+import threading
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from langchain.schema import Document
+
+from graph.config import GRADE_LOG_PATH, PREFILTER_ACCEPT, PREFILTER_REJECT
+from graph.telemetry import record_prefilter
+
+logger = logging.getLogger("self_rag.prefilter")
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Words that carry no topical signal in questions
+STOP_WORDS: FrozenSet[str] = frozenset(
+    """
+    a about an and are as at be been but by can could did do does for from had has have how i if in
+    into is it its me my of on or should so than that the their them then there these they this to
+    was we were what when where which who whom why will with would you your
+    """.split()
+)
+
+
+def content_terms(text: str) -> FrozenSet[str]:
+    """
+    Extract the lower-cased content terms of a text.
+
+    Plural "s" endings are stripped so that "pipeline" matches "pipelines".
+
+    Args:
+        text (str): Question or document
+
+    Returns:
+        FrozenSet[str]: Terms that are not stop words
+    """
+    return frozenset(
+        term[:-1] if len(term) > 3 and term.endswith("s") and not term.endswith("ss") else term
+        for term in _TERM_PATTERN.findall(text.lower())
+        if term not in STOP_WORDS
+    )
+
+
+def overlap_score(question: str, document: str) -> Optional[float]:
+    """
+    Score a document by the share of question terms it contains.
+
+    Args:
+        question (str): User question
+        document (str): Document content
+
+    Returns:
+        Optional[float]: Score between 0 and 1, None if the question has no content terms
+    """
+    question_terms = content_terms(question)
+    if not question_terms:
+        return None
+    return len(question_terms & content_terms(document)) / len(question_terms)
+
+
+class PrefilterStats:
+    """
+    Thread-safe counters of pre-filter decisions.
+
+    The process-wide ``stats`` are reported by the server's ``/readyz`` and
+    per concurrency level by the workflow benchmark; the same decisions go to
+    the ``self_rag.prefilter.decisions`` metric.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.graded = 0
+
+    def add(self, accepted: int = 0, rejected: int = 0, graded: int = 0) -> None:
+        """Count the decisions taken for one question."""
+        with self._lock:
+            self.accepted += accepted
+            self.rejected += rejected
+            self.graded += graded
+
+    @property
+    def llm_calls_saved(self) -> int:
+        """Number of documents decided without an LLM grading call."""
+        return self.accepted + self.rejected
+
+    def as_dict(self) -> Dict[str, int]:
+        """Snapshot of the counters."""
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "graded": self.graded,
+                "llm_calls_saved": self.accepted + self.rejected,
+            }
+
+
+# Process-wide counters
+stats = PrefilterStats()
+
+
+def prefilter(
+    question: str,
+    documents: List[Document],
+    accept: Optional[float] = None,
+    reject: Optional[float] = None,
+) -> Tuple[List[Optional[bool]], List[Optional[float]]]:
+    """
+    Decide the relevance of confident cases without calling the LLM.
+
+    Args:
+        question (str): User question
+        documents (List[Document]): Retrieved documents
+        accept (Optional[float]): Score from which documents are accepted, ``PREFILTER_ACCEPT`` by default
+        reject (Optional[float]): Score up to which documents are rejected, ``PREFILTER_REJECT`` by default
+
+    Returns:
+        Tuple[List[Optional[bool]], List[Optional[float]]]: Per document, True
+        (accepted), False (rejected) or None (needs LLM grading), and its score
+    """
+    accept = PREFILTER_ACCEPT if accept is None else accept
+    reject = PREFILTER_REJECT if reject is None else reject
+
+    verdicts: List[Optional[bool]] = []
+    scores: List[Optional[float]] = []
+    for doc in documents:
+        score = overlap_score(question, doc.page_content)
+        verdict = None
+        if score is not None and accept is not None and score >= accept:
+            verdict = True
+        elif score is not None and reject is not None and score <= reject:
+            verdict = False
+        verdicts.append(verdict)
+        scores.append(score)
+
+    decisions = {
+        "accepted": verdicts.count(True),
+        "rejected": verdicts.count(False),
+        "graded": verdicts.count(None),
+    }
+    stats.add(**decisions)
+    record_prefilter(**decisions)
+    return verdicts, scores
+
+
+def log_grades(question: str, scores: Sequence[Optional[float]], grades: Sequence[bool]) -> None:
+    """
+    Append LLM grades and their scores to the grade log, if one is configured.
+
+    Args:
+        question (str): User question
+        scores (Sequence[Optional[float]]): Overlap score of each graded document
+        grades (Sequence[bool]): LLM relevance grade of each graded document
+    """
+    if not GRADE_LOG_PATH:
+        return
+    try:
+        with open(GRADE_LOG_PATH, "a") as f:
+            for score, relevant in zip(scores, grades):
+                if score is not None:
+                    f.write(json.dumps({"question": question, "score": score, "relevant": relevant}) + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write grade log: {str(e)}")
+
+
+def calibrate(samples: Sequence[Tuple[float, bool]], precision: float = 0.95, min_samples: int = 20) -> Dict:
+    """
+    Fit the accept and reject thresholds from logged LLM grades.
+
+    The accept threshold is the lowest score above which at least
+    ``precision`` of the documents were graded relevant; the reject threshold
+    is the highest score below which at least ``precision`` were graded not
+    relevant. A threshold supported by fewer than ``min_samples`` grades is
+    left unset.
+
+    Args:
+        samples (Sequence[Tuple[float, bool]]): (overlap score, LLM grade) pairs
+        precision (float): Required agreement with the LLM grader
+        min_samples (int): Minimum number of grades backing a threshold
+
+    Returns:
+        Dict: Thresholds, their measured precision and the share of grading
+        calls they would save
+    """
+    ordered = sorted(samples)
+    total = len(ordered)
+    scores = sorted({score for score, _ in ordered})
+
+    accept = reject = None
+    accept_precision = reject_precision = None
+    accepted = rejected = 0
+    for threshold in scores:
+        above = [relevant for score, relevant in ordered if score >= threshold]
+        if len(above) >= min_samples and sum(above) / len(above) >= precision:
+            accept, accept_precision, accepted = threshold, sum(above) / len(above), len(above)
+            break
+    for threshold in reversed(scores):
+        below = [relevant for score, relevant in ordered if score <= threshold]
+        if accept is not None and threshold >= accept:
+            continue
+        if len(below) >= min_samples and (len(below) - sum(below)) / len(below) >= precision:
+            reject, reject_precision, rejected = threshold, (len(below) - sum(below)) / len(below), len(below)
+            break
+
+    return {
+        "samples": total,
+        "accept": accept,
+        "accept_precision": accept_precision,
+        "reject": reject,
+        "reject_precision": reject_precision,
+        "llm_calls_saved_share": (accepted + rejected) / total if total else 0.0,
+    }
+
+
+def read_grade_log(path: str) -> List[Tuple[float, bool]]:
+    """
+    Read (score, grade) pairs from a grade log.
+
+    Args:
+        path (str): JSONL file written by :func:`log_grades`
+
+    Returns:
+        List[Tuple[float, bool]]: Logged samples
+    """
+    with open(path) as f:
+        return [
+            (entry["score"], entry["relevant"])
+            for entry in (json.loads(line) for line in f if line.strip())
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relevance pre-filter tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = subparsers.add_parser("calibrate", help="Fit thresholds from logged grades")
+    calibrate_parser.add_argument("log", help="Grade log written with SELF_RAG_GRADE_LOG")
+    calibrate_parser.add_argument("--precision", type=float, default=0.95, help="Required agreement with the LLM")
+    calibrate_parser.add_argument("--min-samples", type=int, default=20, help="Minimum grades backing a threshold")
+    args = parser.parse_args()
+
+    result = calibrate(read_grade_log(args.log), precision=args.precision, min_samples=args.min_samples)
+    print(json.dumps(result, indent=2))
+    if result["accept"] is not None:
+        print(f"export SELF_RAG_PREFILTER_ACCEPT={result['accept']}")
+    if result["reject"] is not None:
+        print(f"export SELF_RAG_PREFILTER_REJECT={result['reject']}")
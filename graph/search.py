@@ -0,0 +1,444 @@
+"""
+Web search providers behind deadlines, hedging and a circuit breaker.
+
+A provider turns a query into search results in the Tavily format (``title``,
+``url``, ``content`` and ``score``). Two providers ship with the application:
+
+- ``TavilyProvider``: live web search restricted to Wikipedia;
+- ``LocalCorpusProvider``: offline search over a JSONL corpus, scored by
+  lexical overlap, for tests, benchmarks and air-gapped runs.
+
+``HedgedSearch`` wraps a provider so that the web search node never waits on
+one slow call:
+
+- every search is bounded by ``WEB_SEARCH_TIMEOUT`` seconds;
+- once the provider has answered ``WEB_SEARCH_HEDGE_MIN_SAMPLES`` times, a
+  call still running after the ``WEB_SEARCH_HEDGE_QUANTILE`` latency gets a
+  duplicate (hedge) request, and the first result wins; a call failing
+  before that point is hedged right away;
+- after ``WEB_SEARCH_BREAKER_FAILURES`` failed searches in a row, the circuit
+  breaker opens and searches fail immediately with :class:`SearchUnavailable`
+  for ``WEB_SEARCH_BREAKER_RESET`` seconds, after which one trial search is
+  let through.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from opentelemetry import trace
+
+from graph.config import (
+    LOCAL_CORPUS_PATH,
+    SEARCH_PROVIDER,
+    WEB_SEARCH_BREAKER_FAILURES,
+    WEB_SEARCH_BREAKER_RESET,
+    WEB_SEARCH_HEDGE_MIN_SAMPLES,
+    WEB_SEARCH_HEDGE_QUANTILE,
+    WEB_SEARCH_TIMEOUT,
+)
+from graph.prefilter import overlap_score
+from graph.stats import percentile
+from graph.telemetry import tracer
+
+logger = logging.getLogger("self_rag.search")
+
+SearchResults = List[Dict[str, Any]]
+
+
+class SearchUnavailable(Exception):
+    """Raised when the circuit breaker skips an unhealthy provider."""
+
+
+class SearchProvider(ABC):
+    """Source of search results; subclasses implement :meth:`search`."""
+
+    name = "provider"
+
+    @abstractmethod
+    def search(self, query: str) -> SearchResults:
+        """
+        Search for a query.
+
+        Args:
+            query (str): Search query
+
+        Returns:
+            SearchResults: Results with ``title``, ``url``, ``content`` and ``score``
+        """
+
+    async def asearch(self, query: str) -> SearchResults:
+        """Async version of :meth:`search`, run in a worker thread by default."""
+        return await asyncio.to_thread(self.search, query)
+
+
+class TavilyProvider(SearchProvider):
+    """Live web search with the Tavily API, restricted to Wikipedia."""
+
+    name = "tavily"
+
+    def __init__(self, k: int = 5, tool: Optional[Any] = None):
+        if tool is None:
+            from langchain_community.tools.tavily_search import TavilySearchResults
+
+            tool = TavilySearchResults(k=k, include_domains=["wikipedia.org", "en.wikipedia.org"])
+        self.tool = tool
+
+    @staticmethod
+    def _check(results: Any) -> SearchResults:
+        # The tool reports API errors as a string instead of raising
+        if not isinstance(results, list):
+            raise RuntimeError(f"Tavily search failed: {results}")
+        return results
+
+    def search(self, query: str) -> SearchResults:
+        return self._check(self.tool.invoke({"query": query}))
+
+    async def asearch(self, query: str) -> SearchResults:
+        return self._check(await self.tool.ainvoke({"query": query}))
+
+
+class LocalCorpusProvider(SearchProvider):
+    """
+    Offline search over a fixed corpus.
+
+    Documents are scored by the share of query terms they contain, the same
+    overlap score used by the relevance pre-filter. An optional artificial
+    latency makes the provider usable for hedging and timeout benchmarks.
+    """
+
+    name = "local"
+
+    def __init__(self, documents: Sequence[Dict[str, str]], k: int = 5, latency: float = 0.0):
+        self.documents = list(documents)
+        self.k = k
+        self.latency = latency
+
+    @classmethod
+    def from_jsonl(cls, path: str, **kwargs: Any) -> "LocalCorpusProvider":
+        """
+        Load the corpus from a JSONL file.
+
+        Args:
+            path (str): File with one ``{"url", "content"[, "title"]}`` object per line
+            **kwargs: Passed on to the constructor
+
+        Returns:
+            LocalCorpusProvider: Provider over the documents of the file
+        """
+        with open(path) as f:
+            return cls([json.loads(line) for line in f if line.strip()], **kwargs)
+
+    def _rank(self, query: str) -> SearchResults:
+        results = []
+        for doc in self.documents:
+            score = overlap_score(query, f"{doc.get('title', '')} {doc['content']}")
+            if score:
+                results.append({
+                    "title": doc.get("title") or doc["url"],
+                    "url": doc["url"],
+                    "content": doc["content"],
+                    "score": score,
+                })
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:self.k]
+
+    def search(self, query: str) -> SearchResults:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._rank(query)
+
+    async def asearch(self, query: str) -> SearchResults:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._rank(query)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """State of the breaker: "closed", "open" or "half-open"."""
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through; only one trial call while half-open."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """Count a failure; open (or re-open) the breaker past the threshold."""
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failure_threshold and self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Web search failed {self.failures} times in a row, pausing it")
+                self.opened_at = time.monotonic()
+
+
+class HedgedSearch:
+    """A search provider bounded by a deadline, hedged and guarded by a circuit breaker."""
+
+    def __init__(
+        self,
+        provider: SearchProvider,
+        timeout: float = WEB_SEARCH_TIMEOUT,
+        hedge_quantile: float = WEB_SEARCH_HEDGE_QUANTILE,
+        hedge_min_samples: int = WEB_SEARCH_HEDGE_MIN_SAMPLES,
+        breaker: Optional[CircuitBreaker] = None,
+        window: int = 200,
+    ):
+        self.provider = provider
+        self.timeout = timeout
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker(WEB_SEARCH_BREAKER_FAILURES, WEB_SEARCH_BREAKER_RESET)
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        # Worker threads are only started by the first search
+        self._executor = ContextThreadPoolExecutor(max_workers=16, thread_name_prefix="web-search")
+        self.counters = {
+            "searches": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "failures": 0, "short_circuited": 0
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Seconds after which a running call gets a hedge request.
+
+        Returns:
+            Optional[float]: The configured latency quantile of recent calls,
+            None until enough calls were observed or when hedging is off
+        """
+        with self._lock:
+            if not self.hedge_quantile or len(self._latencies) < max(1, self.hedge_min_samples):
+                return None
+            return percentile(list(self._latencies), self.hedge_quantile)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, the current hedge delay and the breaker state."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "hedge_delay_s": self.hedge_delay(), "breaker": self.breaker.state}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _observe(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise SearchUnavailable(f"Web search provider {self.provider.name} is unhealthy")
+        self._count("searches")
+
+    def _call(self, query: str, attempt: int) -> SearchResults:
+        attributes = {"self_rag.search.attempt": attempt}
+        with tracer.start_as_current_span(f"search {self.provider.name}", attributes=attributes) as span:
+            start = time.perf_counter()
+            results = self.provider.search(query)
+            self._observe(time.perf_counter() - start)
+            span.set_attribute("self_rag.search.results", len(results))
+            return results
+
+    async def _acall(self, query: str, attempt: int) -> SearchResults:
+        attributes = {"self_rag.search.attempt": attempt}
+        with tracer.start_as_current_span(f"search {self.provider.name}", attributes=attributes) as span:
+            start = time.perf_counter()
+            results = await self.provider.asearch(query)
+            self._observe(time.perf_counter() - start)
+            span.set_attribute("self_rag.search.results", len(results))
+            return results
+
+    def _hedge(self, elapsed: float) -> None:
+        logger.info(f"Hedging web search after {elapsed:.2f}s")
+        self._count("hedged")
+        trace.get_current_span().set_attribute("self_rag.search.hedged", True)
+
+    def _succeeded(self, attempt: int) -> None:
+        if attempt:
+            self._count("hedge_wins")
+        trace.get_current_span().set_attribute("self_rag.search.winning_attempt", attempt)
+        self.breaker.record_success()
+
+    def _failed(self, error: Exception) -> Exception:
+        self._count("timeouts" if isinstance(error, TimeoutError) else "failures")
+        self.breaker.record_failure()
+        return error
+
+    def search(self, query: str) -> SearchResults:
+        """
+        Search with the provider within the deadline, hedging slow calls.
+
+        Args:
+            query (str): Search query
+
+        Returns:
+            SearchResults: Results of the first call to succeed
+
+        Raises:
+            SearchUnavailable: If the circuit breaker is open
+            TimeoutError: If no call succeeded within the deadline
+        """
+        with tracer.start_as_current_span("web_search", attributes={"self_rag.search.provider": self.provider.name}):
+            return self._search(query)
+
+    def _search(self, query: str) -> SearchResults:
+        self._admit()
+
+        start = time.monotonic()
+        deadline = start + self.timeout
+        delay = self.hedge_delay()
+        attempts: Dict[Future, int] = {self._executor.submit(self._call, query, 0): 0}
+        pending = set(attempts)
+        error: Exception = TimeoutError(f"Web search timed out after {self.timeout}s")
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            hedged = len(attempts) > 1
+            until = deadline if hedged or delay is None else min(deadline, start + delay)
+            done, pending = wait(pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.warning(f"Web search call failed: {str(e)}")
+                    error = e
+                    continue
+                for other in pending:
+                    other.cancel()
+                self._succeeded(attempts[future])
+                return results
+            if not hedged and delay is not None and (done or time.monotonic() >= start + delay):
+                self._hedge(time.monotonic() - start)
+                hedge = self._executor.submit(self._call, query, 1)
+                attempts[hedge] = 1
+                pending.add(hedge)
+
+        for future in pending:
+            future.cancel()
+        raise self._failed(error if not pending else TimeoutError(f"Web search timed out after {self.timeout}s"))
+
+    async def asearch(self, query: str) -> SearchResults:
+        """
+        Async version of :meth:`search`; losing calls are cancelled.
+
+        Args:
+            query (str): Search query
+
+        Returns:
+            SearchResults: Results of the first call to succeed
+
+        Raises:
+            SearchUnavailable: If the circuit breaker is open
+            TimeoutError: If no call succeeded within the deadline
+        """
+        with tracer.start_as_current_span("web_search", attributes={"self_rag.search.provider": self.provider.name}):
+            return await self._asearch(query)
+
+    async def _asearch(self, query: str) -> SearchResults:
+        self._admit()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.timeout
+        delay = self.hedge_delay()
+        attempts: Dict[asyncio.Future, int] = {asyncio.ensure_future(self._acall(query, 0)): 0}
+        pending = set(attempts)
+        error: Exception = TimeoutError(f"Web search timed out after {self.timeout}s")
+
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                hedged = len(attempts) > 1
+                until = deadline if hedged or delay is None else min(deadline, start + delay)
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, until - now), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    try:
+                        results = task.result()
+                    except Exception as e:
+                        logger.warning(f"Web search call failed: {str(e)}")
+                        error = e
+                        continue
+                    self._succeeded(attempts[task])
+                    return results
+                if not hedged and delay is not None and (done or loop.time() >= start + delay):
+                    self._hedge(loop.time() - start)
+                    hedge = asyncio.ensure_future(self._acall(query, 1))
+                    attempts[hedge] = 1
+                    pending.add(hedge)
+        finally:
+            for task in pending:
+                task.cancel()
+        raise self._failed(error if not pending else TimeoutError(f"Web search timed out after {self.timeout}s"))
+
+
+def create_provider(name: Optional[str] = None) -> SearchProvider:
+    """
+    Create a search provider by name.
+
+    Args:
+        name (Optional[str]): "tavily" or "local", ``SEARCH_PROVIDER`` by default
+
+    Returns:
+        SearchProvider: The provider; "local" reads ``LOCAL_CORPUS_PATH``
+    """
+    name = name or SEARCH_PROVIDER
+    if name == "local":
+        if not LOCAL_CORPUS_PATH:
+            raise ValueError("SELF_RAG_LOCAL_CORPUS must be set to use the local search provider")
+        return LocalCorpusProvider.from_jsonl(LOCAL_CORPUS_PATH)
+    if name == "tavily":
+        return TavilyProvider()
+    raise ValueError(f"Unknown search provider: {name}")
+
+
+@lru_cache(maxsize=1)
+def get_search() -> HedgedSearch:
+    """
+    Create the configured search provider behind hedging on first use.
+
+    Returns:
+        HedgedSearch: Search shared by the web search node
+    """
+    return HedgedSearch(create_provider())
@@ -1,4 +1,4 @@
-from typing import List, TypedDict
+from typing import List, NotRequired, TypedDict
 
 
 class GraphState(TypedDict):
@@ -10,9 +10,18 @@ class GraphState(TypedDict):
         generation: LLM generation
         web_search: whether to add search
         documents: list of documents
+        generation_attempts: number of answers generated so far
+        web_search_attempts: number of web searches run so far
+        deadline: wall-clock time (seconds since the epoch) by which to answer
+        budget_exhausted: whether the answer was returned because a budget ran out,
+            without passing the generation check
     """
 
     question: str
     generation: str
     web_search: bool
     documents: List[str]
+    generation_attempts: NotRequired[int]
+    web_search_attempts: NotRequired[int]
+    deadline: NotRequired[float]
+    budget_exhausted: NotRequired[bool]
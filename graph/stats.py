@@ -0,0 +1,19 @@
+"""
+Statistics helpers shared by the workflow, the batch runner and the benchmarks.
+"""
+from typing import Sequence
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile of a sample.
+
+    Args:
+        samples (Sequence[float]): Non-empty sample, in any order
+        q (float): Quantile between 0 and 1
+
+    Returns:
+        float: The smallest sample value with at least ``q`` of the sample at or below it
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
@@ -0,0 +1,133 @@
+"""
+Token streaming of generations with deferred quality acceptance.
+
+``stream_answer`` runs the workflow and yields events as they happen:
+
+- ``{"event": "token", "text": ...}``: a piece of the answer being generated,
+  as soon as the LLM produces it;
+- ``{"event": "retract", "reason": ...}``: the answer streamed so far was
+  rejected by the generation check ("not supported" or "not useful") and is
+  about to be replaced by a new one, so the caller should discard it;
+- ``{"event": "final", "generation": ..., "verdict": ..., "state": ...}``:
+  the final answer, its verdict ("useful", or "budget exhausted" when it is
+  the best answer so far but did not pass the generation check) and the
+  final graph state.
+
+Only tokens of the generation chain are streamed; grader calls stay hidden.
+"""
+import logging
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from graph.chains.generation import GENERATION_TAG
+from graph.consts import GENERATE, WEBSEARCH
+
+logger = logging.getLogger("self_rag.streaming")
+
+
+def _token(text: str) -> Dict[str, Any]:
+    return {"event": "token", "text": text}
+
+
+def _retract(reason: str) -> Dict[str, Any]:
+    return {"event": "retract", "reason": reason}
+
+
+class _AnswerEvents:
+    """Turns workflow stream chunks into token, retract and final events."""
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+        # Task of the generation currently streaming, whether any of its tokens
+        # were seen, and whether an answer is on the caller's screen
+        self.current_task = None
+        self.streamed = False
+        self.shown = False
+
+    def on_chunk(self, mode: str, payload: Any) -> List[Dict[str, Any]]:
+        """Events caused by one chunk of ``stream_mode=["messages", "updates"]``."""
+        events = []
+        if mode == "messages":
+            chunk, metadata = payload
+            if GENERATION_TAG not in metadata.get("tags", []) or not chunk.content:
+                return events
+            task = metadata.get("langgraph_checkpoint_ns")
+            if task != self.current_task:
+                # A new generation starts: the previous answer was not grounded
+                if self.shown:
+                    events.append(_retract("not supported"))
+                self.current_task = task
+            self.streamed = self.shown = True
+            events.append(_token(chunk.content))
+            return events
+
+        for node, update in payload.items():
+            self.state.update(update or {})
+            if node == GENERATE:
+                if not self.streamed:
+                    # The generation produced no tokens (e.g. a cached response)
+                    if self.shown:
+                        events.append(_retract("not supported"))
+                    events.append(_token(self.state.get("generation", "")))
+                    self.shown = True
+                self.current_task, self.streamed = None, False
+            elif node == WEBSEARCH and self.shown:
+                # Web results were fetched after an answer: it was not useful
+                events.append(_retract("not useful"))
+                self.shown = False
+        return events
+
+    def final(self) -> Dict[str, Any]:
+        """The final event, once the workflow has finished."""
+        verdict = "budget exhausted" if self.state.get("budget_exhausted") else "useful"
+        logger.info(f"Streamed answer finished: {verdict}")
+        return {
+            "event": "final",
+            "generation": self.state.get("generation", ""),
+            "verdict": verdict,
+            "state": self.state,
+        }
+
+
+def stream_answer(question: str, app: Optional[Any] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Answer a question, streaming the generation token by token.
+
+    Args:
+        question (str): The question to ask
+        app (Optional[Any]): Compiled workflow, the application by default
+
+    Yields:
+        Dict[str, Any]: Token, retract and final events, see the module docstring
+    """
+    if app is None:
+        from graph.graph import get_app
+
+        app = get_app()
+
+    events = _AnswerEvents()
+    for mode, payload in app.stream({"question": question}, stream_mode=["messages", "updates"]):
+        yield from events.on_chunk(mode, payload)
+    yield events.final()
+
+
+async def astream_answer(question: str, app: Optional[Any] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async version of :func:`stream_answer`.
+
+    Args:
+        question (str): The question to ask
+        app (Optional[Any]): Compiled workflow, the application by default
+
+    Yields:
+        Dict[str, Any]: Token, retract and final events, see the module docstring
+    """
+    if app is None:
+        from graph.graph import get_app
+
+        app = get_app()
+
+    events = _AnswerEvents()
+    async for mode, payload in app.astream({"question": question}, stream_mode=["messages", "updates"]):
+        for event in events.on_chunk(mode, payload):
+            yield event
+    yield events.final()
@@ -0,0 +1,475 @@
+"""
+OpenTelemetry tracing and metrics of the workflow.
+
+Every question becomes one trace:
+
+- a root span per workflow run (``request``);
+- a span per node (``node retrieve``, ``node grade_documents``, ...) and
+  per routing function (``route decide_to_generate``, ...), carrying the
+  number of documents, retry counters and routing decisions;
+- child spans for every LLM call (with prompt and completion tokens),
+  retriever call, query embedding and web search call;
+- cache lookups (LLM responses, retrieval results, query embeddings, web
+  search results) as span events.
+
+Metrics record the duration of every stage (``self_rag.stage.duration``),
+the tokens spent (``self_rag.llm.tokens``) and cache lookups
+(``self_rag.cache.lookups``).
+
+Nothing is exported until an entry point calls :func:`configure_telemetry`;
+until then the API's no-op tracer and meter make instrumentation free.
+``SELF_RAG_TELEMETRY=file`` appends spans and metrics as JSON lines to
+``SELF_RAG_TELEMETRY_FILE``, ``otlp`` sends them to the collector configured
+with the standard ``OTEL_EXPORTER_OTLP_*`` variables, and ``console`` prints
+them. Per-stage latency breakdowns are computed from the exported spans with:
+
+    python -m graph.telemetry summarize rag_traces.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+from opentelemetry import context as otel_context
+from opentelemetry import metrics, trace
+from opentelemetry.trace import Span, Status, StatusCode
+
+from graph.config import TELEMETRY_EXPORTER, TELEMETRY_FILE
+from graph.stats import percentile
+
+logger = logging.getLogger("self_rag.telemetry")
+
+tracer = trace.get_tracer("self_rag")
+meter = metrics.get_meter("self_rag")
+
+stage_duration = meter.create_histogram(
+    "self_rag.stage.duration", unit="s", description="Duration of workflow nodes and routing functions"
+)
+llm_tokens = meter.create_counter("self_rag.llm.tokens", description="Tokens spent by LLM calls")
+cache_lookups = meter.create_counter("self_rag.cache.lookups", description="Cache lookups by cache and outcome")
+prefilter_decisions = meter.create_counter(
+    "self_rag.prefilter.decisions", description="Retrieved documents by pre-filter decision"
+)
+
+# Handler added to every LangChain run once telemetry is configured
+_handler_var: ContextVar[Optional["TelemetryCallbackHandler"]] = ContextVar("self_rag_telemetry", default=None)
+register_configure_hook(_handler_var, inheritable=True)
+
+# State keys reported as span attributes of the node updates
+_STATE_ATTRIBUTES = ("web_search", "generation_attempts", "web_search_attempts", "budget_exhausted")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Record a cache lookup on the current span and in the metrics.
+
+    Args:
+        cache (str): Name of the cache ("llm", "web_search", ...)
+        hit (bool): Whether the lookup was a hit
+    """
+    trace.get_current_span().add_event("cache_lookup", {"self_rag.cache": cache, "self_rag.cache.hit": hit})
+    cache_lookups.add(1, {"cache": cache, "hit": hit})
+
+
+def record_prefilter(accepted: int, rejected: int, graded: int) -> None:
+    """
+    Record the pre-filter decisions of one question in the metrics.
+
+    Args:
+        accepted (int): Documents accepted without an LLM call
+        rejected (int): Documents rejected without an LLM call
+        graded (int): Documents left to the LLM grader
+    """
+    for decision, count in (("accepted", accepted), ("rejected", rejected), ("graded", graded)):
+        if count:
+            prefilter_decisions.add(count, {"decision": decision})
+
+
+def _annotate(span: Span, kind: str, state: Any, result: Any) -> None:
+    """Set the attributes describing a node update or a routing decision."""
+    if kind == "route":
+        span.set_attribute("self_rag.route.decision", str(result))
+    if isinstance(state, dict):
+        for key in ("generation_attempts", "web_search_attempts"):
+            if key in state:
+                span.set_attribute(f"self_rag.input.{key}", state[key])
+    if isinstance(result, dict):
+        if result.get("documents") is not None:
+            span.set_attribute("self_rag.documents", len(result["documents"]))
+        for key in _STATE_ATTRIBUTES:
+            if result.get(key) is not None:
+                span.set_attribute(f"self_rag.{key}", result[key])
+
+
+@contextmanager
+def stage_span(kind: str, name: str) -> Iterator[Span]:
+    """
+    Span and duration metric of one workflow stage.
+
+    Args:
+        kind (str): "node" or "route"
+        name (str): Name of the stage
+
+    Yields:
+        Span: The current span of the stage
+    """
+    start = time.perf_counter()
+    attributes = {"self_rag.stage": name, "self_rag.stage.kind": kind}
+    with tracer.start_as_current_span(f"{kind} {name}", attributes=attributes) as span:
+        try:
+            yield span
+        finally:
+            stage_duration.record(time.perf_counter() - start, {"stage": name, "kind": kind})
+
+
+def traced(func: Callable, kind: str = "node", name: Optional[str] = None) -> Callable:
+    """
+    Wrap a node or routing function (sync or async) in a stage span.
+
+    Args:
+        func (Callable): Function taking the graph state
+        kind (str): "node" or "route"
+        name (Optional[str]): Name of the stage, the function name by default
+
+    Returns:
+        Callable: The function, reporting its span and duration
+    """
+    name = name or func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def atraced(state: Any) -> Any:
+            with stage_span(kind, name) as span:
+                result = await func(state)
+                _annotate(span, kind, state, result)
+                return result
+
+        return atraced
+
+    @wraps(func)
+    def traced_func(state: Any) -> Any:
+        with stage_span(kind, name) as span:
+            result = func(state)
+            _annotate(span, kind, state, result)
+            return result
+
+    return traced_func
+
+
+def _owner() -> Tuple[int, Optional[asyncio.Task]]:
+    """Thread and task running the caller, which own the contexts they attach."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return threading.get_ident(), task
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler turning runs into spans.
+
+    The root run of every workflow invocation becomes the ``request`` span
+    and is made current, so node spans share its trace; LLM and retriever
+    runs become child spans of the stage they run in.
+    """
+
+    # Callbacks run in the caller's context, which holds the parent span
+    run_inline = True
+
+    def __init__(self, otel_tracer: Optional[trace.Tracer] = None):
+        self.tracer = otel_tracer or tracer
+        self._spans: Dict[UUID, Span] = {}
+        self._tokens: Dict[UUID, Tuple[object, Any]] = {}
+        self._models: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, name: str, attributes: Dict[str, Any]) -> Span:
+        span = self.tracer.start_span(name, attributes={k: v for k, v in attributes.items() if v is not None})
+        with self._lock:
+            self._spans[run_id] = span
+        return span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        with self._lock:
+            span = self._spans.pop(run_id, None)
+            token = self._tokens.pop(run_id, None)
+            self._models.pop(run_id, None)
+        if span is None:
+            return None
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, str(error)))
+        if token is not None:
+            token, owner = token
+            # Async runs end in another task than they started in, and a token
+            # can only be detached in the context it was attached in
+            if owner == _owner():
+                otel_context.detach(token)
+        span.end()
+        return span
+
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        if parent_run_id is not None:
+            return
+        question = inputs.get("question") if isinstance(inputs, dict) else None
+        span = self._start(run_id, "request", {
+            "self_rag.run": kwargs.get("name") or (serialized or {}).get("name"),
+            "self_rag.question.length": len(question) if isinstance(question, str) else None,
+        })
+        token = otel_context.attach(trace.set_span_in_context(span))
+        with self._lock:
+            self._tokens[run_id] = (token, _owner())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id in self._spans:
+            self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id in self._spans:
+            self._end(run_id, error)
+
+    def _start_llm(self, serialized: Optional[Dict[str, Any]], run_id: UUID, metadata: Optional[Dict[str, Any]],
+                   tags: Optional[List[str]]) -> None:
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "llm"
+        with self._lock:
+            self._models[run_id] = model
+        self._start(run_id, f"llm {model}", {
+            "gen_ai.request.model": model,
+            "gen_ai.system": metadata.get("ls_provider"),
+            "self_rag.tags": list(tags) if tags else None,
+        })
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *, run_id: UUID,
+                            tags: Optional[List[str]] = None, metadata: Optional[Dict[str, Any]] = None,
+                            **kwargs: Any) -> None:
+        self._start_llm(serialized, run_id, metadata, tags)
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: List[str], *, run_id: UUID,
+                     tags: Optional[List[str]] = None, metadata: Optional[Dict[str, Any]] = None,
+                     **kwargs: Any) -> None:
+        self._start_llm(serialized, run_id, metadata, tags)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            span = self._spans.get(run_id)
+            model = self._models.get(run_id, "llm")
+        if span is None:
+            return
+        usage = token_usage(response)
+        if usage:
+            span.set_attribute("gen_ai.usage.input_tokens", usage["input_tokens"])
+            span.set_attribute("gen_ai.usage.output_tokens", usage["output_tokens"])
+            llm_tokens.add(usage["input_tokens"], {"model": model, "type": "input"})
+            llm_tokens.add(usage["output_tokens"], {"model": model, "type": "output"})
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized: Optional[Dict[str, Any]], query: str, *, run_id: UUID,
+                           **kwargs: Any) -> None:
+        self._start(run_id, f"retriever {kwargs.get('name') or (serialized or {}).get('name') or 'retriever'}", {})
+
+    def on_retriever_end(self, documents: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            span = self._spans.get(run_id)
+        if span is not None:
+            span.set_attribute("self_rag.documents", len(documents))
+        self._end(run_id)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+
+def token_usage(response: LLMResult) -> Optional[Dict[str, int]]:
+    """
+    Input and output tokens of an LLM response.
+
+    Args:
+        response (LLMResult): Response passed to ``on_llm_end``
+
+    Returns:
+        Optional[Dict[str, int]]: ``input_tokens`` and ``output_tokens``, None if not reported
+    """
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"input_tokens": usage["input_tokens"], "output_tokens": usage["output_tokens"]}
+    reported = (response.llm_output or {}).get("token_usage")
+    if reported:
+        return {"input_tokens": reported.get("prompt_tokens", 0), "output_tokens": reported.get("completion_tokens", 0)}
+    return None
+
+
+class _SharedFile:
+    """File written by several exporters, closed once the last of them shuts down."""
+
+    def __init__(self, path: str, users: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.handle = open(path, "a")
+        self._users = users
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """Release one user of the file."""
+        with self._lock:
+            self._users -= 1
+            if not self._users:
+                self.handle.close()
+
+
+def _exporters(exporter: str, path: str):
+    """Span and metric exporters for an exporter name."""
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter(), OTLPMetricExporter()
+    if exporter == "console":
+        return (
+            ConsoleSpanExporter(out=sys.stdout, formatter=lambda span: span.to_json(indent=None) + os.linesep),
+            ConsoleMetricExporter(out=sys.stdout, formatter=lambda data: data.to_json(indent=None) + os.linesep),
+        )
+    if exporter == "file":
+        shared = _SharedFile(path, users=2)
+
+        # Shutting down the providers (explicitly or at exit) flushes, then closes the file
+        class FileSpanExporter(ConsoleSpanExporter):
+            def shutdown(self) -> None:
+                shared.release()
+
+        class FileMetricExporter(ConsoleMetricExporter):
+            def shutdown(self, timeout_millis: float = 30_000, **kwargs: Any) -> None:
+                shared.release()
+
+        return (
+            FileSpanExporter(out=shared.handle, formatter=lambda span: span.to_json(indent=None) + os.linesep),
+            FileMetricExporter(out=shared.handle, formatter=lambda data: data.to_json(indent=None) + os.linesep),
+        )
+    raise ValueError(f"Unknown telemetry exporter: {exporter}")
+
+
+def create_providers(exporter: str, path: str = TELEMETRY_FILE):
+    """
+    Create the tracer and meter providers for an exporter.
+
+    Args:
+        exporter (str): "file", "otlp" or "console"
+        path (str): JSON lines file of the "file" exporter
+
+    Returns:
+        Tuple[TracerProvider, MeterProvider]: Providers exporting in batches
+    """
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    span_exporter, metric_exporter = _exporters(exporter, path)
+    resource = Resource.create({"service.name": "self-rag"})
+    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    meter_provider = MeterProvider(resource=resource, metric_readers=[PeriodicExportingMetricReader(metric_exporter)])
+    return tracer_provider, meter_provider
+
+
+def configure_telemetry(exporter: Optional[str] = None, path: Optional[str] = None) -> bool:
+    """
+    Install the tracer and meter providers and trace every LangChain run.
+
+    Like ``configure_logging``, this is only called by entry points.
+
+    Args:
+        exporter (Optional[str]): "file", "otlp", "console", or "" for none;
+            ``TELEMETRY_EXPORTER`` by default
+        path (Optional[str]): File of the "file" exporter, ``TELEMETRY_FILE`` by default
+
+    Returns:
+        bool: Whether telemetry was enabled
+    """
+    exporter = TELEMETRY_EXPORTER if exporter is None else exporter
+    if not exporter:
+        return False
+    tracer_provider, meter_provider = create_providers(exporter, path or TELEMETRY_FILE)
+    trace.set_tracer_provider(tracer_provider)
+    metrics.set_meter_provider(meter_provider)
+    _handler_var.set(TelemetryCallbackHandler())
+    logger.info(f"Exporting telemetry to {exporter}")
+    return True
+
+
+def summarize(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Latency breakdown per span name.
+
+    Args:
+        spans (List[Dict[str, Any]]): Spans as exported by the "file" exporter
+
+    Returns:
+        Dict[str, Dict[str, float]]: Count, mean, p50, p95 and total seconds per span name
+    """
+    from datetime import datetime
+
+    durations: Dict[str, List[float]] = {}
+    for span in spans:
+        start = datetime.fromisoformat(span["start_time"].replace("Z", "+00:00"))
+        end = datetime.fromisoformat(span["end_time"].replace("Z", "+00:00"))
+        durations.setdefault(span["name"], []).append((end - start).total_seconds())
+    return {
+        name: {
+            "count": len(values),
+            "mean_s": statistics.mean(values),
+            "p50_s": percentile(values, 0.5),
+            "p95_s": percentile(values, 0.95),
+            "total_s": sum(values),
+        }
+        for name, values in sorted(durations.items(), key=lambda item: -sum(item[1]))
+    }
+
+
+def read_spans(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the spans of a telemetry file, skipping metric records.
+
+    Args:
+        path (str): File written by the "file" exporter
+
+    Returns:
+        List[Dict[str, Any]]: Exported spans
+    """
+    with open(path) as f:
+        records = (json.loads(line) for line in f if line.strip())
+        return [record for record in records if "span_id" in record.get("context", {})]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetry tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summarize_parser = subparsers.add_parser("summarize", help="Latency breakdown per stage of a telemetry file")
+    summarize_parser.add_argument("file", help="File written with SELF_RAG_TELEMETRY=file")
+    args = parser.parse_args()
+
+    print(json.dumps(summarize(read_spans(args.file)), indent=2))
@@ -0,0 +1,123 @@
+"""
+Document ingestion for the Self-RAG knowledge base.
+
+Importing this package is cheap: the retriever opens the existing vector store
+on first use, and ``python -m ingestion`` (re-)ingests the sources.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Sequence
+
+
+@lru_cache(maxsize=1)
+def get_vectorstore():
+    """
+    Open the persisted vector store on first use.
+
+    Question embeddings are traced, and cached when the query caches are enabled.
+
+    Returns:
+        Chroma: The ``rag-chroma`` collection
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    from ingestion.config import EMBEDDING_MODEL, QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+    from ingestion.query_cache import CachedQueryEmbeddings, QueryCache, TracedEmbeddings
+    from ingestion.store import open_vectorstore
+
+    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    if QUERY_CACHE_SIZE:
+        embeddings = CachedQueryEmbeddings(
+            embeddings, EMBEDDING_MODEL, QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        )
+    return open_vectorstore(TracedEmbeddings(embeddings, EMBEDDING_MODEL))
+
+
+@lru_cache(maxsize=1)
+def get_lexical_index():
+    """
+    Open the persisted BM25 index on first use.
+
+    Returns:
+        LexicalIndex: Index of the chunks in the vector store
+    """
+    from ingestion.config import LEXICAL_INDEX_PATH
+    from ingestion.lexical import LexicalIndex
+
+    return LexicalIndex(LEXICAL_INDEX_PATH)
+
+
+@lru_cache(maxsize=1)
+def get_retriever():
+    """
+    Open the persisted vector store and create a retriever on first use.
+
+    With hybrid retrieval enabled, the vector results are fused with the BM25
+    results of the lexical index by reciprocal rank fusion. Question embeddings
+    and results are cached until the collection changes.
+
+    Returns:
+        BaseRetriever: Retriever over the ``rag-chroma`` collection
+    """
+    from functools import partial
+
+    from ingestion.config import (
+        HYBRID_RETRIEVAL,
+        MANIFEST_PATH,
+        QUERY_CACHE_SIZE,
+        QUERY_CACHE_TTL,
+        QUERY_CACHE_VERSION_TTL,
+        RETRIEVAL_K,
+    )
+    from ingestion.manifest import read_version
+    from ingestion.query_cache import CachedRetriever, QueryCache
+
+    vectorstore = get_vectorstore()
+
+    retriever = vectorstore.as_retriever(search_kwargs={"k": RETRIEVAL_K})
+    if HYBRID_RETRIEVAL:
+        from ingestion.retrievers import HybridRetriever, LexicalRetriever
+
+        lexical_retriever = LexicalRetriever(index=get_lexical_index(), k=RETRIEVAL_K)
+        retriever = HybridRetriever(retrievers=[retriever, lexical_retriever], k=RETRIEVAL_K)
+
+    if not QUERY_CACHE_SIZE:
+        return retriever
+    return CachedRetriever(
+        retriever=retriever,
+        vectorstore=vectorstore,
+        cache=QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL),
+        version=partial(read_version, MANIFEST_PATH),
+        version_ttl=QUERY_CACHE_VERSION_TTL,
+    )
+
+
+def write_back_web_results(results: Sequence[Dict[str, Any]], min_score: float = 0.0) -> int:
+    """
+    Upsert useful web search results into the persisted knowledge base.
+
+    Args:
+        results (Sequence[Dict[str, Any]]): Search results of one question
+        min_score (float): Minimum search score of the results written back
+
+    Returns:
+        int: Number of chunks upserted
+    """
+    from ingestion.config import MANIFEST_PATH
+    from ingestion.manifest import Manifest
+    from ingestion.web_results import write_back
+
+    manifest = Manifest(MANIFEST_PATH)
+    try:
+        return write_back(results, get_vectorstore(), get_lexical_index(), manifest, min_score=min_score)
+    finally:
+        manifest.close()
+
+
+def __getattr__(name: str):
+    # Keep `from ingestion import retriever` working without opening the store at import
+    if name == "retriever":
+        return get_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["get_lexical_index", "get_retriever", "get_vectorstore", "write_back_web_results"]
@@ -0,0 +1,74 @@
+"""
+Command line entry point: ``python -m ingestion [SOURCE ...]``.
+"""
+import argparse
+import logging
+
+from dotenv import load_dotenv
+
+from ingestion.config import INGEST_BATCH_SIZE, LOAD_CONCURRENCY, SPLIT_WORKERS, URLS
+from ingestion.pipeline import ingest
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Ingest the knowledge base into the vector store.")
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=URLS,
+        help="URLs, HTML/text files or directories to ingest (defaults to the configured URLs)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=LOAD_CONCURRENCY,
+        help="Maximum number of sources loaded at once",
+    )
+    parser.add_argument(
+        "--split-workers",
+        type=int,
+        default=SPLIT_WORKERS,
+        help="Number of worker processes used for splitting",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGEST_BATCH_SIZE,
+        help="Number of chunks embedded and committed together",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its last committed batch",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete the chunks of every source not given, e.g. after removing a URL",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    args = parse_args()
+
+    print("Ingesting knowledge base...")
+    stats = ingest(
+        args.sources,
+        max_concurrency=args.concurrency,
+        split_workers=args.split_workers,
+        batch_size=args.batch_size,
+        resume=args.resume,
+        prune=args.prune,
+    )
+    print(
+        f"Done in {stats['batches']} batches: {stats['upserted']} upserted, "
+        f"{stats['unchanged']} unchanged, {stats['deleted']} deleted, "
+        f"{stats['expired']} web results expired, "
+        f"{stats['failed']} sources failed"
+    )
@@ -0,0 +1,65 @@
+"""
+Configuration for the document ingestion pipeline.
+"""
+import os
+
+# Define URLs for knowledge base
+# These URLs contain information about AI, machine learning, and related topics
+URLS = [
+    "https://en.wikipedia.org/wiki/Retrieval-augmented_generation",
+    "https://en.wikipedia.org/wiki/Large_language_model",
+    "https://en.wikipedia.org/wiki/Prompt_engineering",
+]
+
+# Source loading: concurrent fetches, retries for transient failures and
+# per-request timeout in seconds
+LOAD_CONCURRENCY = int(os.getenv("SELF_RAG_LOAD_CONCURRENCY", "16"))
+LOAD_RETRIES = int(os.getenv("SELF_RAG_LOAD_RETRIES", "3"))
+LOAD_TIMEOUT = float(os.getenv("SELF_RAG_LOAD_TIMEOUT", "30"))
+
+# Vector store location and collection
+COLLECTION_NAME = "rag-chroma"
+PERSIST_DIRECTORY = "./.chroma"
+
+# Manifest of ingested chunks, kept next to the vector store
+MANIFEST_PATH = os.path.join(PERSIST_DIRECTORY, "manifest.sqlite3")
+
+# BM25 index of the chunks, updated together with the vector store
+LEXICAL_INDEX_PATH = os.path.join(PERSIST_DIRECTORY, "lexical.sqlite3")
+
+# Retrieval: chunks returned per question, and whether BM25 results are fused
+# with the vector results
+RETRIEVAL_K = int(os.getenv("SELF_RAG_RETRIEVAL_K", "4"))
+HYBRID_RETRIEVAL = os.getenv("SELF_RAG_HYBRID_RETRIEVAL", "1") == "1"
+
+# Query-time caches of question embeddings and top-k results: maximum entries
+# (0 disables them) and time-to-live in seconds
+QUERY_CACHE_SIZE = int(os.getenv("SELF_RAG_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("SELF_RAG_QUERY_CACHE_TTL", "3600"))
+
+# Seconds the collection version read from the manifest is reused before the
+# query cache reads it again
+QUERY_CACHE_VERSION_TTL = float(os.getenv("SELF_RAG_QUERY_CACHE_VERSION_TTL", "1"))
+
+# Age in seconds after which ingestion deletes chunks written back from web
+# search (0 keeps them)
+WEB_RESULTS_MAX_AGE = float(os.getenv("SELF_RAG_WEB_RESULTS_MAX_AGE", str(30 * 24 * 3600)))
+
+# Chunking parameters (in tiktoken tokens)
+CHUNK_SIZE = 250
+CHUNK_OVERLAP = 0
+
+# Worker processes used to split documents (1 splits in-process)
+SPLIT_WORKERS = int(os.getenv("SELF_RAG_SPLIT_WORKERS", str(os.cpu_count() or 1)))
+
+# Number of chunks embedded, upserted and checkpointed together
+INGEST_BATCH_SIZE = int(os.getenv("SELF_RAG_INGEST_BATCH_SIZE", "256"))
+
+# Embedding model and request batching (items and tokens per request)
+EMBEDDING_MODEL = os.getenv("SELF_RAG_EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBED_BATCH_ITEMS = int(os.getenv("SELF_RAG_EMBED_BATCH_ITEMS", "512"))
+EMBED_BATCH_TOKENS = int(os.getenv("SELF_RAG_EMBED_BATCH_TOKENS", "100000"))
+
+# Content-addressed vector cache, kept outside the vector store so that it
+# survives rebuilds of the collection
+EMBEDDING_CACHE_PATH = os.getenv("SELF_RAG_EMBEDDING_CACHE", "./.cache/embeddings.sqlite3")
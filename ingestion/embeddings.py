@@ -0,0 +1,234 @@
+"""
+Batched embedding stage with a persistent, content-addressed vector cache.
+
+Vectors are cached on disk keyed by (embedding model, chunk content hash), so
+re-ingests, chunk-size experiments and rebuilds of the collection never pay
+twice to embed identical text. Texts that miss the cache are sent to the
+embedding model in batches bounded by both item count and token count.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from ingestion.config import (
+    EMBED_BATCH_ITEMS,
+    EMBED_BATCH_TOKENS,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+)
+from ingestion.manifest import content_hash
+
+logger = logging.getLogger("self_rag.ingestion.embeddings")
+
+
+def tiktoken_length(encoding_name: str = "cl100k_base") -> Callable[[str], int]:
+    """
+    Build a token counter backed by tiktoken.
+
+    Args:
+        encoding_name (str): Name of the tiktoken encoding
+
+    Returns:
+        Callable[[str], int]: Function returning the number of tokens in a text
+    """
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class EmbeddingCache:
+    """SQLite store of embedding vectors keyed by (model, content hash)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vectors (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            model (str): Embedding model name
+            hashes (List[str]): Content hashes to look up
+
+        Returns:
+            Dict[str, List[float]]: Vectors found, keyed by content hash
+        """
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM vectors WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                )
+                for key, blob in rows:
+                    found[key] = array("d", blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, List[float]]]) -> None:
+        """
+        Store vectors.
+
+        Args:
+            model (str): Embedding model name
+            items (Iterable[Tuple[str, List[float]]]): (content hash, vector) pairs
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (model, hash, vector) VALUES (?, ?, ?)",
+                [(model, key, array("d", vector).tobytes()) for key, vector in items],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper adding batching and the persistent vector cache."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache: EmbeddingCache,
+        max_batch_items: int = EMBED_BATCH_ITEMS,
+        max_batch_tokens: int = EMBED_BATCH_TOKENS,
+        length_function: Optional[Callable[[str], int]] = None,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+        self._length_function = length_function
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def length_function(self) -> Callable[[str], int]:
+        """Token counter, created on first use."""
+        if self._length_function is None:
+            self._length_function = tiktoken_length()
+        return self._length_function
+
+    def batches(self, texts: List[str]) -> List[List[str]]:
+        """
+        Group texts into batches bounded by item and token count.
+
+        A single text longer than the token limit gets a batch of its own.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[str]]: Batches in input order
+        """
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            tokens = self.length_function(text)
+            if current and (
+                len(current) >= self.max_batch_items
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, reusing cached vectors for identical content.
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: One vector per text, in input order
+        """
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, list(set(hashes)))
+
+        # Embed every distinct uncached text exactly once
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            by_text = {text: key for key, text in missing.items()}
+            for batch in self.batches(list(missing.values())):
+                logger.info(f"Embedding batch of {len(batch)} texts with {self.model}")
+                embedded = self.embeddings.embed_documents(batch)
+                items = [(by_text[text], vector) for text, vector in zip(batch, embedded)]
+                self.cache.put_many(self.model, items)
+                vectors.update(items)
+
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query without caching it.
+
+        Args:
+            text (str): Query text
+
+        Returns:
+            List[float]: Query vector
+        """
+        return self.embeddings.embed_query(text)
+
+
+def create_embedder(cache_path: str = EMBEDDING_CACHE_PATH) -> CachedEmbeddings:
+    """
+    Build the embedding stage used by ingestion.
+
+    Args:
+        cache_path (str): Location of the on-disk vector cache
+
+    Returns:
+        CachedEmbeddings: OpenAI embeddings behind the persistent cache
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    return CachedEmbeddings(
+        OpenAIEmbeddings(model=EMBEDDING_MODEL),
+        model=EMBEDDING_MODEL,
+        cache=EmbeddingCache(cache_path),
+    )
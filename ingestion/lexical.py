@@ -0,0 +1,133 @@
+"""
+Persistent BM25 index of the ingested chunks.
+
+The index is an SQLite FTS5 table kept next to the vector store and updated by
+the ingestion pipeline together with the collection. It complements vector
+search on keyword-heavy questions (names, acronyms, error codes) where
+embeddings tend to return loosely related chunks.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import List
+
+from langchain.schema import Document
+
+# Query terms; FTS5 operators and punctuation are dropped
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def to_match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching any of its terms.
+
+    Args:
+        text (str): Question or keywords
+
+    Returns:
+        str: FTS5 MATCH expression, empty if the text has no terms
+    """
+    terms = dict.fromkeys(term.lower() for term in _TERM_PATTERN.findall(text))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class LexicalIndex:
+    """SQLite FTS5 index of chunk contents, ranked by BM25."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content, content='chunks', content_rowid='rowid', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, content) VALUES (new.rowid, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                INSERT INTO chunks_fts (rowid, content) VALUES (new.rowid, new.content);
+            END;
+            """
+        )
+        self._conn.commit()
+
+    def upsert(self, chunks: List[Document]) -> None:
+        """
+        Add or replace chunks.
+
+        Args:
+            chunks (List[Document]): Chunks with IDs assigned
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO chunks (id, content, metadata) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET content = excluded.content, metadata = excluded.metadata",
+                [(chunk.id, chunk.page_content, json.dumps(chunk.metadata)) for chunk in chunks],
+            )
+            self._conn.commit()
+
+    def remove(self, ids: List[str]) -> None:
+        """
+        Remove chunks from the index.
+
+        Args:
+            ids (List[str]): Chunk IDs to remove
+        """
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+            self._conn.commit()
+
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        """
+        Find the chunks that best match the terms of ``query``.
+
+        Args:
+            query (str): Question or keywords
+            k (int): Maximum number of chunks to return
+
+        Returns:
+            List[Document]: Chunks ordered by BM25 score, best first
+        """
+        expression = to_match_query(query)
+        if not expression:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.id, c.content, c.metadata FROM chunks_fts "
+                "JOIN chunks c ON c.rowid = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ?",
+                (expression, k),
+            ).fetchall()
+        return [
+            Document(id=chunk_id, page_content=content, metadata=json.loads(metadata))
+            for chunk_id, content, metadata in rows
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
@@ -0,0 +1,215 @@
+"""
+Concurrent loading of knowledge base sources.
+
+A source is either a URL or a local path. Directories are expanded into the
+HTML and text files they contain, so the same pipeline can run offline against
+a local copy of the corpus. All sources are fetched through one thread pool of
+bounded size that shares a single pooled HTTP session, and only a bounded
+window of sources is in flight at any time so that a slow consumer throttles
+fetching instead of letting loaded pages pile up in memory.
+"""
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Container, Iterator, List, Optional, Tuple
+
+import requests
+from langchain.schema import Document
+from langchain_community.document_loaders import BSHTMLLoader, TextLoader, WebBaseLoader
+from langchain_community.document_loaders.web_base import default_header_template
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ingestion.config import LOAD_CONCURRENCY, LOAD_RETRIES, LOAD_TIMEOUT
+
+logger = logging.getLogger("self_rag.ingestion.loaders")
+
+# File types picked up when a source is a local directory
+HTML_SUFFIXES = (".html", ".htm")
+TEXT_SUFFIXES = (".txt", ".md")
+
+# Called after every source with (completed, total, source); the total is
+# None when it is not known up front
+ProgressCallback = Callable[[int, Optional[int], str], None]
+
+
+def create_session(pool_size: int = LOAD_CONCURRENCY, retries: int = LOAD_RETRIES) -> requests.Session:
+    """
+    Create an HTTP session with a connection pool and retries.
+
+    Transient failures (connection errors, 429 and 5xx responses) are retried
+    with exponential backoff by the transport adapter.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+        retries (int): Number of retries for transient failures
+
+    Returns:
+        requests.Session: Session shared by every web loader
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(default_header_template)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def iter_expanded(sources: List[str]) -> Iterator[str]:
+    """
+    Expand local directories into the supported files they contain, lazily.
+
+    Args:
+        sources (List[str]): URLs, file paths or directory paths
+
+    Yields:
+        str: URLs and file paths, directories expanded in sorted order
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(HTML_SUFFIXES + TEXT_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield source
+
+
+def expand_sources(sources: List[str]) -> List[str]:
+    """
+    Expand local directories into the supported files they contain.
+
+    Args:
+        sources (List[str]): URLs, file paths or directory paths
+
+    Returns:
+        List[str]: URLs and file paths, directories expanded in sorted order
+    """
+    return list(iter_expanded(sources))
+
+
+def load_source(source: str, session: Optional[requests.Session] = None) -> List[Document]:
+    """
+    Load a single URL or local file.
+
+    Args:
+        source (str): URL or file path
+        session (Optional[requests.Session]): Shared HTTP session for URLs
+
+    Returns:
+        List[Document]: Documents loaded from the source
+    """
+    if os.path.isfile(source):
+        if source.lower().endswith(HTML_SUFFIXES):
+            return BSHTMLLoader(source, open_encoding="utf-8", bs_kwargs={"features": "html.parser"}).load()
+        return TextLoader(source, encoding="utf-8").load()
+
+    loader = WebBaseLoader(
+        source,
+        session=session,
+        raise_for_status=True,
+        requests_kwargs={"timeout": LOAD_TIMEOUT},
+    )
+    return loader.load()
+
+
+def _log_progress(completed: int, total: Optional[int], source: str) -> None:
+    logger.info(f"Loaded {completed}/{total if total is not None else '?'}: {source}")
+
+
+def iter_sources(
+    sources: List[str],
+    max_concurrency: int = LOAD_CONCURRENCY,
+    retries: int = LOAD_RETRIES,
+    progress: Optional[ProgressCallback] = _log_progress,
+    skip: Container[str] = (),
+) -> Iterator[Tuple[str, Optional[List[Document]]]]:
+    """
+    Load sources concurrently and yield them in source order.
+
+    At most ``2 * max_concurrency`` sources are submitted ahead of the
+    consumer, which bounds memory and applies backpressure to fetching.
+    Sources that still fail after retries are yielded with ``None``.
+
+    Args:
+        sources (List[str]): URLs, file paths or directory paths
+        max_concurrency (int): Maximum number of sources fetched at once
+        retries (int): Number of retries for transient HTTP failures
+        progress (Optional[ProgressCallback]): Called after each source is yielded
+        skip (Container[str]): Expanded sources to leave out (e.g. already ingested)
+
+    Yields:
+        Tuple[str, Optional[List[Document]]]: Source and its documents, or None if it failed
+    """
+    window = 2 * max_concurrency
+    pending: deque = deque()
+    completed = 0
+    # Directory walks are lazy, so the total is only known up front without them
+    if any(os.path.isdir(source) for source in sources):
+        total = None
+    else:
+        total = sum(1 for source in sources if source not in skip)
+
+    def resolve(source, future):
+        nonlocal completed
+        try:
+            docs = future.result()
+        except Exception as e:
+            logger.error(f"Error loading {source}: {str(e)}")
+            docs = None
+        completed += 1
+        if progress is not None:
+            progress(completed, total, source)
+        return source, docs
+
+    session = create_session(pool_size=max_concurrency, retries=retries)
+    with session, ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for source in iter_expanded(sources):
+            if source in skip:
+                continue
+            pending.append((source, executor.submit(load_source, source, session)))
+            if len(pending) >= window:
+                yield resolve(*pending.popleft())
+        while pending:
+            yield resolve(*pending.popleft())
+
+
+def load_sources(
+    sources: List[str],
+    max_concurrency: int = LOAD_CONCURRENCY,
+    retries: int = LOAD_RETRIES,
+    progress: Optional[ProgressCallback] = _log_progress,
+) -> Tuple[List[Document], List[str]]:
+    """
+    Load sources concurrently with bounded parallelism.
+
+    Documents are returned in source order regardless of completion order, so
+    downstream chunk IDs do not depend on network timing. Sources that still
+    fail after retries are skipped and reported.
+
+    Args:
+        sources (List[str]): URLs, file paths or directory paths
+        max_concurrency (int): Maximum number of sources fetched at once
+        retries (int): Number of retries for transient HTTP failures
+        progress (Optional[ProgressCallback]): Called after each source completes
+
+    Returns:
+        Tuple[List[Document], List[str]]: Loaded documents and the sources that failed
+    """
+    docs: List[Document] = []
+    failed: List[str] = []
+    for source, loaded in iter_sources(sources, max_concurrency, retries, progress):
+        if loaded is None:
+            failed.append(source)
+        else:
+            docs.extend(loaded)
+    return docs, failed
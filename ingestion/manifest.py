@@ -0,0 +1,304 @@
+"""
+Persistent manifest of ingested chunks.
+
+The manifest records, for every chunk stored in the vector store, its stable
+chunk ID, its source and a hash of its content. Comparing freshly split chunks
+against the manifest tells the pipeline which chunks are new or changed (and
+must be embedded and upserted) and which stored chunks are stale (and must be
+deleted).
+
+The manifest also checkpoints ingestion runs: every source whose chunks have
+all been committed is recorded, so an interrupted run can be resumed without
+loading those sources again.
+
+Finally, it holds the collection version, a counter bumped whenever ingestion
+changes the collection, which query-time caches use to invalidate results.
+"""
+import hashlib
+import os
+import sqlite3
+import uuid
+from typing import Collection, Dict, Iterable, List, Optional, Set
+
+from langchain.schema import Document
+
+# Namespace for deterministic chunk IDs
+CHUNK_ID_NAMESPACE = uuid.UUID("5b0b2d4e-7f55-4c36-9a43-3c8f2f1e6a10")
+
+
+def content_hash(text: str) -> str:
+    """
+    Hash the content of a chunk.
+
+    Args:
+        text (str): Chunk content
+
+    Returns:
+        str: Hex SHA-256 digest of the content
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, index: int) -> str:
+    """
+    Build the stable ID of a chunk from its source and position.
+
+    Args:
+        source (str): Source the chunk was split from (usually a URL)
+        index (int): Position of the chunk within its source
+
+    Returns:
+        str: Deterministic UUID string
+    """
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{source}#{index}"))
+
+
+def assign_chunk_ids(chunks: Iterable[Document]) -> List[Document]:
+    """
+    Assign stable IDs and content hashes to chunks.
+
+    Chunks are numbered per source in the order they are given, so the same
+    source split the same way always yields the same IDs.
+
+    Args:
+        chunks (Iterable[Document]): Chunks in split order
+
+    Returns:
+        List[Document]: The same chunks with ``id`` and ``content_hash`` set
+    """
+    counters: Dict[str, int] = {}
+    identified = []
+    for chunk in chunks:
+        source = chunk.metadata.get("source", "")
+        index = counters.get(source, 0)
+        counters[source] = index + 1
+
+        chunk.id = chunk_id(source, index)
+        chunk.metadata["content_hash"] = content_hash(chunk.page_content)
+        identified.append(chunk)
+    return identified
+
+
+def read_version(path: str) -> int:
+    """
+    Read the collection version without opening the manifest for writing.
+
+    Args:
+        path (str): Path of the manifest database
+
+    Returns:
+        int: Current collection version, 0 if nothing was ever ingested
+    """
+    if not os.path.exists(path):
+        return 0
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meta'").fetchone()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone() if exists else None
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+
+class Manifest:
+    """SQLite-backed record of the chunks currently stored in the vector store."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                run INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS completed_sources (
+                run INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                PRIMARY KEY (run, source)
+            );
+            CREATE INDEX IF NOT EXISTS chunks_run ON chunks (run);
+            """
+        )
+        self._conn.commit()
+
+    def _get_meta(self, key: str) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_meta(self, key: str, value: int) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def begin_run(self, resume: bool = False) -> int:
+        """
+        Start a new ingestion run, or resume the last unfinished one.
+
+        Args:
+            resume (bool): Continue the last run if it did not finish
+
+        Returns:
+            int: Run number used to stamp every chunk seen during the run
+        """
+        unfinished = self._get_meta("open_run")
+        if resume and unfinished:
+            return unfinished
+
+        run = self._get_meta("run") + 1
+        self._set_meta("run", run)
+        self._set_meta("open_run", run)
+        self._conn.execute("DELETE FROM completed_sources")
+        self._conn.commit()
+        return run
+
+    def finish_run(self, run: int) -> None:
+        """
+        Mark ``run`` as finished and drop its checkpoints.
+
+        Args:
+            run (int): Run number returned by :meth:`begin_run`
+        """
+        self._set_meta("open_run", 0)
+        self._conn.execute("DELETE FROM completed_sources WHERE run = ?", (run,))
+        self._conn.commit()
+
+    @property
+    def version(self) -> int:
+        """Collection version, bumped whenever the collection changes."""
+        return self._get_meta("version")
+
+    def bump_version(self) -> None:
+        """Record that the collection changed."""
+        self._set_meta("version", self._get_meta("version") + 1)
+        self._conn.commit()
+
+    def complete_sources(self, sources: List[str], run: int) -> None:
+        """
+        Checkpoint sources whose chunks have all been committed during ``run``.
+
+        Args:
+            sources (List[str]): Fully committed sources
+            run (int): Current run number
+        """
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO completed_sources (run, source) VALUES (?, ?)",
+            [(run, source) for source in sources],
+        )
+        self._conn.commit()
+
+    def completed_sources(self, run: int) -> Set[str]:
+        """
+        List the sources already committed during ``run``.
+
+        Args:
+            run (int): Run number
+
+        Returns:
+            Set[str]: Sources that can be skipped when resuming
+        """
+        rows = self._conn.execute("SELECT source FROM completed_sources WHERE run = ?", (run,))
+        return {row[0] for row in rows}
+
+    def changed(self, chunks: List[Document]) -> List[Document]:
+        """
+        Select the chunks that are new or whose content has changed.
+
+        Args:
+            chunks (List[Document]): Chunks with IDs assigned
+
+        Returns:
+            List[Document]: Chunks that must be (re-)embedded and upserted
+        """
+        known: Dict[str, str] = {}
+        ids = [chunk.id for chunk in chunks]
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT id, hash FROM chunks WHERE id IN ({placeholders})", batch
+            )
+            known.update(rows)
+        return [
+            chunk for chunk in chunks
+            if known.get(chunk.id) != chunk.metadata["content_hash"]
+        ]
+
+    def record(self, chunks: List[Document], run: int) -> None:
+        """
+        Record chunks as stored and seen during ``run``.
+
+        Args:
+            chunks (List[Document]): Chunks present in the vector store
+            run (int): Current run number
+        """
+        self._conn.executemany(
+            "INSERT INTO chunks (id, source, hash, run) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET source = excluded.source, "
+            "hash = excluded.hash, run = excluded.run",
+            [
+                (chunk.id, chunk.metadata.get("source", ""), chunk.metadata["content_hash"], run)
+                for chunk in chunks
+            ],
+        )
+        self._conn.commit()
+
+    def touch_sources(self, sources: List[str], run: int) -> None:
+        """
+        Mark every chunk of ``sources`` as seen during ``run``.
+
+        Used for sources that could not be loaded, so that a transient failure
+        does not make their chunks look stale.
+
+        Args:
+            sources (List[str]): Sources whose chunks are kept as they are
+            run (int): Current run number
+        """
+        self._conn.executemany(
+            "UPDATE chunks SET run = ? WHERE source = ?", [(run, source) for source in sources]
+        )
+        self._conn.commit()
+
+    def stale_ids(self, run: int, sources: Optional[Collection[str]] = None) -> List[str]:
+        """
+        List the IDs of chunks that were not seen during ``run``.
+
+        Args:
+            run (int): Current run number
+            sources (Optional[Collection[str]]): Only consider chunks of these
+                sources, every source by default
+
+        Returns:
+            List[str]: IDs of chunks that no longer exist in the sources
+        """
+        rows = self._conn.execute("SELECT id, source FROM chunks WHERE run < ?", (run,))
+        return [chunk_id for chunk_id, source in rows if sources is None or source in sources]
+
+    def remove(self, ids: List[str]) -> None:
+        """
+        Forget chunks that were deleted from the vector store.
+
+        Args:
+            ids (List[str]): IDs of deleted chunks
+        """
+        self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in ids])
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
@@ -0,0 +1,217 @@
+"""
+Incremental, streaming ingestion of the knowledge base into the vector store.
+
+Sources flow through a generator pipeline (load -> split -> embed -> upsert)
+in fixed-size batches of chunks, so peak memory does not grow with the size of
+the corpus. Each chunk gets a stable ID, and the manifest decides which chunks
+actually need embedding: unchanged chunks are left alone and chunks that
+disappeared from the sources are deleted at the end of the run. Every
+committed batch checkpoints the sources it completed, so an interrupted run
+can be resumed from the last committed batch.
+"""
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_chroma import Chroma
+
+from ingestion.config import (
+    INGEST_BATCH_SIZE,
+    LEXICAL_INDEX_PATH,
+    LOAD_CONCURRENCY,
+    MANIFEST_PATH,
+    SPLIT_WORKERS,
+    URLS,
+    WEB_RESULTS_MAX_AGE,
+)
+from ingestion.embeddings import CachedEmbeddings, create_embedder
+from ingestion.lexical import LexicalIndex
+from ingestion.loaders import iter_sources
+from ingestion.manifest import Manifest, assign_chunk_ids
+from ingestion.splitting import LoadedSource, iter_split
+from ingestion.store import open_vectorstore, upsert_chunks
+from ingestion.web_results import expire
+
+logger = logging.getLogger("self_rag.ingestion")
+
+
+def iter_chunks(
+    loaded: Iterable[LoadedSource],
+    failed: List[str],
+    split_workers: int = SPLIT_WORKERS,
+) -> Iterator[Tuple[str, List[Document]]]:
+    """
+    Split loaded sources and assign chunk IDs.
+
+    Args:
+        loaded (Iterable[LoadedSource]): Sources and their documents
+        failed (List[str]): Collects the sources that failed to load
+        split_workers (int): Number of worker processes used for splitting
+
+    Yields:
+        Tuple[str, List[Document]]: Source and its identified chunks
+    """
+    for source, chunks in iter_split(loaded, max_workers=split_workers):
+        if chunks is None:
+            failed.append(source)
+            continue
+        # Splitting preserves source order, so IDs are numbered deterministically
+        yield source, assign_chunk_ids(chunks)
+
+
+def iter_batches(
+    chunked: Iterable[Tuple[str, List[Document]]],
+    batch_size: int,
+) -> Iterator[Tuple[List[Document], List[str]]]:
+    """
+    Regroup per-source chunks into fixed-size batches.
+
+    Args:
+        chunked (Iterable[Tuple[str, List[Document]]]): Sources and their chunks
+        batch_size (int): Number of chunks per batch
+
+    Yields:
+        Tuple[List[Document], List[str]]: A batch of chunks and the sources it completes
+    """
+    buffer: List[Document] = []
+    # Sources whose last chunk is buffered, with the buffer position after it
+    completing: List[Tuple[str, int]] = []
+
+    def flush(size: int) -> Tuple[List[Document], List[str]]:
+        nonlocal buffer, completing
+        batch, buffer = buffer[:size], buffer[size:]
+        done = [source for source, end in completing if end <= size]
+        completing = [(source, end - size) for source, end in completing if end > size]
+        return batch, done
+
+    for source, chunks in chunked:
+        buffer.extend(chunks)
+        completing.append((source, len(buffer)))
+        while len(buffer) >= batch_size:
+            yield flush(batch_size)
+    if buffer or completing:
+        yield flush(len(buffer))
+
+
+def rebuild_lexical_index(vectorstore: Chroma, lexical: LexicalIndex, batch_size: int = INGEST_BATCH_SIZE) -> int:
+    """
+    Fill the lexical index from the chunks already stored in the vector store.
+
+    Args:
+        vectorstore (Chroma): Vector store holding the chunks
+        lexical (LexicalIndex): Index to fill
+        batch_size (int): Number of chunks read and indexed together
+
+    Returns:
+        int: Number of chunks indexed
+    """
+    indexed = 0
+    while True:
+        page = vectorstore.get(limit=batch_size, offset=indexed, include=["documents", "metadatas"])
+        if not page["ids"]:
+            return indexed
+        lexical.upsert([
+            Document(id=chunk_id, page_content=content, metadata=metadata or {})
+            for chunk_id, content, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+        ])
+        indexed += len(page["ids"])
+
+
+def ingest(
+    sources: List[str] = URLS,
+    vectorstore: Optional[Chroma] = None,
+    manifest: Optional[Manifest] = None,
+    embedder: Optional[CachedEmbeddings] = None,
+    lexical: Optional[LexicalIndex] = None,
+    max_concurrency: int = LOAD_CONCURRENCY,
+    split_workers: int = SPLIT_WORKERS,
+    batch_size: int = INGEST_BATCH_SIZE,
+    resume: bool = False,
+    web_max_age: float = WEB_RESULTS_MAX_AGE,
+    prune: bool = False,
+) -> Dict[str, int]:
+    """
+    Bring the vector store and the lexical index in line with the sources.
+
+    Only new or changed chunks are embedded and upserted, and their vectors
+    come from the embedding cache whenever identical text has been embedded
+    before with the same model. Chunks that the sources of this run no longer
+    produce are deleted. Chunks of sources that failed to load are kept as
+    they are, and so are chunks of sources left out of this run (e.g. when
+    ingesting a single new source) unless ``prune`` is set. Chunks written
+    back from web search are not produced by the sources; they are deleted
+    once older than ``web_max_age`` seconds.
+
+    Args:
+        sources (List[str]): URLs, local files or directories of the knowledge base
+        vectorstore (Optional[Chroma]): Target vector store, the persisted collection by default
+        manifest (Optional[Manifest]): Chunk manifest, the persisted manifest by default
+        embedder (Optional[CachedEmbeddings]): Embedding stage, OpenAI behind the disk cache by default
+        lexical (Optional[LexicalIndex]): BM25 index, the persisted index by default
+        max_concurrency (int): Maximum number of sources loaded at once
+        split_workers (int): Number of worker processes used for splitting
+        batch_size (int): Number of chunks embedded and committed together
+        resume (bool): Continue an interrupted run, skipping already committed sources
+        web_max_age (float): Age in seconds after which web search chunks expire, 0 keeps them
+        prune (bool): Also delete the chunks of every source not ingested in this run
+
+    Returns:
+        Dict[str, int]: Counts of upserted, unchanged, deleted and expired
+        chunks, failed sources and committed batches
+    """
+    embedder = embedder if embedder is not None else create_embedder()
+    vectorstore = vectorstore if vectorstore is not None else open_vectorstore(embedder)
+    manifest = manifest if manifest is not None else Manifest(MANIFEST_PATH)
+    lexical = lexical if lexical is not None else LexicalIndex(LEXICAL_INDEX_PATH)
+
+    # Collections ingested before the lexical index existed are indexed once
+    if not len(lexical) and len(manifest):
+        logger.info(f"Built lexical index from {rebuild_lexical_index(vectorstore, lexical, batch_size)} stored chunks")
+        manifest.bump_version()
+
+    run = manifest.begin_run(resume=resume)
+    skip = manifest.completed_sources(run)
+    if skip:
+        logger.info(f"Resuming run {run}, skipping {len(skip)} committed sources")
+
+    stats = {"upserted": 0, "unchanged": 0, "deleted": 0, "expired": 0, "failed": 0, "batches": 0}
+    failed: List[str] = []
+
+    logger.info(f"Ingesting {len(sources)} sources in batches of {batch_size} chunks")
+    loaded = iter_sources(sources, max_concurrency=max_concurrency, skip=skip)
+    for batch, completed in iter_batches(iter_chunks(loaded, failed, split_workers), batch_size):
+        changed = manifest.changed(batch)
+        if changed:
+            vectors = embedder.embed_documents([chunk.page_content for chunk in changed])
+            upsert_chunks(vectorstore, changed, vectors)
+            lexical.upsert(changed)
+            # Invalidate cached query results as soon as the collection changes
+            manifest.bump_version()
+        # Recording the batch in the manifest is the checkpoint
+        manifest.record(batch, run)
+        manifest.complete_sources(completed, run)
+
+        if batch:
+            stats["upserted"] += len(changed)
+            stats["unchanged"] += len(batch) - len(changed)
+            stats["batches"] += 1
+            logger.info(f"Committed batch {stats['batches']}: {len(changed)}/{len(batch)} chunks upserted")
+
+    manifest.touch_sources(failed, run)
+    stats["failed"] = len(failed)
+
+    # Committed sources include those of an interrupted run that is resumed
+    stale = manifest.stale_ids(run, None if prune else manifest.completed_sources(run))
+    for start in range(0, len(stale), batch_size):
+        ids = stale[start:start + batch_size]
+        vectorstore.delete(ids=ids)
+        lexical.remove(ids)
+        manifest.remove(ids)
+    if stale:
+        manifest.bump_version()
+        logger.info(f"Deleted {len(stale)} stale chunks")
+    stats["deleted"] = len(stale)
+    stats["expired"] = expire(vectorstore, lexical, manifest, max_age=web_max_age)
+
+    manifest.finish_run(run)
+    return stats
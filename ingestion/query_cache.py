@@ -0,0 +1,225 @@
+"""
+Query-time caches in front of the vector store.
+
+Two LRU caches with a time-to-live serve repeated and popular questions:
+
+- query embeddings, keyed by embedding model and normalized question, so a
+  repeated question never pays the embedding round trip again;
+- top-k chunk IDs, keyed by normalized question and collection version, so a
+  repeated question skips retrieval altogether.
+
+The collection version is bumped by ingestion whenever it changes the
+collection, which invalidates every cached result automatically. The version
+is read from the manifest at most once per ``version_ttl`` seconds, off the
+event loop for async retrieval.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+from cachetools import TTLCache
+from langchain.schema import Document
+from langchain_chroma import Chroma
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from opentelemetry import trace
+from pydantic import ConfigDict, PrivateAttr
+
+logger = logging.getLogger("self_rag.ingestion.query_cache")
+
+# Spans and events are no-ops unless the application configured telemetry
+tracer = trace.get_tracer("self_rag.ingestion")
+
+
+def _record_lookup(cache: str, hit: bool) -> None:
+    trace.get_current_span().add_event("cache_lookup", {"self_rag.cache": cache, "self_rag.cache.hit": hit})
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for use as a cache key.
+
+    Args:
+        question (str): Question as asked
+
+    Returns:
+        str: Case-folded question with collapsed whitespace
+    """
+    return " ".join(question.casefold().split())
+
+
+class QueryCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an entry.
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Optional[Any]: Cached value, or None if missing or expired
+        """
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store an entry, evicting the least recently used one when full.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to cache
+        """
+        with self._lock:
+            self._cache[key] = value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+
+class TracedEmbeddings(Embeddings):
+    """Embeddings wrapper recording an "embedding query" span per question."""
+
+    def __init__(self, embeddings: Embeddings, model: str):
+        self.embeddings = embeddings
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents without tracing (ingestion logs its own batches)."""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a question inside an "embedding query" span.
+
+        Args:
+            text (str): Question to embed
+
+        Returns:
+            List[float]: Query vector
+        """
+        with tracer.start_as_current_span("embedding query", attributes={"gen_ai.request.model": self.model}):
+            return self.embeddings.embed_query(text)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper caching query vectors by normalized question."""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: QueryCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents without caching (ingestion has its own cache)."""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a question, reusing the vector of an earlier identical question.
+
+        Args:
+            text (str): Question to embed
+
+        Returns:
+            List[float]: Query vector
+        """
+        key = (self.model, normalize_question(text))
+        vector = self.cache.get(key)
+        trace.get_current_span().set_attribute("self_rag.cache.hit", vector is not None)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever caching the chunk IDs of its results per collection version."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    vectorstore: Chroma
+    cache: QueryCache
+    version: Callable[[], int]
+    version_ttl: float = 1.0
+
+    _version: Optional[Tuple[int, float]] = PrivateAttr(default=None)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        version = self._cached_version()
+        key = (normalize_question(query), self._read_version() if version is None else version)
+        ids = self.cache.get(key)
+        documents = self._hydrate(ids) if ids is not None else None
+        _record_lookup("retrieval", documents is not None)
+        if documents is not None:
+            logger.info(f"Serving {len(documents)} cached results")
+            return documents
+
+        documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        self._store(key, documents)
+        return documents
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        version = self._cached_version()
+        if version is None:
+            # Reading the manifest opens a SQLite connection; keep it off the event loop
+            version = await asyncio.to_thread(self._read_version)
+        key = (normalize_question(query), version)
+        ids = self.cache.get(key)
+        documents = self._rank(ids, await self.vectorstore.aget_by_ids(ids)) if ids is not None else None
+        _record_lookup("retrieval", documents is not None)
+        if documents is not None:
+            logger.info(f"Serving {len(documents)} cached results")
+            return documents
+
+        documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        self._store(key, documents)
+        return documents
+
+    def _cached_version(self) -> Optional[int]:
+        cached = self._version
+        if cached is not None and time.monotonic() - cached[1] < self.version_ttl:
+            return cached[0]
+        return None
+
+    def _read_version(self) -> int:
+        version = self.version()
+        self._version = (version, time.monotonic())
+        return version
+
+    def _store(self, key: Hashable, documents: List[Document]) -> None:
+        if all(doc.id for doc in documents):
+            self.cache.put(key, [doc.id for doc in documents])
+
+    def _hydrate(self, ids: List[str]) -> Optional[List[Document]]:
+        return self._rank(ids, self.vectorstore.get_by_ids(ids))
+
+    @staticmethod
+    def _rank(ids: List[str], documents: List[Document]) -> Optional[List[Document]]:
+        # Chunks are returned in any order; restore the ranking
+        found = {doc.id: doc for doc in documents}
+        if len(found) != len(set(ids)):
+            return None
+        return [found[chunk_id] for chunk_id in ids]
@@ -0,0 +1,86 @@
+"""
+Retrievers over the knowledge base: BM25 and hybrid rank fusion.
+"""
+import asyncio
+from typing import Dict, List, Sequence
+
+from langchain.schema import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from ingestion.lexical import LexicalIndex
+
+# Rank offset of reciprocal rank fusion; 60 is the value from the original paper
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int = RRF_K) -> List[Document]:
+    """
+    Merge ranked result lists by reciprocal rank fusion.
+
+    Each document scores ``sum(1 / (k + rank))`` over the lists it appears in,
+    so chunks ranked well by several retrievers rise to the top without having
+    to compare BM25 scores with vector distances.
+
+    Args:
+        rankings (Sequence[List[Document]]): Result lists, best first
+        k (int): Rank offset damping the weight of the top ranks
+
+    Returns:
+        List[Document]: Unique documents ordered by fused score, best first
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+    # sorted() is stable, so ties keep the order of first appearance
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class LexicalRetriever(BaseRetriever):
+    """Retriever returning the BM25 top ``k`` chunks of a lexical index."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: LexicalIndex
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.index.search(query, k=self.k)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing the results of several retrievers by reciprocal rank.
+
+    Async retrieval queries all retrievers concurrently.
+    """
+
+    retrievers: List[BaseRetriever]
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        rankings = [
+            retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            for retriever in self.retrievers
+        ]
+        return reciprocal_rank_fusion(rankings)[:self.k]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        rankings = await asyncio.gather(
+            *(
+                retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+                for retriever in self.retrievers
+            )
+        )
+        return reciprocal_rank_fusion(rankings)[:self.k]
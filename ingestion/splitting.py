@@ -0,0 +1,87 @@
+"""
+Process-pool chunking for tokenizer-based splitting.
+
+Tokenizing with tiktoken dominates the CPU cost of re-chunking a large corpus,
+so sources are split across a pool of worker processes. Every worker builds
+its text splitter (and therefore its tiktoken encoder) once, in the pool
+initializer. Results are yielded in input order from a bounded window of
+in-flight sources, so chunk IDs stay stable and memory stays flat.
+"""
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TextSplitter
+
+from ingestion.config import CHUNK_OVERLAP, CHUNK_SIZE, SPLIT_WORKERS
+
+logger = logging.getLogger("self_rag.ingestion.splitting")
+
+# A loaded source: its name and documents, or None if loading failed
+LoadedSource = Tuple[str, Optional[List[Document]]]
+
+# Splitter owned by the current worker process
+_worker_splitter: Optional[TextSplitter] = None
+
+
+def create_text_splitter() -> TextSplitter:
+    """
+    Create the tokenizer-based text splitter.
+
+    Returns:
+        TextSplitter: Splitter measuring chunk size in tiktoken tokens
+    """
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+    )
+
+
+def _init_worker(factory: Callable[[], TextSplitter]) -> None:
+    global _worker_splitter
+    _worker_splitter = factory()
+
+
+def _split(docs: List[Document]) -> List[Document]:
+    return _worker_splitter.split_documents(docs)
+
+
+def iter_split(
+    loaded: Iterable[LoadedSource],
+    max_workers: int = SPLIT_WORKERS,
+    factory: Callable[[], TextSplitter] = create_text_splitter,
+) -> Iterator[LoadedSource]:
+    """
+    Split sources into chunks, in parallel when ``max_workers`` > 1.
+
+    Sources that failed to load pass through unchanged with ``None``.
+
+    Args:
+        loaded (Iterable[LoadedSource]): Sources and their documents
+        max_workers (int): Number of worker processes; 1 splits in-process
+        factory (Callable[[], TextSplitter]): Picklable function creating the splitter
+
+    Yields:
+        LoadedSource: Sources and their chunks, in input order
+    """
+    if max_workers <= 1:
+        splitter = factory()
+        for source, docs in loaded:
+            yield source, splitter.split_documents(docs) if docs is not None else None
+        return
+
+    window = 2 * max_workers
+    pending: deque = deque()
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(factory,)
+    ) as executor:
+        for source, docs in loaded:
+            future = executor.submit(_split, docs) if docs is not None else None
+            pending.append((source, future))
+            if len(pending) >= window:
+                source, future = pending.popleft()
+                yield source, future.result() if future is not None else None
+        while pending:
+            source, future = pending.popleft()
+            yield source, future.result() if future is not None else None
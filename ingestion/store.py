@@ -0,0 +1,49 @@
+"""
+Access to the persisted Chroma vector store.
+"""
+from typing import List, Optional
+
+from langchain.schema import Document
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from ingestion.config import COLLECTION_NAME, EMBEDDING_MODEL, PERSIST_DIRECTORY
+
+
+def open_vectorstore(
+    embedding_function: Optional[Embeddings] = None,
+    persist_directory: str = PERSIST_DIRECTORY,
+) -> Chroma:
+    """
+    Open the persisted collection without loading or embedding anything.
+
+    Args:
+        embedding_function (Optional[Embeddings]): Embeddings used for queries
+        persist_directory (str): Directory holding the Chroma database
+
+    Returns:
+        Chroma: The existing (or empty) ``rag-chroma`` collection
+    """
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=persist_directory,
+        embedding_function=embedding_function or OpenAIEmbeddings(model=EMBEDDING_MODEL),
+    )
+
+
+def upsert_chunks(vectorstore: Chroma, chunks: List[Document], vectors: List[List[float]]) -> None:
+    """
+    Upsert chunks together with their precomputed vectors.
+
+    Args:
+        vectorstore (Chroma): Target vector store
+        chunks (List[Document]): Chunks with IDs assigned
+        vectors (List[List[float]]): One embedding per chunk
+    """
+    vectorstore._collection.upsert(
+        ids=[chunk.id for chunk in chunks],
+        embeddings=vectors,
+        documents=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata for chunk in chunks],
+    )
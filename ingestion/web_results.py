@@ -0,0 +1,205 @@
+"""
+Write-back of useful web search results into the knowledge base.
+
+Web search is the slow path of the workflow. Results that the search engine
+scored as relevant are chunked, embedded and upserted into the ``rag-chroma``
+collection (and the lexical index), so that later questions on the same topic
+are answered by local retrieval instead of another web search.
+
+Written-back chunks are tagged with ``origin="web_search"``, their URL as
+``source`` and the time they were fetched as ``fetched_at``. Their IDs are
+derived from the URL under the ``web:`` namespace, so they never overwrite
+chunks ingested from the same URL. Fetching a page again replaces all of its
+earlier chunks, including those beyond its new length.
+
+They are not recorded in the manifest, so the stale sweep of ingestion leaves
+them alone; instead, every ingestion run expires the ones fetched more than
+``WEB_RESULTS_MAX_AGE`` seconds ago.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from langchain.schema import Document
+from langchain.text_splitter import TextSplitter
+
+from ingestion.config import WEB_RESULTS_MAX_AGE
+from ingestion.lexical import LexicalIndex
+from ingestion.manifest import Manifest, chunk_id, content_hash
+
+# The workflow imports WEB_ORIGIN from here; chromadb is only loaded by the store
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+logger = logging.getLogger("self_rag.ingestion.web_results")
+
+# Value of the ``origin`` metadata of chunks written back from web search
+WEB_ORIGIN = "web_search"
+
+
+def web_result_chunks(
+    results: Sequence[Dict[str, Any]],
+    splitter: TextSplitter,
+    min_score: float = 0.0,
+    fetched_at: Optional[datetime] = None,
+) -> List[Document]:
+    """
+    Turn web search results into tagged chunks ready to be upserted.
+
+    Args:
+        results (Sequence[Dict[str, Any]]): Search results with ``url``,
+            ``content`` and optionally ``title`` and ``score``
+        splitter (TextSplitter): Splitter used for the result contents
+        min_score (float): Minimum search score of the results kept
+        fetched_at (Optional[datetime]): Fetch time, now by default
+
+    Returns:
+        List[Document]: Chunks with IDs, source, title, origin and fetch time set
+    """
+    fetched_at = (fetched_at or datetime.now(timezone.utc)).isoformat()
+
+    chunks = []
+    for result in results:
+        url, content = result.get("url"), result.get("content")
+        if not url or not content or result.get("score", 0.0) < min_score:
+            continue
+        document = Document(
+            page_content=content,
+            metadata={
+                "source": url,
+                "title": result.get("title") or url,
+                "origin": WEB_ORIGIN,
+                "fetched_at": fetched_at,
+            },
+        )
+        for index, chunk in enumerate(splitter.split_documents([document])):
+            chunk.id = chunk_id(f"web:{url}", index)
+            chunk.metadata["content_hash"] = content_hash(chunk.page_content)
+            chunks.append(chunk)
+    return chunks
+
+
+def _delete(vectorstore: "Chroma", lexical: Optional[LexicalIndex], ids: List[str]) -> None:
+    """Delete chunks from the vector store and the lexical index."""
+    vectorstore.delete(ids=ids)
+    if lexical is not None:
+        lexical.remove(ids)
+
+
+def superseded_ids(vectorstore: "Chroma", chunks: Sequence[Document]) -> List[str]:
+    """
+    Find the stored web chunks of the chunks' URLs that they do not replace.
+
+    Args:
+        vectorstore (Chroma): Vector store holding earlier write-backs
+        chunks (Sequence[Document]): Fresh chunks about to be upserted
+
+    Returns:
+        List[str]: IDs of earlier chunks of the same URLs not among the fresh ones
+    """
+    fresh = {chunk.id for chunk in chunks}
+    stale = []
+    for url in sorted({chunk.metadata["source"] for chunk in chunks}):
+        stored = vectorstore.get(where={"$and": [{"source": url}, {"origin": WEB_ORIGIN}]}, include=[])
+        stale.extend(chunk_id for chunk_id in stored["ids"] if chunk_id not in fresh)
+    return stale
+
+
+def write_back(
+    results: Sequence[Dict[str, Any]],
+    vectorstore: "Chroma",
+    lexical: Optional[LexicalIndex] = None,
+    manifest: Optional[Manifest] = None,
+    splitter: Optional[TextSplitter] = None,
+    min_score: float = 0.0,
+    fetched_at: Optional[datetime] = None,
+) -> int:
+    """
+    Upsert the useful web search results into the knowledge base.
+
+    Chunks are embedded by the vector store's embedding function. Earlier
+    chunks of the same URLs that the fresh ones do not overwrite are deleted.
+    Once the chunks are stored, the collection version is bumped so cached
+    retrieval results pick them up.
+
+    Args:
+        results (Sequence[Dict[str, Any]]): Search results of one question
+        vectorstore (Chroma): Target vector store
+        lexical (Optional[LexicalIndex]): BM25 index kept in line with the vector store
+        manifest (Optional[Manifest]): Manifest whose collection version is bumped
+        splitter (Optional[TextSplitter]): Splitter for the results, the ingestion splitter by default
+        min_score (float): Minimum search score of the results written back
+        fetched_at (Optional[datetime]): Fetch time, now by default
+
+    Returns:
+        int: Number of chunks upserted
+    """
+    if splitter is None:
+        from ingestion.splitting import create_text_splitter
+
+        splitter = create_text_splitter()
+
+    chunks = web_result_chunks(results, splitter, min_score=min_score, fetched_at=fetched_at)
+    if not chunks:
+        return 0
+
+    stale = superseded_ids(vectorstore, chunks)
+    if stale:
+        _delete(vectorstore, lexical, stale)
+    vectorstore.add_documents(chunks, ids=[chunk.id for chunk in chunks])
+    if lexical is not None:
+        lexical.upsert(chunks)
+    if manifest is not None:
+        manifest.bump_version()
+    logger.info(f"Wrote back {len(chunks)} chunks from {len({c.metadata['source'] for c in chunks})} web results")
+    return len(chunks)
+
+
+def expire(
+    vectorstore: "Chroma",
+    lexical: Optional[LexicalIndex] = None,
+    manifest: Optional[Manifest] = None,
+    max_age: float = WEB_RESULTS_MAX_AGE,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Delete written-back chunks fetched more than ``max_age`` seconds ago.
+
+    Args:
+        vectorstore (Chroma): Vector store holding the write-backs
+        lexical (Optional[LexicalIndex]): BM25 index kept in line with the vector store
+        manifest (Optional[Manifest]): Manifest whose collection version is bumped
+        max_age (float): Maximum age in seconds, 0 keeps every chunk
+        now (Optional[datetime]): Current time, now by default
+
+    Returns:
+        int: Number of chunks deleted
+    """
+    if max_age <= 0:
+        return 0
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=max_age)
+
+    stored = vectorstore.get(where={"origin": WEB_ORIGIN}, include=["metadatas"])
+    expired = []
+    for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+        fetched_at = _fetched_at(metadata)
+        # Chunks without a readable fetch time are expired too
+        if fetched_at is None or fetched_at < cutoff:
+            expired.append(chunk_id)
+    if not expired:
+        return 0
+
+    _delete(vectorstore, lexical, expired)
+    if manifest is not None:
+        manifest.bump_version()
+    logger.info(f"Expired {len(expired)} web result chunks fetched before {cutoff.isoformat()}")
+    return len(expired)
+
+
+def _fetched_at(metadata: Optional[Dict[str, Any]]) -> Optional[datetime]:
+    """Parse the fetch time of a chunk, None if it is missing or malformed."""
+    try:
+        fetched_at = datetime.fromisoformat((metadata or {})["fetched_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return fetched_at if fetched_at.tzinfo else fetched_at.replace(tzinfo=timezone.utc)
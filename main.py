@@ -1,6 +1,14 @@
-from graph.graph import app
+import argparse
+import asyncio
+import json
+
 from dotenv import load_dotenv
 
+from graph.batch import read_questions, run_batch
+from graph.graph import configure_logging, draw_graph, get_app
+from graph.telemetry import configure_telemetry
+from graph.streaming import stream_answer
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -16,10 +24,34 @@ def run_rag_query(question):
         dict: The response from the RAG system
     """
     print(f"Processing query: {question}")
-    return app.invoke(input={"question": question})
+    return get_app().invoke(input={"question": question})
 
 
-if __name__ == "__main__":
+def stream_rag_query(question):
+    """
+    Run a query through the Self-RAG system, printing the answer as it is generated
+
+    Args:
+        question (str): The question to ask
+
+    Returns:
+        dict: The final state of the RAG system
+    """
+    print(f"Processing query: {question}")
+    for event in stream_answer(question):
+        if event["event"] == "token":
+            print(event["text"], end="", flush=True)
+        elif event["event"] == "retract":
+            print(f"\n[Answer rejected ({event['reason']}), regenerating]")
+        else:
+            print(f"\n[Verdict: {event['verdict']}]")
+            return event["state"]
+
+
+def interactive(stream=False):
+    """Run the example query, then answer questions until the user exits."""
+    ask = stream_rag_query if stream else run_rag_query
+
     print("=" * 50)
     print("Self-RAG System with Quality Control")
     print("=" * 50)
@@ -27,7 +59,7 @@ if __name__ == "__main__":
     # Example query
     example_query = "What is retrieval-augmented generation?"
     print(f"\nRunning example query: '{example_query}'")
-    result = run_rag_query(example_query)
+    result = ask(example_query)
     print("\nResult:")
     print(result)
 
@@ -38,6 +70,56 @@ if __name__ == "__main__":
         if user_query.lower() in ['exit', 'quit', 'q']:
             break
 
-        result = run_rag_query(user_query)
+        result = ask(user_query)
         print("\nResult:")
         print(result)
+
+
+def batch(input_path, output_path, concurrency=None):
+    """
+    Answer every question of a JSONL or CSV file, then print a summary
+
+    Args:
+        input_path (str): Questions to answer
+        output_path (str): JSONL file results are appended to
+        concurrency (int): Questions in flight at once
+
+    Returns:
+        dict: Throughput and latency summary
+    """
+    questions = read_questions(input_path)
+    summary = asyncio.run(run_batch(questions, output_path, concurrency=concurrency))
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Self-RAG System with Quality Control")
+    parser.add_argument("--stream", action="store_true", help="Print answers token by token as they are generated")
+    subparsers = parser.add_subparsers(dest="command")
+
+    draw_parser = subparsers.add_parser("draw-graph", help="Render the workflow diagram to a PNG file")
+    draw_parser.add_argument("--output", help="Output file (default: graph_<timestamp>.png)")
+
+    batch_parser = subparsers.add_parser("batch", help="Answer the questions of a JSONL or CSV file")
+    batch_parser.add_argument("input", help="JSONL or CSV file of questions with an optional id")
+    batch_parser.add_argument("--output", required=True, help="JSONL results file; IDs already in it are skipped")
+    batch_parser.add_argument(
+        "--concurrency", type=int, help="Questions in flight at once (default: SELF_RAG_BATCH_CONCURRENCY)"
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging()
+    configure_telemetry()
+
+    if args.command == "draw-graph":
+        print(f"Workflow diagram written to {draw_graph(args.output)}")
+    elif args.command == "batch":
+        batch(args.input, args.output, args.concurrency)
+    else:
+        interactive(stream=args.stream)
@@ -0,0 +1,444 @@
+"""
+HTTP server for the Self-RAG application.
+
+Endpoints:
+    POST /query    {"question": ...} -> the final answer as JSON
+    POST /stream   {"question": ...} -> server-sent token, retract and final events
+    GET  /healthz  liveness
+    GET  /readyz   readiness: 200 once the graph is compiled and the index opened
+
+At most ``SERVER_CONCURRENCY`` questions run at once and ``SERVER_QUEUE_SIZE``
+more wait for a slot; further requests are shed with 429. Identical questions
+asked while one is already being answered share its graph execution: /query
+requests share the final state, and /stream requests share the event stream,
+replayed from its start to requests joining late.
+
+Usage:
+    python server.py [--host HOST] [--port PORT]
+"""
+import argparse
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from graph import prefilter
+from graph.config import SERVER_CONCURRENCY, SERVER_QUEUE_SIZE
+from graph.streaming import astream_answer
+from ingestion.query_cache import normalize_question
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger("self_rag.server")
+
+
+class QueryRequest(BaseModel):
+    """Body of the query and stream endpoints."""
+
+    question: str
+
+
+class Saturated(Exception):
+    """Raised when every slot and queue place is taken."""
+
+
+class AdmissionControl:
+    """Bounded concurrency with a bounded queue in front of it."""
+
+    def __init__(self, concurrency: int, queue_size: int):
+        self.capacity = concurrency + queue_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self.admitted = 0
+        self.running = 0
+        self.shed = 0
+
+    @property
+    def queued(self) -> int:
+        """Number of admitted requests waiting for a slot."""
+        return self.admitted - self.running
+
+    async def acquire(self) -> Callable[[], None]:
+        """
+        Wait for a slot.
+
+        Returns:
+            Callable[[], None]: Function releasing the slot; calling it again is a no-op
+
+        Raises:
+            Saturated: If the queue is full
+        """
+        if self.admitted >= self.capacity:
+            self.shed += 1
+            raise Saturated()
+        self.admitted += 1
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.admitted -= 1
+            raise
+        self.running += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.running -= 1
+                self.admitted -= 1
+                self._slots.release()
+
+        return release
+
+
+class Coalescer:
+    """Shares one execution between identical in-flight requests."""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, execute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run ``execute``, or join the execution already running for ``key``.
+
+        The execution is shielded: a caller going away does not cancel it for
+        the others.
+
+        Args:
+            key: Identity of the request
+            execute: Coroutine function doing the work
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it was shared
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(execute())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+class SharedStream:
+    """One event stream, replayed from its start to every request joining it."""
+
+    def __init__(self, events: AsyncIterator[Dict[str, Any]]):
+        self.history: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._update = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(events))
+
+    async def _pump(self, events: AsyncIterator[Dict[str, Any]]) -> None:
+        try:
+            async for event in events:
+                self.history.append(event)
+                self._publish()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._publish()
+            await events.aclose()
+
+    def _publish(self) -> None:
+        update, self._update = self._update, asyncio.Event()
+        update.set()
+
+    def join(self) -> Tuple[AsyncIterator[Dict[str, Any]], Callable[[], None]]:
+        """
+        Subscribe to the stream.
+
+        The execution is cancelled once its last subscriber has left.
+
+        Returns:
+            Tuple[AsyncIterator[Dict[str, Any]], Callable[[], None]]: The events
+            from the start of the stream, and a function leaving it; calling it
+            again is a no-op
+        """
+        self.subscribers += 1
+        left = False
+
+        def leave() -> None:
+            nonlocal left
+            if not left:
+                left = True
+                self.subscribers -= 1
+                if not self.subscribers and not self.task.done():
+                    self.task.cancel()
+
+        async def replay() -> AsyncIterator[Dict[str, Any]]:
+            position = 0
+            try:
+                while True:
+                    while position < len(self.history):
+                        yield self.history[position]
+                        position += 1
+                    if self.done:
+                        if self.error is not None:
+                            raise self.error
+                        return
+                    await self._update.wait()
+            finally:
+                leave()
+
+        return replay(), leave
+
+
+class StreamFanout:
+    """Shares one streamed execution between identical in-flight stream requests."""
+
+    def __init__(self):
+        self._streams: Dict[str, SharedStream] = {}
+        self.coalesced = 0
+
+    def join(self, key: str) -> Optional[Tuple[AsyncIterator[Dict[str, Any]], Callable[[], None]]]:
+        """
+        Join the stream running for ``key``.
+
+        Args:
+            key: Identity of the request
+
+        Returns:
+            Optional[Tuple[AsyncIterator[Dict[str, Any]], Callable[[], None]]]:
+            See :meth:`SharedStream.join`, None if no stream is running for ``key``
+        """
+        stream = self._streams.get(key)
+        if stream is None:
+            return None
+        self.coalesced += 1
+        return stream.join()
+
+    def start(
+        self, key: str, events: AsyncIterator[Dict[str, Any]], release: Callable[[], None]
+    ) -> Tuple[AsyncIterator[Dict[str, Any]], Callable[[], None]]:
+        """
+        Start streaming ``events`` for ``key`` and join the stream.
+
+        Args:
+            key: Identity of the request
+            events: Events of the execution
+            release: Called once the execution is over, e.g. to free its slot
+
+        Returns:
+            Tuple[AsyncIterator[Dict[str, Any]], Callable[[], None]]: See :meth:`SharedStream.join`
+        """
+        stream = SharedStream(events)
+        self._streams[key] = stream
+        stream.task.add_done_callback(lambda done: self._forget(key, stream, release))
+        return stream.join()
+
+    def _forget(self, key: str, stream: SharedStream, release: Callable[[], None]) -> None:
+        if self._streams.get(key) is stream:
+            del self._streams[key]
+        release()
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+
+class Readiness:
+    """Results of the warm-up steps run at startup."""
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]]):
+        self.steps = steps
+        self.checks = {name: False for name, _ in steps}
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether every warm-up step has succeeded."""
+        return all(self.checks.values())
+
+    async def warm_up(self) -> None:
+        """Run the warm-up steps in order, off the event loop."""
+        for name, step in self.steps:
+            try:
+                await asyncio.to_thread(step)
+            except Exception as e:
+                logger.error(f"Warm-up step {name} failed: {str(e)}")
+                self.error = f"{name}: {str(e)}"
+                return
+            self.checks[name] = True
+            logger.info(f"Warm-up step {name} done")
+
+
+def _default_warm_up_steps() -> List[Tuple[str, Callable[[], Any]]]:
+    from graph.chains import build_chains
+    from graph.graph import get_app
+    from ingestion import get_retriever
+
+    # The chains build their LLM clients on first use; compiling the graph
+    # does not, so they get their own step
+    return [("graph", get_app), ("llm", build_chains), ("index", get_retriever)]
+
+
+def _sources(state: Dict[str, Any]) -> List[Optional[str]]:
+    return [doc.metadata.get("source") for doc in state.get("documents") or []]
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    if event["event"] == "final":
+        state = event["state"]
+        event = {
+            "event": "final",
+            "generation": event["generation"],
+            "verdict": event["verdict"],
+            "sources": _sources(state),
+        }
+    return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+def create_app(
+    graph: Optional[Any] = None,
+    concurrency: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    warm_up_steps: Optional[List[Tuple[str, Callable[[], Any]]]] = None,
+) -> FastAPI:
+    """
+    Create the HTTP application.
+
+    Args:
+        graph: Compiled workflow, the application by default
+        concurrency: Questions answered at once, ``SERVER_CONCURRENCY`` by default
+        queue_size: Requests waiting for a slot, ``SERVER_QUEUE_SIZE`` by default
+        warm_up_steps: (name, function) pairs run at startup before reporting
+            ready; by default the graph is compiled and the retriever opened
+
+    Returns:
+        FastAPI: The application
+    """
+    admission = AdmissionControl(
+        SERVER_CONCURRENCY if concurrency is None else concurrency,
+        SERVER_QUEUE_SIZE if queue_size is None else queue_size,
+    )
+    coalescer = Coalescer()
+    fanout = StreamFanout()
+    readiness = Readiness(_default_warm_up_steps() if warm_up_steps is None else warm_up_steps)
+
+    def get_graph() -> Any:
+        if graph is not None:
+            return graph
+        from graph.graph import get_app
+
+        return get_app()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        warm_up = asyncio.create_task(readiness.warm_up())
+        yield
+        if not warm_up.done():
+            warm_up.cancel()
+
+    api = FastAPI(title="Self-RAG", lifespan=lifespan)
+
+    @api.post("/query")
+    async def query(request: QueryRequest) -> Dict[str, Any]:
+        async def answer() -> Dict[str, Any]:
+            release = await admission.acquire()
+            try:
+                return await get_graph().ainvoke({"question": request.question})
+            finally:
+                release()
+
+        try:
+            state, coalesced = await coalescer.run(normalize_question(request.question), answer)
+        except Saturated:
+            raise HTTPException(status_code=429, detail="Server is saturated, retry later")
+
+        return {
+            "question": request.question,
+            "generation": state.get("generation", ""),
+            "verdict": "budget exhausted" if state.get("budget_exhausted") else "useful",
+            "sources": _sources(state),
+            "coalesced": coalesced,
+        }
+
+    @api.post("/stream")
+    async def stream(request: QueryRequest) -> StreamingResponse:
+        key = normalize_question(request.question)
+        joined = fanout.join(key)
+        if joined is None:
+            try:
+                release = await admission.acquire()
+            except Saturated:
+                raise HTTPException(status_code=429, detail="Server is saturated, retry later")
+            # An identical stream may have started while this one waited for a slot
+            joined = fanout.join(key)
+            if joined is None:
+                joined = fanout.start(key, astream_answer(request.question, app=get_graph()), release)
+            else:
+                release()
+        events, leave = joined
+
+        async def body() -> AsyncIterator[str]:
+            try:
+                async for event in events:
+                    yield _sse(event)
+            finally:
+                leave()
+
+        # The background task leaves the stream if the client goes before streaming starts
+        return StreamingResponse(body(), media_type="text/event-stream", background=BackgroundTask(leave))
+
+    @api.get("/healthz")
+    async def healthz() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    @api.get("/readyz")
+    async def readyz() -> JSONResponse:
+        body = {
+            "ready": readiness.ready,
+            "checks": readiness.checks,
+            "error": readiness.error,
+            "running": admission.running,
+            "queued": admission.queued,
+            "shed": admission.shed,
+            "coalesced": coalescer.coalesced,
+            "coalesced_streams": fanout.coalesced,
+            "prefilter": prefilter.stats.as_dict(),
+        }
+        return JSONResponse(body, status_code=200 if readiness.ready else 503)
+
+    return api
+
+
+api = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    from graph.graph import configure_logging
+    from graph.telemetry import configure_telemetry
+
+    parser = argparse.ArgumentParser(description="Serve the Self-RAG system over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    args = parser.parse_args()
+
+    configure_logging()
+    if configure_telemetry():
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+        FastAPIInstrumentor.instrument_app(api)
+    uvicorn.run(api, host=args.host, port=args.port)
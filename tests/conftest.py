@@ -0,0 +1,12 @@
+"""
+Test suite configuration.
+"""
+import os
+
+# Keep the persistent LLM response cache out of the tests: fake chat models
+# would otherwise be answered from, and write to, ./.cache/llm.sqlite3
+os.environ["SELF_RAG_LLM_CACHE"] = "0"
+
+# Every test mocks the web search tool on its own; cached results of one test
+# must not answer the next
+os.environ["SELF_RAG_WEB_SEARCH_CACHE_SIZE"] = "0"
@@ -0,0 +1,51 @@
+"""
+Tests for the batch_retrieval_grader module.
+"""
+from unittest.mock import patch
+
+import pytest
+from langchain.schema import Document
+
+from graph.chains.models import DocumentGrade, GradeDocumentsBatch
+from graph.chains.batch_retrieval_grader import (
+    batch_grade_prompt,
+    get_batch_retrieval_grader,
+)
+
+
+class TestBatchRetrievalGrader:
+    """Test cases for the batch_retrieval_grader module."""
+
+    def test_batch_retrieval_grader_structure(self):
+        """Test the structure of the batch_retrieval_grader module."""
+        # Assert that the components exist
+        assert batch_grade_prompt is not None
+        assert hasattr(get_batch_retrieval_grader(), "invoke")
+        assert get_batch_retrieval_grader() is get_batch_retrieval_grader()
+
+    def test_batch_grade_prompt_structure(self):
+        """Test that the prompt takes all documents and the question once."""
+        assert set(batch_grade_prompt.input_variables) == {"documents", "question"}
+
+    def test_documents_are_packed_and_numbered(self):
+        """Test that the documents reach the prompt numbered from 1 through the context packer."""
+        # Setup
+        pack, prompt = get_batch_retrieval_grader().steps[:2]
+        documents = [Document(page_content="first", metadata={"source": "https://example.com"}),
+                     Document(page_content="second")]
+
+        # Execute
+        with patch("graph.context.token_counter", return_value=lambda text: len(text.split())):
+            messages = (pack | prompt).invoke({"question": "What is RAG?", "documents": documents}).to_messages()
+
+        # Assert
+        assert "[1] (https://example.com) first\n\n[2] second" in messages[1].content
+
+    def test_grade_documents_batch_model(self):
+        """Test the GradeDocumentsBatch model."""
+        # Create a GradeDocumentsBatch instance
+        grades = GradeDocumentsBatch(grades=[DocumentGrade(index=1, binary_score="yes")])
+
+        # Check that it has the expected structure
+        assert grades.grades[0].index == 1
+        assert grades.grades[0].binary_score == "yes"
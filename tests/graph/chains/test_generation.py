@@ -4,7 +4,7 @@ Tests for the generation module.
 import pytest
 from unittest.mock import patch, MagicMock
 
-from graph.chains.generation import generation_chain, llm, prompt
+from graph.chains.generation import get_generation_chain, prompt
 
 
 class TestGeneration:
@@ -12,16 +12,22 @@ class TestGeneration:
 
     def test_generation_chain_structure(self):
         """Test the structure of the generation chain."""
+        # Setup
+        generation_chain = get_generation_chain()
+
         # Assert that the components exist
         assert prompt is not None
-        assert llm is not None
         assert generation_chain is not None
+        assert get_generation_chain() is generation_chain
 
         # Check that generation_chain has invoke method
         assert hasattr(generation_chain, "invoke")
 
     def test_llm_structure(self):
         """Test the structure of the LLM."""
+        # Setup: the model is the third step, after context packing and the prompt
+        llm = get_generation_chain().steps[2].bound
+
         # Check that the LLM has the expected structure
         assert hasattr(llm, "invoke")
 
@@ -39,6 +45,7 @@ class TestGeneration:
     def test_generation_chain_composition(self):
         """Test the composition of the generation chain."""
         # Check that the generation chain is a composition of components
+        generation_chain = get_generation_chain()
         chain_str = str(generation_chain)
 
         # The chain should contain references to components
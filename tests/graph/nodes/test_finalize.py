@@ -0,0 +1,24 @@
+"""
+Tests for the finalize node.
+"""
+import pytest
+
+from graph.nodes.finalize import finalize
+from graph.state import GraphState
+
+
+class TestFinalizeNode:
+    """Test cases for the finalize node."""
+
+    def test_finalize_flags_answer(self):
+        """Test that the answer is flagged as not having passed the check."""
+        # Setup
+        state = GraphState(
+            question="What is RAG?", generation="Made up.", web_search=False, documents=[], generation_attempts=3
+        )
+
+        # Execute
+        result = finalize(state)
+
+        # Assert
+        assert result == {"budget_exhausted": True}
@@ -1,24 +1,27 @@
 """
 Tests for the generate node.
 """
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from langchain.schema import Document
 
-from graph.nodes.generate import generate
+from graph.nodes.generate import agenerate, generate
 from graph.state import GraphState
+from tests.mocks import chain_getter
 
 
 class TestGenerateNode:
     """Test cases for the generate node."""
 
-    @patch("graph.nodes.generate.generation_chain")
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
     def test_generate_structure(self, mock_chain):
         """Test the structure of the generate function."""
         # Check that generate is a function
         assert callable(generate)
 
-    @patch("graph.nodes.generate.generation_chain")
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
     def test_generate_with_documents(self, mock_chain):
         """Test generate with documents."""
         # Setup
@@ -48,7 +51,7 @@ class TestGenerateNode:
         assert call_args["question"] == question
         assert call_args["context"] == [doc1, doc2]
 
-    @patch("graph.nodes.generate.generation_chain")
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
     def test_generate_with_empty_documents(self, mock_chain):
         """Test generate with empty documents."""
         # Setup
@@ -75,3 +78,52 @@ class TestGenerateNode:
         assert "question" in call_args
         assert call_args["question"] == question
         assert call_args["context"] == []
+
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
+    def test_generate_counts_attempts(self, mock_chain):
+        """Test that every generation is counted against the retry budget."""
+        # Setup
+        mock_chain.invoke.return_value = "RAG."
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=[])
+
+        # Execute
+        first = generate(state)
+        second = generate({**state, **first})
+
+        # Assert
+        assert first["generation_attempts"] == 1
+        assert second["generation_attempts"] == 2
+
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
+    def test_agenerate_uses_async_chain(self, mock_chain):
+        """Test that the async node awaits the generation chain."""
+        # Setup
+        mock_chain.ainvoke = AsyncMock(return_value="RAG.")
+        doc = Document(page_content="RAG is retrieval augmented generation.")
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=[doc])
+
+        # Execute
+        result = asyncio.run(agenerate(state))
+
+        # Assert
+        assert result["generation"] == "RAG."
+        assert result["generation_attempts"] == 1
+        mock_chain.ainvoke.assert_awaited_once_with({"context": [doc], "question": "What is RAG?"})
+        mock_chain.invoke.assert_not_called()
+
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
+    def test_regeneration_bypasses_llm_cache(self, mock_chain):
+        """Test that only the first generation may be served from the LLM cache."""
+        # Setup
+        from graph.llm_cache import _bypassed
+
+        mock_chain.invoke.side_effect = lambda inputs: f"bypassed={_bypassed.get()}"
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=[])
+
+        # Execute
+        first = generate(state)
+        second = generate({**state, **first})
+
+        # Assert
+        assert first["generation"] == "bypassed=False"
+        assert second["generation"] == "bypassed=True"
@@ -1,24 +1,39 @@
 """
 Tests for the grade_documents node.
 """
+import asyncio
+import threading
+import time
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from langchain.schema import Document
 
-from graph.nodes.grade_documents import grade_documents
+from graph.chains.models import DocumentGrade, GradeDocumentsBatch
+from graph.nodes.grade_documents import _grading_executor, agrade_documents, grade_documents
 from graph.state import GraphState
+from tests.mocks import chain_getter
+
+
+@pytest.fixture
+def fresh_executor():
+    """Build the shared grading executor anew, with the patched settings."""
+    _grading_executor.cache_clear()
+    yield
+    _grading_executor().shutdown(wait=False)
+    _grading_executor.cache_clear()
 
 
 class TestGradeDocumentsNode:
     """Test cases for the grade_documents node."""
 
-    @patch("graph.nodes.grade_documents.retrieval_grader")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
     def test_grade_documents_structure(self, mock_grader):
         """Test the structure of the grade_documents function."""
         # Check that grade_documents is a function
         assert callable(grade_documents)
 
-    @patch("graph.nodes.grade_documents.retrieval_grader")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
     def test_grade_documents_all_relevant(self, mock_grader):
         """Test grade_documents when all documents are relevant."""
         # Setup
@@ -43,7 +58,7 @@ class TestGradeDocumentsNode:
         assert result["web_search"] is False
         assert mock_grader.invoke.call_count == 2
 
-    @patch("graph.nodes.grade_documents.retrieval_grader")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
     def test_grade_documents_some_irrelevant(self, mock_grader):
         """Test grade_documents when some documents are irrelevant."""
         # Setup
@@ -77,7 +92,7 @@ class TestGradeDocumentsNode:
         assert result["documents"][0].page_content == "RAG is retrieval augmented generation."
         assert result["web_search"] is True
 
-    @patch("graph.nodes.grade_documents.retrieval_grader")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
     def test_grade_documents_all_irrelevant(self, mock_grader):
         """Test grade_documents when all documents are irrelevant."""
         # Setup
@@ -101,3 +116,324 @@ class TestGradeDocumentsNode:
         assert len(result["documents"]) == 0
         assert result["web_search"] is True
         assert mock_grader.invoke.call_count == 2
+
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_grade_documents_concurrently(self, mock_grader):
+        """Test that documents are graded concurrently and keep their order."""
+        # Setup
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def mock_invoke(inputs):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            # Earlier documents take longer, so they finish last
+            time.sleep(0.2 - 0.04 * int(inputs["document"]))
+            with lock:
+                running -= 1
+            result = MagicMock()
+            result.binary_score = "yes"
+            return result
+
+        mock_grader.invoke.side_effect = mock_invoke
+        docs = [Document(page_content=str(i)) for i in range(4)]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        start = time.perf_counter()
+        result = grade_documents(state)
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert peak == 4
+        assert elapsed < 0.4
+        assert [doc.page_content for doc in result["documents"]] == ["0", "1", "2", "3"]
+        assert result["web_search"] is False
+
+    @patch("graph.nodes.grade_documents.GRADING_CONCURRENCY", 2)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_grade_documents_respects_concurrency_cap(self, mock_grader, fresh_executor):
+        """Test that no more than the configured number of calls run at once."""
+        # Setup
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def mock_invoke(inputs):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            result = MagicMock()
+            result.binary_score = "yes"
+            return result
+
+        mock_grader.invoke.side_effect = mock_invoke
+        docs = [Document(page_content=str(i)) for i in range(5)]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        result = grade_documents(state)
+
+        # Assert
+        assert peak == 2
+        assert len(result["documents"]) == 5
+
+    @patch("graph.nodes.grade_documents.GRADING_CONCURRENCY", 2)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_questions_share_the_grading_threads(self, mock_grader, fresh_executor):
+        """Test that grading reuses one pool of threads instead of starting new ones per question."""
+        # Setup
+        threads = set()
+
+        def mock_invoke(inputs):
+            threads.add(threading.current_thread())
+            time.sleep(0.01)
+            return MagicMock(binary_score="yes")
+
+        mock_grader.invoke.side_effect = mock_invoke
+        docs = [Document(page_content=str(i)) for i in range(4)]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        for _ in range(3):
+            grade_documents(state)
+
+        # Assert
+        assert len(threads) == 2
+        assert all(thread.name.startswith("grading") for thread in threads)
+
+    @patch("graph.nodes.grade_documents.GRADING_TIMEOUT", 0.1)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_grade_documents_failures_and_timeouts(self, mock_grader):
+        """Test that failed or timed-out grading counts as not relevant."""
+        # Setup
+        def mock_invoke(inputs):
+            if inputs["document"] == "error":
+                raise ValueError("rate limited")
+            if inputs["document"] == "slow":
+                time.sleep(0.5)
+            result = MagicMock()
+            result.binary_score = "yes"
+            return result
+
+        mock_grader.invoke.side_effect = mock_invoke
+        docs = [Document(page_content=content) for content in ["ok", "error", "slow"]]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        start = time.perf_counter()
+        result = grade_documents(state)
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert elapsed < 0.4
+        assert [doc.page_content for doc in result["documents"]] == ["ok"]
+        assert result["web_search"] is True
+
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_grade_documents_without_documents(self, mock_grader):
+        """Test that an empty retrieval grades nothing."""
+        # Setup
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=[])
+
+        # Execute
+        result = grade_documents(state)
+
+        # Assert
+        assert result["documents"] == []
+        assert result["web_search"] is False
+        mock_grader.invoke.assert_not_called()
+
+    @patch("graph.nodes.grade_documents.GRADING_MODE", "batch")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_batch_retrieval_grader", new_callable=chain_getter)
+    def test_grade_documents_in_one_call(self, mock_batch_grader, mock_grader):
+        """Test that batch mode grades all documents with a single call."""
+        # Setup
+        mock_batch_grader.invoke.return_value = GradeDocumentsBatch(grades=[
+            DocumentGrade(index=3, binary_score="yes"),
+            DocumentGrade(index=1, binary_score="yes"),
+            DocumentGrade(index=2, binary_score="no"),
+        ])
+        docs = [Document(page_content=content) for content in ["a", "b", "c", "d"]]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        result = grade_documents(state)
+
+        # Assert
+        mock_batch_grader.invoke.assert_called_once()
+        assert mock_batch_grader.invoke.call_args.args[0]["documents"] == docs
+        mock_grader.invoke.assert_not_called()
+        # Document 4 got no verdict and counts as not relevant
+        assert [doc.page_content for doc in result["documents"]] == ["a", "c"]
+        assert result["web_search"] is True
+
+    @patch("graph.nodes.grade_documents.GRADING_MODE", "batch")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_batch_retrieval_grader", new_callable=chain_getter)
+    def test_failed_batch_falls_back_to_per_document(self, mock_batch_grader, mock_grader):
+        """Test that a failed batch call is retried one document at a time."""
+        # Setup
+        mock_batch_grader.invoke.side_effect = ValueError("malformed output")
+        mock_result = MagicMock()
+        mock_result.binary_score = "yes"
+        mock_grader.invoke.return_value = mock_result
+        docs = [Document(page_content=content) for content in ["a", "b"]]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        result = grade_documents(state)
+
+        # Assert
+        assert mock_grader.invoke.call_count == 2
+        assert len(result["documents"]) == 2
+        assert result["web_search"] is False
+
+    @patch("graph.context.CONTEXT_TOKEN_BUDGET", 90)
+    @patch("graph.context.token_counter", return_value=lambda text: len(text.split()))
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_batch_retrieval_grader", new_callable=chain_getter)
+    def test_documents_beyond_the_budget_are_graded_one_by_one(self, mock_batch_grader, mock_grader, _):
+        """Test that batch mode grades documents the budget leaves out, matching concurrent mode."""
+        # Setup
+        docs = [Document(page_content=" ".join([word] * 40)) for word in ["rag", "noise", "retrieval"]]
+        mock_batch_grader.invoke.return_value = GradeDocumentsBatch(grades=[
+            DocumentGrade(index=1, binary_score="yes"),
+            DocumentGrade(index=2, binary_score="no"),
+        ])
+        mock_grader.invoke.side_effect = lambda inputs: MagicMock(
+            binary_score="no" if inputs["document"].startswith("noise") else "yes"
+        )
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        with patch("graph.nodes.grade_documents.GRADING_MODE", "concurrent"):
+            concurrent = grade_documents(state)
+        mock_grader.invoke.reset_mock()
+        with patch("graph.nodes.grade_documents.GRADING_MODE", "batch"):
+            batch = grade_documents(state)
+
+        # Assert
+        assert mock_batch_grader.invoke.call_args.args[0]["documents"] == docs[:2]
+        mock_grader.invoke.assert_called_once_with({"question": "What is RAG?", "document": docs[2].page_content})
+        assert batch["documents"] == concurrent["documents"] == [docs[0], docs[2]]
+        assert batch["web_search"] == concurrent["web_search"]
+
+    @patch("graph.prefilter.PREFILTER_ACCEPT", 0.9)
+    @patch("graph.prefilter.PREFILTER_REJECT", 0.0)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_prefilter_skips_confident_documents(self, mock_grader):
+        """Test that only ambiguous documents are graded by the LLM."""
+        # Setup
+        mock_result = MagicMock()
+        mock_result.binary_score = "yes"
+        mock_grader.invoke.return_value = mock_result
+        docs = [
+            Document(page_content="Deep learning uses neural networks."),
+            Document(page_content="A RAG system."),
+            Document(page_content="RAG pipelines retrieve documents."),
+        ]
+        state = GraphState(question="What is a RAG pipeline?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        result = grade_documents(state)
+
+        # Assert
+        mock_grader.invoke.assert_called_once_with({"question": "What is a RAG pipeline?", "document": "A RAG system."})
+        assert [doc.page_content for doc in result["documents"]] == [
+            "A RAG system.", "RAG pipelines retrieve documents."
+        ]
+        assert result["web_search"] is True
+
+
+class TestAsyncGradeDocumentsNode:
+    """Test cases for the async grade_documents node."""
+
+    @patch("graph.nodes.grade_documents.GRADING_CONCURRENCY", 2)
+    @patch("graph.nodes.grade_documents.GRADING_TIMEOUT", 0.1)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    def test_grades_concurrently_with_cap_and_timeout(self, mock_grader):
+        """Test that async grading is capped, bounded and keeps retrieval order."""
+        # Setup
+        running = 0
+        peak = 0
+
+        async def mock_ainvoke(inputs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                if inputs["document"] == "error":
+                    raise ValueError("rate limited")
+                await asyncio.sleep(0.5 if inputs["document"] == "slow" else 0.02)
+            finally:
+                running -= 1
+            result = MagicMock()
+            result.binary_score = "yes"
+            return result
+
+        mock_grader.ainvoke = AsyncMock(side_effect=mock_ainvoke)
+        docs = [Document(page_content=content) for content in ["a", "error", "slow", "b", "c"]]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        start = time.perf_counter()
+        result = asyncio.run(agrade_documents(state))
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert peak == 2
+        assert elapsed < 0.4
+        assert [doc.page_content for doc in result["documents"]] == ["a", "b", "c"]
+        assert result["web_search"] is True
+        mock_grader.invoke.assert_not_called()
+
+    @patch("graph.nodes.grade_documents.GRADING_MODE", "batch")
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_batch_retrieval_grader", new_callable=chain_getter)
+    def test_failed_batch_falls_back_to_per_document(self, mock_batch_grader, mock_grader):
+        """Test that a failed async batch call is retried one document at a time."""
+        # Setup
+        mock_batch_grader.ainvoke = AsyncMock(side_effect=ValueError("malformed output"))
+        mock_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+        docs = [Document(page_content=content) for content in ["a", "b"]]
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        result = asyncio.run(agrade_documents(state))
+
+        # Assert
+        mock_batch_grader.ainvoke.assert_awaited_once()
+        assert mock_grader.ainvoke.await_count == 2
+        assert len(result["documents"]) == 2
+
+    @patch("graph.nodes.grade_documents.GRADING_MODE", "batch")
+    @patch("graph.context.CONTEXT_TOKEN_BUDGET", 90)
+    @patch("graph.context.token_counter", return_value=lambda text: len(text.split()))
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_batch_retrieval_grader", new_callable=chain_getter)
+    def test_documents_beyond_the_budget_are_graded_one_by_one(self, mock_batch_grader, mock_grader, _):
+        """Test that the async batch mode also grades the documents the budget leaves out."""
+        # Setup
+        docs = [Document(page_content=" ".join([word] * 40)) for word in ["rag", "noise", "retrieval"]]
+        mock_batch_grader.ainvoke = AsyncMock(return_value=GradeDocumentsBatch(grades=[
+            DocumentGrade(index=1, binary_score="yes"),
+            DocumentGrade(index=2, binary_score="no"),
+        ]))
+        mock_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+        state = GraphState(question="What is RAG?", generation="", web_search=False, documents=docs)
+
+        # Execute
+        result = asyncio.run(agrade_documents(state))
+
+        # Assert
+        mock_grader.ainvoke.assert_awaited_once_with({"question": "What is RAG?", "document": docs[2].page_content})
+        assert result["documents"] == [docs[0], docs[2]]
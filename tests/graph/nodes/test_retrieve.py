@@ -1,26 +1,29 @@
 """
 Tests for the retrieve node.
 """
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
-from graph.nodes.retrieve import retrieve
+from graph.nodes.retrieve import aretrieve, retrieve
 from graph.state import GraphState
 
 
 class TestRetrieveNode:
     """Test cases for the retrieve node."""
 
-    @patch("graph.nodes.retrieve.retriever")
-    def test_retrieve_structure(self, mock_retriever):
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_retrieve_structure(self, mock_get_retriever):
         """Test the structure of the retrieve function."""
         # Check that retrieve is a function
         assert callable(retrieve)
 
-    @patch("graph.nodes.retrieve.retriever")
-    def test_retrieve_with_question(self, mock_retriever):
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_retrieve_with_question(self, mock_get_retriever):
         """Test retrieve with a question."""
         # Setup
+        mock_retriever = mock_get_retriever.return_value
         mock_retriever.invoke.return_value = ["doc1", "doc2"]
         question = "What is RAG?"
         state = GraphState(question=question, generation="", web_search=False, documents=[])
@@ -35,10 +38,11 @@ class TestRetrieveNode:
         assert result["documents"] == ["doc1", "doc2"]
         mock_retriever.invoke.assert_called_once_with(question)
 
-    @patch("graph.nodes.retrieve.retriever")
-    def test_retrieve_with_empty_question(self, mock_retriever):
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_retrieve_with_empty_question(self, mock_get_retriever):
         """Test retrieve with an empty question."""
         # Setup
+        mock_retriever = mock_get_retriever.return_value
         mock_retriever.invoke.return_value = []
         question = ""
         state = GraphState(question=question, generation="", web_search=False, documents=[])
@@ -52,3 +56,51 @@ class TestRetrieveNode:
         assert result["question"] == ""
         assert result["documents"] == []
         mock_retriever.invoke.assert_called_once_with("")
+
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_aretrieve_uses_async_retriever(self, mock_get_retriever):
+        """Test that the async node awaits the retriever."""
+        # Setup
+        documents = [MagicMock(page_content="RAG is retrieval augmented generation.")]
+        mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=documents)
+
+        # Execute
+        result = asyncio.run(aretrieve({"question": "What is RAG?"}))
+
+        # Assert
+        assert result["documents"] == documents
+        assert result["deadline"] > 0
+        mock_get_retriever.return_value.ainvoke.assert_awaited_once_with("What is RAG?")
+        mock_get_retriever.return_value.invoke.assert_not_called()
+
+    @patch("graph.nodes.retrieve.REQUEST_TIMEOUT", 10.0)
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_budget_starts_before_retrieval(self, mock_get_retriever):
+        """Test that the time spent retrieving counts against the request deadline."""
+        # Setup
+        clock = MagicMock(return_value=100.0)
+
+        def slow_retrieval(question):
+            clock.return_value = 105.0
+            return []
+
+        mock_get_retriever.return_value.invoke.side_effect = slow_retrieval
+
+        # Execute
+        with patch("graph.nodes.retrieve.time.time", clock):
+            result = retrieve({"question": "What is RAG?"})
+
+        # Assert
+        assert result["deadline"] == 110.0
+
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_caller_deadline_is_kept(self, mock_get_retriever):
+        """Test that a deadline passed by the caller is not replaced."""
+        # Setup
+        mock_get_retriever.return_value.invoke.return_value = []
+
+        # Execute
+        result = retrieve({"question": "What is RAG?", "deadline": 42.0})
+
+        # Assert
+        assert result["deadline"] == 42.0
@@ -1,11 +1,13 @@
 """
 Tests for the web_search node.
 """
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from langchain.schema import Document
 
-from graph.nodes.web_search import web_search, web_search_tool
+from graph.nodes.web_search import aweb_search, search_documents, web_search
 from graph.state import GraphState
 
 
@@ -17,14 +19,16 @@ class TestWebSearchNode:
         # Check that web_search is a function
         assert callable(web_search)
 
-        # Check that web_search_tool exists
-        assert web_search_tool is not None
+        # Check that the search is created lazily
+        from graph.search import get_search
+
+        assert callable(get_search)
 
-    @patch("graph.nodes.web_search.web_search_tool")
-    def test_web_search_with_existing_documents(self, mock_tool):
+    @patch("graph.nodes.web_search.get_search")
+    def test_web_search_with_existing_documents(self, mock_search):
         """Test web_search with existing documents."""
         # Setup
-        mock_tool.invoke.return_value = [
+        mock_search.return_value.search.return_value = [
             {"content": "RAG is a technique in AI.", "url": "https://example.com/1"},
             {"content": "RAG combines retrieval with generation.", "url": "https://example.com/2"}
         ]
@@ -40,17 +44,19 @@ class TestWebSearchNode:
         assert "documents" in result
         assert "question" in result
         assert result["question"] == question
-        assert len(result["documents"]) == 2  # Original document + web search results
+        assert len(result["documents"]) == 3  # Original document + one document per result
         assert result["documents"][0].page_content == "RAG is retrieval augmented generation."
-        assert "RAG is a technique in AI." in result["documents"][1].page_content
-        assert "RAG combines retrieval with generation." in result["documents"][1].page_content
-        mock_tool.invoke.assert_called_once_with({"query": question})
+        assert result["documents"][1].page_content == "RAG is a technique in AI."
+        assert result["documents"][1].metadata["source"] == "https://example.com/1"
+        assert result["documents"][2].page_content == "RAG combines retrieval with generation."
+        assert state["documents"] == [doc1]  # The state is not modified
+        mock_search.return_value.search.assert_called_once_with(question)
 
-    @patch("graph.nodes.web_search.web_search_tool")
-    def test_web_search_with_no_documents(self, mock_tool):
+    @patch("graph.nodes.web_search.get_search")
+    def test_web_search_with_no_documents(self, mock_search):
         """Test web_search with no existing documents."""
         # Setup
-        mock_tool.invoke.return_value = [
+        mock_search.return_value.search.return_value = [
             {"content": "RAG is a technique in AI.", "url": "https://example.com/1"},
             {"content": "RAG combines retrieval with generation.", "url": "https://example.com/2"}
         ]
@@ -65,16 +71,15 @@ class TestWebSearchNode:
         assert "documents" in result
         assert "question" in result
         assert result["question"] == question
-        assert len(result["documents"]) == 1  # Only web search results
-        assert "RAG is a technique in AI." in result["documents"][0].page_content
-        assert "RAG combines retrieval with generation." in result["documents"][0].page_content
-        mock_tool.invoke.assert_called_once_with({"query": question})
+        assert len(result["documents"]) == 2  # Only web search results
+        assert [doc.metadata["origin"] for doc in result["documents"]] == ["web_search", "web_search"]
+        mock_search.return_value.search.assert_called_once_with(question)
 
-    @patch("graph.nodes.web_search.web_search_tool")
-    def test_web_search_error_handling(self, mock_tool):
+    @patch("graph.nodes.web_search.get_search")
+    def test_web_search_error_handling(self, mock_search):
         """Test web_search error handling."""
         # Setup
-        mock_tool.invoke.side_effect = Exception("API error")
+        mock_search.return_value.search.side_effect = Exception("API error")
 
         question = "What is RAG?"
         doc1 = Document(page_content="RAG is retrieval augmented generation.")
@@ -89,4 +94,207 @@ class TestWebSearchNode:
         assert result["question"] == question
         assert len(result["documents"]) == 1  # Original document preserved
         assert result["documents"][0].page_content == "RAG is retrieval augmented generation."
-        mock_tool.invoke.assert_called_once_with({"query": question})
+        mock_search.return_value.search.assert_called_once_with(question)
+
+    @patch("graph.nodes.web_search.get_search")
+    def test_aweb_search_uses_async_search(self, mock_search):
+        """Test that the async node awaits the search tool."""
+        # Setup
+        mock_search.return_value.asearch = AsyncMock(
+            return_value=[{"content": "RAG is a technique in AI.", "url": "https://example.com/1"}]
+        )
+        state = GraphState(question="What is RAG?", generation="", web_search=True, documents=[])
+
+        # Execute
+        result = asyncio.run(aweb_search(state))
+
+        # Assert
+        assert len(result["documents"]) == 1
+        assert "RAG is a technique in AI." in result["documents"][0].page_content
+        assert result["web_search_attempts"] == 1
+        mock_search.return_value.asearch.assert_awaited_once_with("What is RAG?")
+        mock_search.return_value.search.assert_not_called()
+
+    @patch("graph.nodes.web_search.get_search")
+    def test_aweb_search_error_handling(self, mock_search):
+        """Test that async search errors keep the original documents."""
+        # Setup
+        mock_search.return_value.asearch = AsyncMock(side_effect=Exception("API error"))
+        doc1 = Document(page_content="RAG is retrieval augmented generation.")
+        state = GraphState(question="What is RAG?", generation="", web_search=True, documents=[doc1])
+
+        # Execute
+        result = asyncio.run(aweb_search(state))
+
+        # Assert
+        assert result["documents"] == [doc1]
+
+
+class TestWebSearchCache:
+    """Test cases for the web search result cache and write-back."""
+
+    RESULTS = [{"content": "RAG is a technique in AI.", "url": "https://example.com/1", "score": 0.9}]
+
+    @patch("graph.nodes.web_search.get_search_cache")
+    @patch("graph.nodes.web_search.get_search")
+    def test_repeated_question_is_served_from_cache(self, mock_search, mock_cache):
+        """Test that a normalized repeat of a question does not search again."""
+        # Setup
+        from ingestion.query_cache import QueryCache
+
+        mock_cache.return_value = QueryCache(maxsize=8, ttl=60)
+        mock_search.return_value.search.return_value = self.RESULTS
+
+        # Execute
+        first = web_search(GraphState(question="What is RAG?", generation="", web_search=True, documents=[]))
+        second = web_search(GraphState(question="  what is  RAG? ", generation="", web_search=True, documents=[]))
+
+        # Assert
+        mock_search.return_value.search.assert_called_once()
+        assert second["documents"][0].page_content == first["documents"][0].page_content
+
+    @patch("graph.nodes.web_search.get_search_cache")
+    @patch("graph.nodes.web_search.get_search")
+    def test_async_node_shares_the_cache(self, mock_search, mock_cache):
+        """Test that results cached by the sync node serve the async node."""
+        # Setup
+        from ingestion.query_cache import QueryCache
+
+        mock_cache.return_value = QueryCache(maxsize=8, ttl=60)
+        mock_search.return_value.search.return_value = self.RESULTS
+        mock_search.return_value.asearch = AsyncMock()
+        web_search(GraphState(question="What is RAG?", generation="", web_search=True, documents=[]))
+
+        # Execute
+        state = GraphState(question="What is RAG?", generation="", web_search=True, documents=[])
+        result = asyncio.run(aweb_search(state))
+
+        # Assert
+        mock_search.return_value.asearch.assert_not_awaited()
+        assert "RAG is a technique in AI." in result["documents"][0].page_content
+
+    @patch("graph.nodes.web_search.get_search_cache")
+    @patch("graph.nodes.web_search.get_search")
+    def test_failed_searches_are_not_cached(self, mock_search, mock_cache):
+        """Test that a failed search is neither used nor cached."""
+        # Setup
+        from ingestion.query_cache import QueryCache
+
+        cache = QueryCache(maxsize=8, ttl=60)
+        mock_cache.return_value = cache
+        mock_search.return_value.search.side_effect = TimeoutError("Web search timed out after 10.0s")
+        doc1 = Document(page_content="RAG is retrieval augmented generation.")
+
+        # Execute
+        result = web_search(GraphState(question="What is RAG?", generation="", web_search=True, documents=[doc1]))
+
+        # Assert
+        assert result["documents"] == [doc1]
+        assert len(cache) == 0
+
+    @patch("graph.nodes.web_search.WEB_WRITE_BACK", True)
+    @patch("graph.nodes.web_search._write_back_executor")
+    @patch("graph.nodes.web_search.get_search")
+    def test_fresh_results_are_written_back(self, mock_search, mock_executor):
+        """Test that write-back is scheduled off the request path for fresh results."""
+        # Setup
+        from graph.nodes.web_search import _write_back
+
+        mock_search.return_value.search.return_value = self.RESULTS
+
+        # Execute
+        web_search(GraphState(question="What is RAG?", generation="", web_search=True, documents=[]))
+
+        # Assert
+        mock_executor.return_value.submit.assert_called_once_with(_write_back, self.RESULTS)
+
+    @patch("graph.nodes.web_search._write_back_executor")
+    @patch("graph.nodes.web_search.get_search")
+    def test_write_back_is_off_by_default(self, mock_search, mock_executor):
+        """Test that nothing is written back unless enabled."""
+        # Setup
+        mock_search.return_value.search.return_value = self.RESULTS
+
+        # Execute
+        web_search(GraphState(question="What is RAG?", generation="", web_search=True, documents=[]))
+
+        # Assert
+        mock_executor.assert_not_called()
+
+    @patch("ingestion.write_back_web_results", side_effect=Exception("disk full"))
+    def test_write_back_failure_is_logged(self, mock_write_back):
+        """Test that a failed write-back does not raise in the worker."""
+        # Setup
+        from graph.nodes.web_search import _write_back
+
+        # Execute
+        _write_back(self.RESULTS)
+
+        # Assert
+        mock_write_back.assert_called_once()
+
+
+class TestSearchDocuments:
+    """Test cases for turning search results into context documents."""
+
+    QUESTION = "How does retrieval-augmented generation work?"
+
+    def test_duplicates_of_retrieved_chunks_are_dropped(self):
+        """Test that results whose text is already in the context are skipped."""
+        # Setup
+        chunk = Document(
+            page_content="Retrieval-augmented generation  retrieves documents and then generates an answer."
+        )
+        results = [
+            {"url": "https://example.com/dup", "content": "retrieval-augmented generation retrieves documents"},
+            {
+                "url": "https://example.com/new",
+                "content": "Retrieval-augmented generation grounds generation in sources.",
+            },
+        ]
+
+        # Execute
+        docs = search_documents(self.QUESTION, [chunk], results)
+
+        # Assert
+        assert [doc.metadata["source"] for doc in docs] == ["https://example.com/new"]
+
+    def test_pages_from_earlier_searches_are_dropped(self):
+        """Test that a second search does not add the same pages again."""
+        # Setup
+        results = [{"url": "https://example.com/1", "content": "Retrieval-augmented generation explained."}]
+        first = search_documents(self.QUESTION, [], results)
+
+        # Execute
+        updated = [{**results[0], "content": "Updated text on retrieval-augmented generation."}]
+        second = search_documents(self.QUESTION, first, updated)
+
+        # Assert
+        assert len(first) == 1
+        assert second == []
+
+    def test_results_are_scored_and_trimmed(self):
+        """Test that irrelevant results are dropped and the best ones kept in score order."""
+        # Setup
+        results = [
+            {"url": "https://example.com/partial", "title": "Generation", "content": "Text generation."},
+            {"url": "https://example.com/football", "content": "Football is a team sport."},
+            {"url": "https://example.com/full", "content": "How retrieval-augmented generation works.", "score": 0.8},
+            {"url": "https://example.com/also", "content": "Retrieval-augmented generation, how it works."},
+        ]
+
+        # Execute
+        docs = search_documents(self.QUESTION, [], results, max_results=2, min_score=0.2)
+
+        # Assert
+        assert [doc.metadata["source"] for doc in docs] == ["https://example.com/full", "https://example.com/also"]
+        assert docs[0].metadata["relevance"] == 1.0
+        assert docs[0].metadata["search_score"] == 0.8
+
+    def test_empty_results_add_nothing(self):
+        """Test that results without content are ignored."""
+        # Execute
+        docs = search_documents(self.QUESTION, None, [{"url": "https://example.com", "content": ""}])
+
+        # Assert
+        assert docs == []
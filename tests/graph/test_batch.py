@@ -0,0 +1,142 @@
+"""
+Tests for batch answering of questions from a file.
+"""
+import asyncio
+import json
+
+import pytest
+from langchain.schema import Document
+
+from graph.batch import completed_ids, read_questions, run_batch
+
+
+class FakeApp:
+    """Compiled-workflow stand-in answering after a per-question delay."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.asked = []
+        self.running = 0
+        self.peak = 0
+
+    async def ainvoke(self, inputs):
+        question = inputs["question"]
+        self.asked.append(question)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(question, 0.01))
+            if question in self.failing:
+                raise ValueError("rate limited")
+        finally:
+            self.running -= 1
+        return {
+            "generation": f"Answer to {question}",
+            "documents": [Document(page_content="x", metadata={"source": "doc"})],
+        }
+
+
+def read_output(path):
+    """Read the records of a results file."""
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestReadQuestions:
+    """Test cases for reading batch inputs."""
+
+    def test_jsonl_with_and_without_ids(self, tmp_path):
+        """Test that rows without an ID are numbered by position."""
+        # Setup
+        path = tmp_path / "questions.jsonl"
+        path.write_text('{"id": "a", "question": "What is RAG?"}\n\n{"question": "What is BM25?"}\n')
+
+        # Execute
+        questions = read_questions(str(path))
+
+        # Assert
+        assert questions == [("a", "What is RAG?"), ("2", "What is BM25?")]
+
+    def test_csv(self, tmp_path):
+        """Test that CSV files are read by column name."""
+        # Setup
+        path = tmp_path / "questions.csv"
+        path.write_text('id,question\n7,"What is RAG, really?"\n')
+
+        # Execute
+        questions = read_questions(str(path))
+
+        # Assert
+        assert questions == [("7", "What is RAG, really?")]
+
+
+class TestRunBatch:
+    """Test cases for running a batch."""
+
+    def test_results_are_written_in_completion_order(self, tmp_path):
+        """Test that a fast question is written before a slow one asked earlier."""
+        # Setup
+        app = FakeApp(delays={"slow": 0.2, "fast": 0.01})
+        output = tmp_path / "results.jsonl"
+
+        # Execute
+        summary = asyncio.run(run_batch([("1", "slow"), ("2", "fast")], str(output), concurrency=2, app=app))
+
+        # Assert
+        records = read_output(output)
+        assert [record["id"] for record in records] == ["2", "1"]
+        assert records[0]["generation"] == "Answer to fast"
+        assert records[0]["verdict"] == "useful"
+        assert records[0]["sources"] == ["doc"]
+        assert summary["answered"] == 2
+        assert summary["latency_p95_s"] >= 0.2
+
+    def test_concurrency_is_capped(self, tmp_path):
+        """Test that no more than the configured number of questions run at once."""
+        # Setup
+        app = FakeApp()
+        questions = [(str(i), f"q{i}") for i in range(10)]
+
+        # Execute
+        summary = asyncio.run(run_batch(questions, str(tmp_path / "results.jsonl"), concurrency=3, app=app))
+
+        # Assert
+        assert app.peak == 3
+        assert summary["concurrency"] == 3
+        assert summary["throughput_qps"] > 0
+
+    def test_resume_skips_done_and_retries_failed(self, tmp_path):
+        """Test that a rerun only asks unanswered and failed questions."""
+        # Setup
+        output = tmp_path / "results.jsonl"
+        questions = [("1", "q1"), ("2", "q2"), ("3", "q3")]
+        asyncio.run(run_batch(questions, str(output), app=FakeApp(failing={"q2"})))
+        # An interrupted run may leave a partial last line
+        with open(output, "a") as f:
+            f.write('{"id": "3", "gener')
+        rerun = FakeApp()
+
+        # Execute
+        summary = asyncio.run(run_batch(questions, str(output), app=rerun))
+
+        # Assert
+        assert rerun.asked == ["q2"]
+        assert summary["skipped"] == 2
+        assert summary["answered"] == 1
+        assert completed_ids(str(output)) == {"1", "2", "3"}
+
+    def test_failures_are_recorded(self, tmp_path):
+        """Test that a failing question is recorded and counted without stopping the batch."""
+        # Setup
+        output = tmp_path / "results.jsonl"
+
+        # Execute
+        summary = asyncio.run(run_batch([("1", "q1"), ("2", "q2")], str(output), app=FakeApp(failing={"q1"})))
+
+        # Assert
+        records = {record["id"]: record for record in read_output(output)}
+        assert records["1"]["error"] == "rate limited"
+        assert records["2"]["generation"] == "Answer to q2"
+        assert summary["failed"] == 1
+        assert summary["answered"] == 1
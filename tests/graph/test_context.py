@@ -0,0 +1,104 @@
+"""
+Tests for the token-budgeted context formatter.
+"""
+import pytest
+from unittest.mock import patch
+from langchain.schema import Document
+
+from graph.chains.generation import get_generation_chain
+from graph.chains.hallucination_grader import get_hallucination_grader
+from graph.context import fitting_documents, pack_context, render_document
+
+
+def count_words(text):
+    """Count whitespace-separated words as tokens."""
+    return len(text.split())
+
+
+class TestPackContext:
+    """Test cases for pack_context."""
+
+    def test_renders_compact_numbered_blocks(self):
+        """Test that documents render as numbered blocks with their source only."""
+        # Setup
+        documents = [
+            Document(page_content="RAG  retrieves\n\n documents.", metadata={"source": "https://a", "title": "A"}),
+            Document(page_content="It then generates."),
+        ]
+
+        # Execute
+        context = pack_context(documents, max_tokens=100, length_function=count_words)
+
+        # Assert
+        assert context == "[1] (https://a) RAG retrieves documents.\n\n[2] It then generates."
+
+    def test_fills_budget_in_relevance_order(self):
+        """Test that the document crossing the budget is cut and later ones dropped."""
+        # Setup
+        documents = [Document(page_content=" ".join(["word"] * 40)) for _ in range(3)]
+
+        # Execute
+        context = pack_context(documents, max_tokens=80, length_function=count_words)
+
+        # Assert
+        blocks = context.split("\n\n")
+        assert len(blocks) == 2
+        assert blocks[0].startswith("[1] ")
+        assert blocks[1].startswith("[2] ")
+        assert count_words(context) <= 80
+
+    def test_fitting_documents_are_packed_uncut(self):
+        """Test that the documents counted as fitting are exactly those packed in full."""
+        # Setup
+        documents = [Document(page_content=" ".join(["word"] * 40)) for _ in range(3)]
+
+        # Execute
+        fitting = fitting_documents(documents, max_tokens=90, length_function=count_words)
+
+        # Assert
+        assert fitting == 2
+        assert pack_context(documents[:fitting], max_tokens=90, length_function=count_words) == "\n\n".join(
+            render_document(doc, number) for number, doc in enumerate(documents[:2], start=1)
+        )
+        assert fitting_documents(documents, max_tokens=10, length_function=count_words) == 0
+        assert fitting_documents([], max_tokens=10, length_function=count_words) == 0
+
+    def test_small_remainder_is_not_filled(self):
+        """Test that a sliver of budget does not get a truncated block."""
+        # Setup
+        documents = [Document(page_content=" ".join(["word"] * 70)), Document(page_content=" ".join(["more"] * 20))]
+
+        # Execute
+        context = pack_context(documents, max_tokens=80, length_function=count_words)
+
+        # Assert
+        assert context == render_document(documents[0], 1)
+
+    def test_strings_and_empty_inputs(self):
+        """Test that a rendered context passes through and no documents give no context."""
+        # Execute & Assert
+        assert pack_context("already rendered", length_function=count_words) == "already rendered"
+        assert pack_context([], length_function=count_words) == ""
+        assert pack_context(None, length_function=count_words) == ""
+
+
+class TestChainsPackContext:
+    """Test cases for the chains using the shared context formatter."""
+
+    @patch("graph.context.token_counter", return_value=count_words)
+    def test_generation_and_grounding_see_the_same_context(self, mock_token_counter):
+        """Test that generation and hallucination grading render documents identically."""
+        # Setup
+        documents = [Document(page_content="RAG is retrieval augmented generation.", metadata={"source": "s"})]
+
+        generation_chain = get_generation_chain()
+        hallucination_grader = get_hallucination_grader()
+
+        # Execute
+        generation_inputs = generation_chain.first.invoke({"context": documents, "question": "What is RAG?"})
+        grading_inputs = hallucination_grader.first.invoke({"documents": documents, "generation": "RAG."})
+
+        # Assert
+        assert generation_inputs["context"] == "[1] (s) RAG is retrieval augmented generation."
+        assert grading_inputs["documents"] == generation_inputs["context"]
+        assert "Document(" not in generation_chain.first.invoke({"context": documents, "question": "q"})["context"]
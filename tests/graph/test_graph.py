@@ -1,12 +1,23 @@
 """
 Tests for the graph module.
 """
+import asyncio
+import threading
+import time
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
-from graph.graph import decide_to_generate, grade_generation_grounded_in_documents_and_question, create_workflow, app
+from graph.graph import (
+    agrade_generation_grounded_in_documents_and_question,
+    decide_to_generate,
+    grade_generation_grounded_in_documents_and_question,
+    create_workflow,
+    app,
+)
 from graph.state import GraphState
 from graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
+from tests.mocks import chain_getter
 
 
 class TestGraph:
@@ -34,7 +45,7 @@ class TestGraph:
         # Assert
         assert result == GENERATE
 
-    @patch("graph.graph.hallucination_grader")
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
     def test_grade_generation_grounded(self, mock_hallucination_grader):
         """Test grade_generation_grounded_in_documents_and_question when generation is grounded."""
         # Setup
@@ -43,7 +54,7 @@ class TestGraph:
         mock_hallucination_grader.invoke.return_value = mock_result
 
         # Setup for answer_grader
-        with patch("graph.graph.answer_grader") as mock_answer_grader:
+        with patch("graph.graph.get_answer_grader", new_callable=chain_getter) as mock_answer_grader:
             mock_answer_result = MagicMock()
             mock_answer_result.binary_score = True
             mock_answer_grader.invoke.return_value = mock_answer_result
@@ -64,7 +75,7 @@ class TestGraph:
             mock_hallucination_grader.invoke.assert_called_once()
             mock_answer_grader.invoke.assert_called_once()
 
-    @patch("graph.graph.hallucination_grader")
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
     def test_grade_generation_not_grounded(self, mock_hallucination_grader):
         """Test grade_generation_grounded_in_documents_and_question when generation is not grounded."""
         # Setup
@@ -87,7 +98,7 @@ class TestGraph:
         assert result == "not supported"
         mock_hallucination_grader.invoke.assert_called_once()
 
-    @patch("graph.graph.hallucination_grader")
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
     def test_grade_generation_not_addressing_question(self, mock_hallucination_grader):
         """Test grade_generation_grounded_in_documents_and_question when generation doesn't address question."""
         # Setup
@@ -96,7 +107,7 @@ class TestGraph:
         mock_hallucination_grader.invoke.return_value = mock_result
 
         # Setup for answer_grader
-        with patch("graph.graph.answer_grader") as mock_answer_grader:
+        with patch("graph.graph.get_answer_grader", new_callable=chain_getter) as mock_answer_grader:
             mock_answer_result = MagicMock()
             mock_answer_result.binary_score = False
             mock_answer_grader.invoke.return_value = mock_answer_result
@@ -117,6 +128,261 @@ class TestGraph:
             mock_hallucination_grader.invoke.assert_called_once()
             mock_answer_grader.invoke.assert_called_once()
 
+    @pytest.mark.parametrize(
+        "grounded, addresses, expected",
+        [(True, True, "useful"), (True, False, "not useful"), (False, True, "not supported")],
+    )
+    @patch("graph.graph.GENERATION_CHECK_MODE", "parallel")
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_parallel_generation_check_routing(
+        self, mock_hallucination_grader, mock_answer_grader, grounded, addresses, expected
+    ):
+        """Test that the parallel check routes exactly like the sequential one."""
+        # Setup
+        mock_hallucination_grader.invoke.return_value = MagicMock(binary_score=grounded)
+        mock_answer_grader.invoke.return_value = MagicMock(binary_score=addresses)
+        state = GraphState(question="What is RAG?", generation="RAG is RAG.", web_search=False, documents=["doc"])
+
+        # Execute
+        result = grade_generation_grounded_in_documents_and_question(state)
+
+        # Assert
+        assert result == expected
+        mock_hallucination_grader.invoke.assert_called_once_with({"documents": ["doc"], "generation": "RAG is RAG."})
+
+    @patch("graph.graph.GENERATION_CHECK_MODE", "parallel")
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_parallel_generation_check_overlaps_graders(self, mock_hallucination_grader, mock_answer_grader):
+        """Test that both graders run at the same time in parallel mode."""
+        # Setup
+        both_running = threading.Barrier(2, timeout=1)
+
+        def grade(inputs):
+            # Fails with BrokenBarrierError unless the other grader runs concurrently
+            both_running.wait()
+            time.sleep(0.1)
+            return MagicMock(binary_score=True)
+
+        mock_hallucination_grader.invoke.side_effect = grade
+        mock_answer_grader.invoke.side_effect = grade
+        state = GraphState(question="What is RAG?", generation="RAG is RAG.", web_search=False, documents=["doc"])
+
+        # Execute
+        start = time.perf_counter()
+        result = grade_generation_grounded_in_documents_and_question(state)
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert result == "useful"
+        assert elapsed < 0.2
+
+    @pytest.mark.parametrize(
+        "grounded, addresses, expected",
+        [(True, True, "useful"), (True, False, "not useful"), (False, True, "not supported")],
+    )
+    @patch("graph.graph.GENERATION_CHECK_MODE", "combined")
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_reflection_grader", new_callable=chain_getter)
+    def test_combined_generation_check(
+        self, mock_reflection_grader, mock_hallucination_grader, mock_answer_grader, grounded, addresses, expected
+    ):
+        """Test that the combined check routes on a single grader call."""
+        # Setup
+        mock_reflection_grader.invoke.return_value = MagicMock(grounded=grounded, answers_question=addresses)
+        state = GraphState(question="What is RAG?", generation="RAG is RAG.", web_search=False, documents=["doc"])
+
+        # Execute
+        result = grade_generation_grounded_in_documents_and_question(state)
+
+        # Assert
+        assert result == expected
+        mock_reflection_grader.invoke.assert_called_once_with(
+            {"documents": ["doc"], "question": "What is RAG?", "generation": "RAG is RAG."}
+        )
+        mock_hallucination_grader.invoke.assert_not_called()
+        mock_answer_grader.invoke.assert_not_called()
+
+    def test_decide_to_generate_skips_web_search_when_budget_exhausted(self):
+        """Test that no more web searches run once the budget is used up."""
+        # Execute & Assert
+        assert decide_to_generate({"web_search": True, "web_search_attempts": 2}) == GENERATE
+        assert decide_to_generate({"web_search": True, "deadline": time.time() - 1}) == GENERATE
+        assert decide_to_generate({"web_search": True, "deadline": time.time() + 60}) == WEBSEARCH
+
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_ungrounded_generation_stops_at_max_generations(self, mock_hallucination_grader):
+        """Test that an ungrounded answer is not regenerated forever."""
+        # Setup
+        mock_hallucination_grader.invoke.return_value = MagicMock(binary_score=False)
+        state = GraphState(question="What is RAG?", generation="Made up.", web_search=False, documents=["doc"])
+
+        # Execute & Assert
+        route = grade_generation_grounded_in_documents_and_question
+        assert route({**state, "generation_attempts": 2}) == "not supported"
+        assert route({**state, "generation_attempts": 3}) == "budget exhausted"
+
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_unhelpful_generation_stops_at_max_web_searches(self, mock_hallucination_grader, mock_answer_grader):
+        """Test that the web search cycle is bounded."""
+        # Setup
+        mock_hallucination_grader.invoke.return_value = MagicMock(binary_score=True)
+        mock_answer_grader.invoke.return_value = MagicMock(binary_score=False)
+        state = GraphState(question="What is RAG?", generation="Off topic.", web_search=False, documents=["doc"])
+
+        # Execute & Assert
+        route = grade_generation_grounded_in_documents_and_question
+        assert route({**state, "web_search_attempts": 1}) == "not useful"
+        assert route({**state, "web_search_attempts": 2}) == "budget exhausted"
+
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_deadline_skips_generation_check(self, mock_hallucination_grader):
+        """Test that an answer past the deadline is returned without grading."""
+        # Setup
+        state = GraphState(question="What is RAG?", generation="RAG.", web_search=False, documents=["doc"])
+
+        # Execute
+        result = grade_generation_grounded_in_documents_and_question({**state, "deadline": time.time() - 1})
+
+        # Assert
+        assert result == "budget exhausted"
+        mock_hallucination_grader.invoke.assert_not_called()
+
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_workflow_returns_flagged_answer_when_budget_exhausted(
+        self, mock_get_retriever, mock_retrieval_grader, mock_generation_chain, mock_hallucination_grader
+    ):
+        """Test that a persistently ungrounded answer ends the run, flagged."""
+        # Setup
+        mock_get_retriever.return_value.invoke.return_value = [MagicMock(page_content="RAG is RAG.")]
+        mock_retrieval_grader.invoke.return_value = MagicMock(binary_score="yes")
+        mock_generation_chain.invoke.return_value = "Made up."
+        mock_hallucination_grader.invoke.return_value = MagicMock(binary_score=False)
+
+        # Execute
+        result = create_workflow().compile().invoke({"question": "What is RAG?"})
+
+        # Assert
+        assert result["budget_exhausted"] is True
+        assert result["generation"] == "Made up."
+        assert result["generation_attempts"] == 3
+        assert mock_generation_chain.invoke.call_count == 3
+
+    @pytest.mark.parametrize("mode", ["sequential", "parallel", "combined"])
+    @pytest.mark.parametrize(
+        "grounded, addresses, expected",
+        [(True, True, "useful"), (True, False, "not useful"), (False, True, "not supported")],
+    )
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_reflection_grader", new_callable=chain_getter)
+    def test_async_generation_check_routing(
+        self, mock_reflection_grader, mock_hallucination_grader, mock_answer_grader, grounded, addresses, expected, mode
+    ):
+        """Test that the async check routes like the sync one in every mode."""
+        # Setup
+        mock_reflection_grader.ainvoke = AsyncMock(
+            return_value=MagicMock(grounded=grounded, answers_question=addresses)
+        )
+        mock_hallucination_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score=grounded))
+        mock_answer_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score=addresses))
+        state = GraphState(question="What is RAG?", generation="RAG is RAG.", web_search=False, documents=["doc"])
+
+        # Execute
+        with patch("graph.graph.GENERATION_CHECK_MODE", mode):
+            result = asyncio.run(agrade_generation_grounded_in_documents_and_question(state))
+
+        # Assert
+        assert result == expected
+        mock_hallucination_grader.invoke.assert_not_called()
+        mock_answer_grader.invoke.assert_not_called()
+        mock_reflection_grader.invoke.assert_not_called()
+
+    @patch("graph.graph.GENERATION_CHECK_MODE", "parallel")
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_async_parallel_check_cancels_unneeded_answer_grade(self, mock_hallucination_grader, mock_answer_grader):
+        """Test that the speculative answer grade is cancelled for ungrounded answers."""
+        # Setup
+        cancelled = False
+
+        async def slow_answer_grade(inputs):
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        async def hallucination_grade(inputs):
+            await asyncio.sleep(0.01)
+            return MagicMock(binary_score=False)
+
+        async def check(state):
+            result = await agrade_generation_grounded_in_documents_and_question(state)
+            await asyncio.sleep(0)
+            return result
+
+        mock_hallucination_grader.ainvoke = hallucination_grade
+        mock_answer_grader.ainvoke = slow_answer_grade
+        state = GraphState(question="What is RAG?", generation="Made up.", web_search=False, documents=["doc"])
+
+        # Execute
+        result = asyncio.run(check(state))
+
+        # Assert
+        assert result == "not supported"
+        assert cancelled
+
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.nodes.generate.get_generation_chain", new_callable=chain_getter)
+    @patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter)
+    @patch("graph.nodes.retrieve.get_retriever")
+    def test_async_workflow_serves_questions_concurrently(
+        self,
+        mock_get_retriever,
+        mock_retrieval_grader,
+        mock_generation_chain,
+        mock_answer_grader,
+        mock_hallucination_grader,
+    ):
+        """Test that one event loop runs many questions at once without sync calls."""
+        # Setup
+        async def generate(inputs):
+            await asyncio.sleep(0.2)
+            return f"Answer to {inputs['question']}"
+
+        mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=[MagicMock(page_content="RAG is RAG.")])
+        mock_retrieval_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+        mock_generation_chain.ainvoke = generate
+        mock_hallucination_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score=True))
+        mock_answer_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score=True))
+        workflow = create_workflow().compile()
+        questions = [f"Question {i}" for i in range(50)]
+
+        async def run_all():
+            return await asyncio.gather(*(workflow.ainvoke({"question": q}) for q in questions))
+
+        # Execute
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert [result["generation"] for result in results] == [f"Answer to {q}" for q in questions]
+        assert elapsed < 2
+        mock_get_retriever.return_value.invoke.assert_not_called()
+        mock_retrieval_grader.invoke.assert_not_called()
+        mock_generation_chain.invoke.assert_not_called()
+        mock_hallucination_grader.invoke.assert_not_called()
+
     def test_create_workflow(self):
         """Test create_workflow function."""
         # Execute
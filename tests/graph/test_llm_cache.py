@@ -0,0 +1,108 @@
+"""
+Tests for the persistent LLM response cache.
+"""
+import asyncio
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from graph.llm_cache import SQLiteLLMCache, bypassed, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an empty cache holding at most three responses."""
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite3"), max_entries=3)
+    yield cache
+    cache.close()
+
+
+def response(text):
+    """Build the generations of a chat model response."""
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+class TestSQLiteLLMCache:
+    """Test cases for the SQLite LLM cache."""
+
+    def test_key_depends_on_model_and_prompt(self):
+        """Test that the key changes with the model string and the prompt."""
+        # Execute & Assert
+        assert cache_key("prompt", "gpt-4o temperature=0") == cache_key("prompt", "gpt-4o temperature=0")
+        assert cache_key("prompt", "gpt-4o temperature=0") != cache_key("prompt", "gpt-4o temperature=1")
+        assert cache_key("prompt", "gpt-4o") != cache_key("other prompt", "gpt-4o")
+
+    def test_round_trip_and_metrics(self, cache):
+        """Test that a stored response is served back and counted."""
+        # Setup
+        cache.update("prompt", "model", response("answer"))
+
+        # Execute
+        hit = cache.lookup("prompt", "model")
+        miss = cache.lookup("prompt", "other model")
+
+        # Assert
+        assert hit[0].message.content == "answer"
+        assert miss is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "evictions": 0, "entries": 1}
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that responses survive reopening the cache."""
+        # Setup
+        path = str(tmp_path / "llm.sqlite3")
+        first = SQLiteLLMCache(path)
+        first.update("prompt", "model", response("answer"))
+        first.close()
+
+        # Execute
+        second = SQLiteLLMCache(path)
+
+        # Assert
+        assert second.lookup("prompt", "model")[0].text == "answer"
+        second.close()
+
+    def test_least_recently_used_is_evicted(self, cache):
+        """Test that the size bound evicts the response unused for longest."""
+        # Setup
+        for prompt in ["a", "b", "c"]:
+            cache.update(prompt, "model", response(prompt))
+        cache.lookup("a", "model")
+
+        # Execute
+        cache.update("d", "model", response("d"))
+
+        # Assert
+        assert cache.stats()["entries"] == 3
+        assert cache.lookup("b", "model") is None
+        assert cache.lookup("a", "model") is not None
+        assert cache.evictions == 1
+
+    def test_bypass(self, cache):
+        """Test that a bypassed or disabled cache neither serves nor stores."""
+        # Setup
+        cache.update("prompt", "model", response("answer"))
+
+        # Execute & Assert
+        with bypassed():
+            assert cache.lookup("prompt", "model") is None
+            cache.update("other", "model", response("other"))
+        assert cache.lookup("other", "model") is None
+        cache.enabled = False
+        assert cache.lookup("prompt", "model") is None
+
+    def test_serves_chat_models(self, cache):
+        """Test that a chat model's identical second call is answered from the cache."""
+        # Setup
+        llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+        # Execute
+        first = llm.invoke("What is RAG?")
+        repeated = asyncio.run(llm.ainvoke("What is RAG?"))
+        other = llm.invoke("What is BM25?")
+
+        # Assert
+        assert first.content == repeated.content == "first"
+        assert other.content == "second"
+        assert cache.hits == 1
@@ -0,0 +1,98 @@
+"""
+Tests for the relevance pre-filter.
+"""
+import json
+
+import pytest
+from unittest.mock import patch
+from langchain.schema import Document
+
+from graph.prefilter import (
+    PrefilterStats,
+    calibrate,
+    content_terms,
+    log_grades,
+    overlap_score,
+    prefilter,
+    read_grade_log,
+)
+
+
+class TestPrefilter:
+    """Test cases for the relevance pre-filter."""
+
+    def test_content_terms_drop_stop_words(self):
+        """Test that only topical terms are kept."""
+        assert content_terms("What is the RAG pipeline?") == {"rag", "pipeline"}
+
+    def test_overlap_score(self):
+        """Test the share of question terms found in a document."""
+        assert overlap_score("What is RAG pipeline?", "A RAG system.") == 0.5
+        assert overlap_score("What is RAG?", "Deep learning.") == 0.0
+        assert overlap_score("What is it?", "Anything.") is None
+
+    def test_without_thresholds_everything_is_ambiguous(self):
+        """Test that the pre-filter is off until thresholds are configured."""
+        # Execute
+        verdicts, scores = prefilter("What is RAG?", [Document(page_content="RAG is great.")])
+
+        # Assert
+        assert verdicts == [None]
+        assert scores == [1.0]
+
+    def test_confident_cases_are_decided(self):
+        """Test that clear hits and misses skip LLM grading."""
+        # Setup
+        docs = [
+            Document(page_content="RAG pipelines retrieve documents."),
+            Document(page_content="A RAG system."),
+            Document(page_content="Deep learning uses neural networks."),
+        ]
+
+        # Execute
+        with patch("graph.prefilter.stats", PrefilterStats()) as stats, \
+                patch("graph.prefilter.record_prefilter") as mock_record:
+            verdicts, _ = prefilter("What is a RAG pipeline?", docs, accept=0.9, reject=0.1)
+
+        # Assert
+        assert verdicts == [True, None, False]
+        assert stats.as_dict() == {"accepted": 1, "rejected": 1, "graded": 1, "llm_calls_saved": 2}
+        mock_record.assert_called_once_with(accepted=1, rejected=1, graded=1)
+
+    def test_log_grades(self, tmp_path):
+        """Test that LLM grades are logged with their scores."""
+        # Setup
+        path = str(tmp_path / "grades.jsonl")
+
+        # Execute
+        with patch("graph.prefilter.GRADE_LOG_PATH", path):
+            log_grades("What is RAG?", [0.5, None, 1.0], [False, True, True])
+
+        # Assert
+        assert read_grade_log(path) == [(0.5, False), (1.0, True)]
+        assert json.loads(open(path).readline())["question"] == "What is RAG?"
+
+    def test_calibrate(self):
+        """Test that thresholds isolate the confident score bands."""
+        # Setup
+        samples = [(0.0, False)] * 30 + [(0.0, True)] + [(0.5, True)] * 10 + [(0.5, False)] * 10 + [(1.0, True)] * 30
+
+        # Execute
+        result = calibrate(samples, precision=0.95, min_samples=20)
+
+        # Assert
+        assert result["accept"] == 1.0
+        assert result["reject"] == 0.0
+        assert result["accept_precision"] == 1.0
+        assert result["reject_precision"] == pytest.approx(30 / 31)
+        assert result["llm_calls_saved_share"] == pytest.approx(61 / 81)
+
+    def test_calibrate_requires_support(self):
+        """Test that thresholds backed by too few grades stay unset."""
+        # Execute
+        result = calibrate([(1.0, True)] * 5 + [(0.0, False)] * 5, min_samples=20)
+
+        # Assert
+        assert result["accept"] is None
+        assert result["reject"] is None
+        assert result["llm_calls_saved_share"] == 0.0
@@ -0,0 +1,341 @@
+"""
+Tests for the web search providers, hedging and circuit breaker.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from graph.search import (
+    CircuitBreaker,
+    HedgedSearch,
+    LocalCorpusProvider,
+    SearchProvider,
+    SearchUnavailable,
+    TavilyProvider,
+    create_provider,
+)
+
+CORPUS = [
+    {"title": "Retrieval-augmented generation", "url": "https://en.wikipedia.org/wiki/RAG",
+     "content": "Retrieval-augmented generation grounds language model answers in retrieved documents."},
+    {"title": "Prompt engineering", "url": "https://en.wikipedia.org/wiki/Prompt_engineering",
+     "content": "Prompt engineering structures instructions for language models."},
+    {"title": "Football", "url": "https://en.wikipedia.org/wiki/Football",
+     "content": "Football is a family of team sports."},
+]
+
+
+class ScriptedProvider(SearchProvider):
+    """Provider whose successive calls take the given seconds, or raise the given exceptions."""
+
+    name = "scripted"
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+
+    def _next(self):
+        step = self.steps[min(self.calls, len(self.steps) - 1)]
+        self.calls += 1
+        return step
+
+    def _result(self, step):
+        if isinstance(step, Exception):
+            raise step
+        return [{"url": f"https://example.com/{step}", "content": f"took {step}s", "score": 1.0}]
+
+    def search(self, query):
+        step = self._next()
+        if not isinstance(step, Exception):
+            time.sleep(step)
+        return self._result(step)
+
+    async def asearch(self, query):
+        step = self._next()
+        if not isinstance(step, Exception):
+            await asyncio.sleep(step)
+        return self._result(step)
+
+
+def hedged(provider, timeout=1.0, samples=(0.01,), **kwargs):
+    """A hedged search that already observed ``samples`` latencies."""
+    search = HedgedSearch(provider, timeout=timeout, hedge_quantile=0.95, hedge_min_samples=len(samples), **kwargs)
+    for latency in samples:
+        search._observe(latency)
+    return search
+
+
+class TestSearchProvider:
+    """Test cases for the provider interface."""
+
+    def test_search_must_be_implemented(self):
+        """Test that a provider without search cannot be created."""
+        # Setup
+        class Incomplete(SearchProvider):
+            name = "incomplete"
+
+        # Execute & Assert
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestLocalCorpusProvider:
+    """Test cases for the offline search provider."""
+
+    def test_results_are_ranked_by_overlap(self):
+        """Test that matching documents come first, in Tavily format."""
+        # Setup
+        provider = LocalCorpusProvider(CORPUS, k=2)
+
+        # Execute
+        results = provider.search("How does retrieval-augmented generation ground answers?")
+
+        # Assert
+        assert results[0]["url"] == "https://en.wikipedia.org/wiki/RAG"
+        assert set(results[0]) == {"title", "url", "content", "score"}
+        assert len(results) <= 2
+        assert all(result["url"] != "https://en.wikipedia.org/wiki/Football" for result in results)
+
+    def test_no_match_returns_nothing(self):
+        """Test that unrelated queries find nothing."""
+        # Execute
+        results = asyncio.run(LocalCorpusProvider(CORPUS).asearch("quantum chromodynamics"))
+
+        # Assert
+        assert results == []
+
+    def test_corpus_is_read_from_jsonl(self, tmp_path):
+        """Test loading the corpus from a JSONL file."""
+        # Setup
+        path = tmp_path / "corpus.jsonl"
+        path.write_text("\n".join(json.dumps(doc) for doc in CORPUS) + "\n")
+
+        # Execute
+        provider = LocalCorpusProvider.from_jsonl(str(path), k=1)
+
+        # Assert
+        assert len(provider.documents) == 3
+        assert provider.search("team sports")[0]["title"] == "Football"
+
+
+class TestTavilyProvider:
+    """Test cases for the Tavily provider."""
+
+    def test_error_strings_are_raised(self):
+        """Test that errors the tool returns as strings become exceptions."""
+        # Setup
+        tool = MagicMock()
+        tool.invoke.return_value = "HTTPError('429 Client Error')"
+        tool.ainvoke = AsyncMock(return_value="HTTPError('429 Client Error')")
+        provider = TavilyProvider(tool=tool)
+
+        # Execute & Assert
+        with pytest.raises(RuntimeError):
+            provider.search("What is RAG?")
+        with pytest.raises(RuntimeError):
+            asyncio.run(provider.asearch("What is RAG?"))
+
+    def test_results_are_passed_through(self):
+        """Test that result lists are returned as they are."""
+        # Setup
+        tool = MagicMock()
+        tool.invoke.return_value = [{"url": "https://example.com", "content": "RAG"}]
+
+        # Execute
+        results = TavilyProvider(tool=tool).search("What is RAG?")
+
+        # Assert
+        assert results == [{"url": "https://example.com", "content": "RAG"}]
+        tool.invoke.assert_called_once_with({"query": "What is RAG?"})
+
+
+class TestCircuitBreaker:
+    """Test cases for the circuit breaker."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens at the threshold and a success resets the count."""
+        # Setup
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        # Execute
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        closed = breaker.allow()
+        breaker.record_failure()
+
+        # Assert
+        assert closed
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+    def test_half_open_lets_one_trial_through(self):
+        """Test that only one call probes the provider once the reset timeout passed."""
+        # Setup
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        # Execute
+        first, second = breaker.allow(), breaker.allow()
+        breaker.record_success()
+
+        # Assert
+        assert first and not second
+        assert breaker.state == "closed"
+
+
+class TestHedgedSearch:
+    """Test cases for deadlines, hedging and short-circuiting."""
+
+    def test_fast_call_is_not_hedged(self):
+        """Test that calls within the hedge delay run once."""
+        # Setup
+        provider = ScriptedProvider(0)
+        search = hedged(provider, samples=(0.5,))
+
+        # Execute
+        search.search("What is RAG?")
+
+        # Assert
+        assert provider.calls == 1
+        assert search.stats()["hedged"] == 0
+
+    def test_concurrent_first_searches_share_one_executor(self):
+        """Test that searches started together from many threads do not create their own pools."""
+        # Setup
+        provider = ScriptedProvider(0.01)
+        with patch("graph.search.ContextThreadPoolExecutor", wraps=ContextThreadPoolExecutor) as mock_executor:
+            search = HedgedSearch(provider, hedge_quantile=0)
+
+            # Execute
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(search.search, ["What is RAG?"] * 8))
+
+        # Assert
+        assert mock_executor.call_count == 1
+        assert search.stats()["searches"] == 8
+
+    def test_slow_call_is_hedged(self):
+        """Test that a call past the latency quantile is raced by a hedge that wins."""
+        # Setup
+        provider = ScriptedProvider(0.5, 0)
+        search = hedged(provider)
+
+        # Execute
+        start = time.perf_counter()
+        results = search.search("What is RAG?")
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert results[0]["content"] == "took 0s"
+        assert elapsed < 0.4
+        assert search.stats()["hedged"] == 1
+        assert search.stats()["hedge_wins"] == 1
+
+    def test_failed_call_is_hedged_right_away(self):
+        """Test that a fast failure is retried once hedging is enabled."""
+        # Setup
+        provider = ScriptedProvider(RuntimeError("502"), 0)
+        search = hedged(provider, samples=(5.0,))
+
+        # Execute
+        results = search.search("What is RAG?")
+
+        # Assert
+        assert results[0]["content"] == "took 0s"
+        assert provider.calls == 2
+
+    def test_deadline_bounds_the_search(self):
+        """Test that a search slower than the deadline raises TimeoutError."""
+        # Setup
+        search = HedgedSearch(ScriptedProvider(1.0), timeout=0.05, hedge_quantile=0)
+
+        # Execute
+        start = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            search.search("What is RAG?")
+
+        # Assert
+        assert time.perf_counter() - start < 0.5
+        assert search.stats()["timeouts"] == 1
+
+    def test_unhealthy_provider_is_skipped(self):
+        """Test that the breaker short-circuits searches after repeated failures."""
+        # Setup
+        provider = ScriptedProvider(RuntimeError("502"))
+        search = HedgedSearch(provider, timeout=1.0, hedge_quantile=0, breaker=CircuitBreaker(2, 60))
+
+        # Execute
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                search.search("What is RAG?")
+        with pytest.raises(SearchUnavailable):
+            search.search("What is RAG?")
+
+        # Assert
+        assert provider.calls == 2
+        assert search.stats()["short_circuited"] == 1
+        assert search.stats()["breaker"] == "open"
+
+    def test_async_slow_call_is_hedged_and_cancelled(self):
+        """Test that the async search races a hedge and cancels the slow call."""
+        # Setup
+        provider = ScriptedProvider(5.0, 0)
+        search = hedged(provider)
+
+        async def run():
+            start = asyncio.get_running_loop().time()
+            results = await search.asearch("What is RAG?")
+            return results, asyncio.get_running_loop().time() - start
+
+        # Execute
+        results, elapsed = asyncio.run(run())
+
+        # Assert
+        assert results[0]["content"] == "took 0s"
+        assert elapsed < 1.0
+        assert search.stats()["hedge_wins"] == 1
+
+    def test_async_deadline_bounds_the_search(self):
+        """Test that the async search raises TimeoutError at the deadline."""
+        # Setup
+        search = HedgedSearch(ScriptedProvider(5.0), timeout=0.05, hedge_quantile=0)
+
+        # Execute & Assert
+        with pytest.raises(TimeoutError):
+            asyncio.run(search.asearch("What is RAG?"))
+
+
+class TestCreateProvider:
+    """Test cases for provider selection."""
+
+    def test_local_provider_needs_a_corpus(self):
+        """Test that the local provider requires SELF_RAG_LOCAL_CORPUS."""
+        # Execute & Assert
+        with patch("graph.search.LOCAL_CORPUS_PATH", None):
+            with pytest.raises(ValueError):
+                create_provider("local")
+
+    def test_local_provider_reads_the_corpus(self, tmp_path):
+        """Test that the local provider loads the configured corpus."""
+        # Setup
+        path = tmp_path / "corpus.jsonl"
+        path.write_text(json.dumps(CORPUS[0]) + "\n")
+
+        # Execute
+        with patch("graph.search.LOCAL_CORPUS_PATH", str(path)):
+            provider = create_provider("local")
+
+        # Assert
+        assert isinstance(provider, LocalCorpusProvider)
+
+    def test_unknown_provider_is_rejected(self):
+        """Test that unknown provider names raise."""
+        # Execute & Assert
+        with pytest.raises(ValueError):
+            create_provider("bing")
@@ -0,0 +1,19 @@
+"""
+Tests for the shared statistics helpers.
+"""
+from graph.stats import percentile
+
+
+class TestPercentile:
+    """Test cases for the nearest-rank percentile."""
+
+    def test_nearest_rank(self):
+        """Test that percentiles pick a sample value regardless of order."""
+        assert percentile([3.0, 1.0, 2.0, 4.0], 0.5) == 2.0
+        assert percentile([3.0, 1.0, 2.0, 4.0], 0.95) == 4.0
+
+    def test_extremes_stay_in_range(self):
+        """Test that the lowest and highest quantiles return the minimum and maximum."""
+        assert percentile([5.0, 7.0], 0.0) == 5.0
+        assert percentile([5.0, 7.0], 1.0) == 7.0
+        assert percentile([2.5], 0.99) == 2.5
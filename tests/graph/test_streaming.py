@@ -0,0 +1,155 @@
+"""
+Tests for token streaming of generations.
+"""
+import asyncio
+
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from langchain.schema import Document
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+
+from graph.chains.generation import GENERATION_TAG, prompt
+from graph.graph import create_workflow
+from graph.streaming import astream_answer, stream_answer
+from tests.mocks import chain_getter
+
+
+def fake_generation_chain(*answers):
+    """Build a generation chain streaming the given answers character by character."""
+    llm = FakeListChatModel(responses=list(answers))
+    return prompt | llm.with_config(tags=[GENERATION_TAG]) | StrOutputParser()
+
+
+def grade(score):
+    """Build a grader verdict."""
+    return MagicMock(binary_score=score)
+
+
+@pytest.fixture
+def workflow():
+    """Patch retrieval and relevance grading, and compile the workflow."""
+    doc = Document(page_content="RAG is retrieval augmented generation.")
+    with patch("graph.nodes.retrieve.get_retriever") as mock_get_retriever, \
+            patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter) as \
+            mock_retrieval_grader:
+        mock_get_retriever.return_value.invoke.return_value = [doc]
+        mock_retrieval_grader.invoke.return_value = MagicMock(binary_score="yes")
+        mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=[doc])
+        mock_retrieval_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+        yield create_workflow().compile()
+
+
+def text_of(events):
+    """Concatenate the streamed tokens, honouring retractions."""
+    text = ""
+    for event in events:
+        if event["event"] == "token":
+            text += event["text"]
+        elif event["event"] == "retract":
+            text = ""
+    return text
+
+
+class TestStreamAnswer:
+    """Test cases for stream_answer."""
+
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_tokens_stream_before_final_verdict(self, mock_hallucination, mock_answer, workflow):
+        """Test that the answer arrives token by token, then the verdict."""
+        # Setup
+        mock_hallucination.invoke.return_value = grade(True)
+        mock_answer.invoke.return_value = grade(True)
+
+        # Execute
+        chain = fake_generation_chain("RAG grounds answers.")
+        with patch("graph.nodes.generate.get_generation_chain", return_value=chain):
+            events = list(stream_answer("What is RAG?", app=workflow))
+
+        # Assert
+        tokens = [event for event in events if event["event"] == "token"]
+        assert len(tokens) > 1
+        assert events[-1]["event"] == "final"
+        assert events[-1]["verdict"] == "useful"
+        assert events[-1]["generation"] == "RAG grounds answers."
+        assert text_of(events) == "RAG grounds answers."
+
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_ungrounded_answer_is_retracted(self, mock_hallucination, mock_answer, workflow):
+        """Test that a rejected answer is retracted before its replacement streams."""
+        # Setup
+        mock_hallucination.invoke.side_effect = [grade(False), grade(True)]
+        mock_answer.invoke.return_value = grade(True)
+
+        # Execute
+        chain = fake_generation_chain("Made up.", "Grounded.")
+        with patch("graph.nodes.generate.get_generation_chain", return_value=chain):
+            events = list(stream_answer("What is RAG?", app=workflow))
+
+        # Assert
+        retracts = [event for event in events if event["event"] == "retract"]
+        assert retracts == [{"event": "retract", "reason": "not supported"}]
+        assert text_of(events) == "Grounded."
+        assert events[-1]["generation"] == "Grounded."
+
+    @patch("graph.nodes.web_search.get_search")
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_unhelpful_answer_is_retracted(self, mock_hallucination, mock_answer, mock_search, workflow):
+        """Test that an answer sent back to web search is retracted."""
+        # Setup
+        mock_hallucination.invoke.return_value = grade(True)
+        mock_answer.invoke.side_effect = [grade(False), grade(True)]
+        mock_search.return_value.search.return_value = [
+            {"content": "RAG combines retrieval and generation.", "url": "https://example.com/rag"}
+        ]
+
+        # Execute
+        chain = fake_generation_chain("Off topic.", "On topic.")
+        with patch("graph.nodes.generate.get_generation_chain", return_value=chain):
+            events = list(stream_answer("What is RAG?", app=workflow))
+
+        # Assert
+        retracts = [event for event in events if event["event"] == "retract"]
+        assert retracts == [{"event": "retract", "reason": "not useful"}]
+        assert text_of(events) == "On topic."
+
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_grader_tokens_are_hidden(self, mock_hallucination, mock_answer, workflow):
+        """Test that only generation tokens are streamed."""
+        # Setup
+        mock_hallucination.invoke.return_value = grade(True)
+        mock_answer.invoke.return_value = grade(True)
+        untagged = prompt | FakeListChatModel(responses=["hidden"]) | StrOutputParser()
+
+        # Execute
+        with patch("graph.nodes.generate.get_generation_chain", return_value=untagged):
+            events = list(stream_answer("What is RAG?", app=workflow))
+
+        # Assert (the answer arrives once, from the node update)
+        assert [event["text"] for event in events if event["event"] == "token"] == ["hidden"]
+
+    @patch("graph.graph.get_answer_grader", new_callable=chain_getter)
+    @patch("graph.graph.get_hallucination_grader", new_callable=chain_getter)
+    def test_async_stream_retracts_ungrounded_answer(self, mock_hallucination, mock_answer, workflow):
+        """Test that the async stream yields the same events as the sync one."""
+        # Setup
+        mock_hallucination.ainvoke = AsyncMock(side_effect=[grade(False), grade(True)])
+        mock_answer.ainvoke = AsyncMock(return_value=grade(True))
+
+        async def collect():
+            return [event async for event in astream_answer("What is RAG?", app=workflow)]
+
+        # Execute
+        chain = fake_generation_chain("Made up.", "Grounded.")
+        with patch("graph.nodes.generate.get_generation_chain", return_value=chain):
+            events = asyncio.run(collect())
+
+        # Assert
+        assert [event["reason"] for event in events if event["event"] == "retract"] == ["not supported"]
+        assert len([event for event in events if event["event"] == "token"]) > 2
+        assert text_of(events) == "Grounded."
+        assert events[-1]["verdict"] == "useful"
@@ -0,0 +1,313 @@
+"""
+Tests for OpenTelemetry tracing of the workflow.
+"""
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain.schema import Document
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.outputs import ChatGeneration, LLMResult
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from graph.chains.generation import GENERATION_TAG, prompt
+from graph.graph import create_workflow
+from graph.search import HedgedSearch, LocalCorpusProvider
+from graph.telemetry import (
+    TelemetryCallbackHandler,
+    _SharedFile,
+    configure_telemetry,
+    create_providers,
+    read_spans,
+    record_cache,
+    record_prefilter,
+    summarize,
+    token_usage,
+    traced,
+)
+from tests.mocks import chain_getter
+
+
+@pytest.fixture
+def spans():
+    """Route the spans of the application to an in-memory exporter."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("test")
+    with patch("graph.telemetry.tracer", tracer), patch("graph.search.tracer", tracer):
+        yield exporter, tracer
+
+
+def by_name(exporter):
+    """Finished spans by name."""
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestTraced:
+    """Test cases for node and routing spans."""
+
+    def test_node_span_carries_the_update(self, spans):
+        """Test that a node span reports documents and retry counters."""
+        # Setup
+        exporter, _ = spans
+
+        def generate(state):
+            return {"documents": [Document(page_content="a")], "generation_attempts": 2}
+
+        # Execute
+        traced(generate)({"question": "q", "generation_attempts": 1})
+
+        # Assert
+        span = by_name(exporter)["node generate"]
+        assert span.attributes["self_rag.documents"] == 1
+        assert span.attributes["self_rag.generation_attempts"] == 2
+        assert span.attributes["self_rag.input.generation_attempts"] == 1
+
+    def test_async_route_span_carries_the_decision(self, spans):
+        """Test that an async routing function reports its decision under the given name."""
+        # Setup
+        exporter, _ = spans
+
+        async def agrade(state):
+            return "not useful"
+
+        # Execute
+        asyncio.run(traced(agrade, "route", "grade")({"question": "q"}))
+
+        # Assert
+        assert by_name(exporter)["route grade"].attributes["self_rag.route.decision"] == "not useful"
+
+    def test_errors_are_recorded(self, spans):
+        """Test that a failing node marks its span as failed."""
+        # Setup
+        exporter, _ = spans
+
+        def retrieve(state):
+            raise RuntimeError("store unavailable")
+
+        # Execute
+        with pytest.raises(RuntimeError):
+            traced(retrieve)({"question": "q"})
+
+        # Assert
+        assert not by_name(exporter)["node retrieve"].status.is_ok
+
+    def test_cache_lookups_are_span_events(self, spans):
+        """Test that cache lookups are recorded on the current span."""
+        # Setup
+        exporter, tracer = spans
+
+        # Execute
+        with tracer.start_as_current_span("node generate"):
+            record_cache("llm", True)
+
+        # Assert
+        event = by_name(exporter)["node generate"].events[0]
+        assert event.attributes["self_rag.cache"] == "llm"
+        assert event.attributes["self_rag.cache.hit"] is True
+
+    def test_prefilter_decisions_are_counted(self):
+        """Test that pre-filter decisions are added to the metric by decision."""
+        # Execute
+        with patch("graph.telemetry.prefilter_decisions") as mock_counter:
+            record_prefilter(accepted=2, rejected=0, graded=1)
+
+        # Assert
+        assert [c.args for c in mock_counter.add.call_args_list] == [
+            (2, {"decision": "accepted"}), (1, {"decision": "graded"})
+        ]
+
+
+class TestCallbackHandler:
+    """Test cases for LLM spans."""
+
+    def test_token_usage_from_message_metadata(self):
+        """Test reading token counts from the message usage metadata."""
+        # Setup
+        message = AIMessage(content="hi", usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15})
+        response = LLMResult(generations=[[ChatGeneration(message=message)]])
+
+        # Execute & Assert
+        assert token_usage(response) == {"input_tokens": 12, "output_tokens": 3}
+
+    def test_token_usage_from_llm_output(self):
+        """Test reading token counts from the provider's token usage."""
+        # Setup
+        response = LLMResult(generations=[[]], llm_output={"token_usage": {"prompt_tokens": 7, "completion_tokens": 2}})
+
+        # Execute & Assert
+        assert token_usage(response) == {"input_tokens": 7, "output_tokens": 2}
+        assert token_usage(LLMResult(generations=[[]])) is None
+
+    def test_llm_calls_become_spans(self, spans):
+        """Test that an LLM call gets a span tagged with its model and tokens."""
+        # Setup
+        exporter, tracer = spans
+        handler = TelemetryCallbackHandler(tracer)
+        response = LLMResult(generations=[[]], llm_output={"token_usage": {"prompt_tokens": 7, "completion_tokens": 2}})
+        run_id = uuid.uuid4()
+
+        # Execute
+        handler.on_chat_model_start({}, [], run_id=run_id, parent_run_id=None, metadata={"ls_model_name": "gpt-test"})
+        handler.on_llm_end(response, run_id=run_id)
+
+        # Assert
+        span = by_name(exporter)["llm gpt-test"]
+        assert span.attributes["gen_ai.usage.input_tokens"] == 7
+        assert span.attributes["gen_ai.usage.output_tokens"] == 2
+
+
+class TestWorkflowTrace:
+    """Test cases for the trace of a whole workflow run."""
+
+    @pytest.fixture
+    def workflow(self):
+        doc = Document(page_content="RAG is retrieval augmented generation.")
+        with patch("graph.nodes.retrieve.get_retriever") as mock_get_retriever, \
+                patch("graph.nodes.grade_documents.get_retrieval_grader", new_callable=chain_getter) as \
+                mock_retrieval_grader, \
+                patch("graph.graph.get_hallucination_grader", new_callable=chain_getter) as mock_hallucination, \
+                patch("graph.graph.get_answer_grader", new_callable=chain_getter) as mock_answer:
+            mock_get_retriever.return_value.invoke.return_value = [doc]
+            mock_get_retriever.return_value.ainvoke = AsyncMock(return_value=[doc])
+            mock_retrieval_grader.invoke.return_value = MagicMock(binary_score="yes")
+            mock_retrieval_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+            for grader in (mock_hallucination, mock_answer):
+                grader.invoke.return_value = MagicMock(binary_score=True)
+                grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score=True))
+            llm = FakeListChatModel(responses=["RAG grounds answers."])
+            chain = prompt | llm.with_config(tags=[GENERATION_TAG]) | StrOutputParser()
+            with patch("graph.nodes.generate.get_generation_chain", return_value=chain):
+                yield create_workflow().compile()
+
+    def check_trace(self, exporter):
+        spans = by_name(exporter)
+        root = spans["request"]
+        for name in ("node retrieve", "node grade_documents", "route decide_to_generate", "node generate",
+                     "route grade_generation_grounded_in_documents_and_question"):
+            assert spans[name].context.trace_id == root.context.trace_id, name
+        assert spans["llm FakeListChatModel"].parent.span_id == spans["node generate"].context.span_id
+        assert spans["route decide_to_generate"].attributes["self_rag.route.decision"] == "generate"
+        assert spans["route grade_generation_grounded_in_documents_and_question"].attributes[
+            "self_rag.route.decision"] == "useful"
+
+    def test_sync_run_is_one_trace(self, spans, workflow):
+        """Test that nodes, routes and LLM calls of a run share the request trace."""
+        # Setup
+        exporter, tracer = spans
+
+        # Execute
+        workflow.invoke({"question": "What is RAG?"}, config={"callbacks": [TelemetryCallbackHandler(tracer)]})
+
+        # Assert
+        self.check_trace(exporter)
+
+    def test_async_run_is_one_trace(self, spans, workflow):
+        """Test that the async workflow produces the same trace."""
+        # Setup
+        exporter, tracer = spans
+
+        # Execute
+        config = {"callbacks": [TelemetryCallbackHandler(tracer)]}
+        asyncio.run(workflow.ainvoke({"question": "What is RAG?"}, config=config))
+
+        # Assert
+        self.check_trace(exporter)
+
+    def test_async_run_ends_without_detach_errors(self, spans, workflow, caplog):
+        """Test that ending an async run in another task does not try to detach the caller's context."""
+        # Setup
+        _, tracer = spans
+
+        # Execute
+        config = {"callbacks": [TelemetryCallbackHandler(tracer)]}
+        asyncio.run(workflow.ainvoke({"question": "What is RAG?"}, config=config))
+
+        # Assert
+        assert "Failed to detach context" not in caplog.text
+
+
+class TestSearchSpans:
+    """Test cases for web search spans."""
+
+    def test_search_calls_are_children_of_the_search(self, spans):
+        """Test that provider calls are traced under the search span."""
+        # Setup
+        exporter, _ = spans
+        search = HedgedSearch(LocalCorpusProvider([{"url": "https://example.com", "content": "RAG explained."}]))
+
+        # Execute
+        search.search("What is RAG?")
+
+        # Assert
+        found = by_name(exporter)
+        assert found["search local"].parent.span_id == found["web_search"].context.span_id
+        assert found["search local"].attributes["self_rag.search.results"] == 1
+        assert found["web_search"].attributes["self_rag.search.winning_attempt"] == 0
+
+
+class TestExport:
+    """Test cases for exporters and the latency summary."""
+
+    def test_telemetry_is_off_by_default(self):
+        """Test that nothing is configured without an exporter."""
+        # Execute & Assert
+        assert configure_telemetry("") is False
+
+    def test_file_exporter_writes_json_lines(self, tmp_path):
+        """Test that spans are appended to the telemetry file and summarized per stage."""
+        # Setup
+        path = str(tmp_path / "traces.jsonl")
+        tracer_provider, meter_provider = create_providers("file", path)
+        tracer = tracer_provider.get_tracer("test")
+
+        # Execute
+        for _ in range(3):
+            with tracer.start_as_current_span("node generate"):
+                pass
+        tracer_provider.shutdown()
+        meter_provider.shutdown()
+        spans = read_spans(path)
+        summary = summarize(spans)
+
+        # Assert
+        assert len(spans) == 3
+        assert summary["node generate"]["count"] == 3
+        assert summary["node generate"]["p95_s"] >= 0
+
+    def test_file_is_closed_once_both_providers_shut_down(self, tmp_path):
+        """Test that the telemetry file stays open for the final metric export and is then closed."""
+        # Setup
+        path = str(tmp_path / "traces.jsonl")
+        files = []
+
+        def shared_file(*args, **kwargs):
+            files.append(_SharedFile(*args, **kwargs))
+            return files[-1]
+
+        with patch("graph.telemetry._SharedFile", side_effect=shared_file):
+            tracer_provider, meter_provider = create_providers("file", path)
+        with tracer_provider.get_tracer("test").start_as_current_span("node generate"):
+            pass
+
+        # Execute
+        tracer_provider.shutdown()
+        open_after_traces = not files[0].handle.closed
+        meter_provider.shutdown()
+
+        # Assert
+        assert open_after_traces
+        assert files[0].handle.closed
+        assert len(read_spans(path)) == 1
+
+    def test_unknown_exporter_is_rejected(self):
+        """Test that unknown exporters raise."""
+        # Execute & Assert
+        with pytest.raises(ValueError):
+            create_providers("zipkin")
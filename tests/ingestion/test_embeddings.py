@@ -0,0 +1,111 @@
+"""
+Tests for the ingestion embedding stage.
+"""
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.embeddings import CachedEmbeddings, EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an empty embedding cache."""
+    cache = EmbeddingCache(str(tmp_path / "cache" / "embeddings.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def make_embedder(cache, model="fake", **kwargs):
+    """Build a cached embedder that counts words as tokens."""
+    return CachedEmbeddings(
+        MagicMock(wraps=DeterministicFakeEmbedding(size=4)),
+        model=model,
+        cache=cache,
+        length_function=lambda text: len(text.split()),
+        **kwargs,
+    )
+
+
+class TestEmbeddingCache:
+    """Test cases for the EmbeddingCache class."""
+
+    def test_round_trip(self, cache):
+        """Test that stored vectors come back exactly."""
+        # Setup
+        cache.put_many("model", [("h1", [0.1, -0.2, 0.3])])
+
+        # Execute
+        found = cache.get_many("model", ["h1", "h2"])
+
+        # Assert
+        assert found == {"h1": [0.1, -0.2, 0.3]}
+        assert len(cache) == 1
+
+    def test_keyed_by_model(self, cache):
+        """Test that vectors are not shared between models."""
+        cache.put_many("model-a", [("h1", [1.0])])
+
+        assert cache.get_many("model-b", ["h1"]) == {}
+
+
+class TestCachedEmbeddings:
+    """Test cases for the CachedEmbeddings class."""
+
+    def test_batches_respect_item_limit(self, cache):
+        """Test that batches never exceed the item limit."""
+        embedder = make_embedder(cache, max_batch_items=2)
+
+        assert embedder.batches(["a", "b", "c", "d", "e"]) == [["a", "b"], ["c", "d"], ["e"]]
+
+    def test_batches_respect_token_limit(self, cache):
+        """Test that batches never exceed the token limit."""
+        embedder = make_embedder(cache, max_batch_tokens=4)
+
+        batches = embedder.batches(["one two", "three four", "five", "six seven eight nine ten"])
+
+        assert batches == [["one two", "three four"], ["five"], ["six seven eight nine ten"]]
+
+    def test_embed_documents_uses_cache(self, cache):
+        """Test that identical text is only embedded once, across runs."""
+        # Setup
+        embedder = make_embedder(cache)
+        texts = ["RAG is retrieval augmented generation.", "LLMs generate text."]
+        first = embedder.embed_documents(texts)
+        rerun = make_embedder(cache)
+
+        # Execute
+        second = rerun.embed_documents(texts + [texts[0]])
+
+        # Assert
+        assert embedder.embeddings.embed_documents.call_count == 1
+        rerun.embeddings.embed_documents.assert_not_called()
+        assert second == first + [first[0]]
+        assert embedder.misses == 2
+
+    def test_duplicate_texts_are_embedded_once(self, cache):
+        """Test that duplicates within one call are sent to the model once."""
+        # Setup
+        embedder = make_embedder(cache)
+
+        # Execute
+        vectors = embedder.embed_documents(["same", "same", "other"])
+
+        # Assert
+        embedder.embeddings.embed_documents.assert_called_once_with(["same", "other"])
+        assert vectors[0] == vectors[1]
+        assert embedder.hits == 1
+        assert embedder.misses == 2
+
+    def test_other_model_misses_cache(self, cache):
+        """Test that changing the model re-embeds."""
+        # Setup
+        make_embedder(cache, model="a").embed_documents(["text"])
+        embedder = make_embedder(cache, model="b")
+
+        # Execute
+        embedder.embed_documents(["text"])
+
+        # Assert
+        assert embedder.misses == 1
+        assert len(cache) == 2
@@ -0,0 +1,75 @@
+"""
+Tests for the lexical (BM25) index.
+"""
+import pytest
+from langchain.schema import Document
+
+from ingestion.lexical import LexicalIndex, to_match_query
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create a lexical index with a few chunks."""
+    index = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+    index.upsert([
+        Document(
+            id="1", page_content="Retrieval-augmented generation (RAG) grounds answers.", metadata={"source": "a"}
+        ),
+        Document(id="2", page_content="Large language models generate text.", metadata={"source": "b"}),
+        Document(id="3", page_content="Error E1234 means the index is stale.", metadata={"source": "c"}),
+    ])
+    yield index
+    index.close()
+
+
+class TestLexicalIndex:
+    """Test cases for the lexical index."""
+
+    def test_to_match_query_quotes_terms(self):
+        """Test that FTS5 syntax in questions is neutralised."""
+        # Execute
+        query = to_match_query('What is "RAG" AND NOT rag? (E1234)*')
+
+        # Assert
+        assert query == '"what" OR "is" OR "rag" OR "and" OR "not" OR "e1234"'
+
+    def test_search_ranks_keyword_matches(self, index):
+        """Test that exact keywords such as error codes are found."""
+        # Execute
+        results = index.search("What does E1234 mean?", k=2)
+
+        # Assert
+        assert results[0].id == "3"
+        assert results[0].metadata == {"source": "c"}
+
+    def test_search_stems_terms(self, index):
+        """Test that inflected forms match."""
+        # Execute
+        results = index.search("generating", k=3)
+
+        # Assert
+        assert {doc.id for doc in results} == {"1", "2"}
+
+    def test_search_without_terms(self, index):
+        """Test that a question without terms matches nothing."""
+        # Execute & Assert
+        assert index.search("?!") == []
+
+    def test_upsert_replaces_content(self, index):
+        """Test that re-upserting a chunk replaces its indexed content."""
+        # Execute
+        index.upsert([Document(id="2", page_content="Prompt engineering.", metadata={"source": "b"})])
+
+        # Assert
+        assert len(index) == 3
+        assert index.search("language models") == []
+        assert [doc.id for doc in index.search("prompt")] == ["2"]
+
+    def test_remove(self, index):
+        """Test that removed chunks are no longer found."""
+        # Execute
+        index.remove(["1", "2"])
+
+        # Assert
+        assert len(index) == 1
+        assert index.search("generation") == []
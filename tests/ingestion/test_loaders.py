@@ -0,0 +1,156 @@
+"""
+Tests for the ingestion loaders.
+"""
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+from langchain.schema import Document
+
+from ingestion.loaders import create_session, expand_sources, iter_sources, load_source, load_sources
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Create a small local corpus."""
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a.html").write_text(
+        "<html><head><title>RAG</title></head><body><p>RAG is retrieval augmented generation.</p></body></html>",
+        encoding="utf-8",
+    )
+    (tmp_path / "b" / "notes.txt").write_text("LLMs generate text.", encoding="utf-8")
+    (tmp_path / "b" / "image.png").write_bytes(b"\x89PNG")
+    return tmp_path
+
+
+class TestLoaders:
+    """Test cases for the ingestion loaders."""
+
+    def test_create_session_pools_and_retries(self):
+        """Test that the shared session has a sized pool and retries."""
+        # Execute
+        session = create_session(pool_size=8, retries=2)
+
+        # Assert
+        adapter = session.get_adapter("https://en.wikipedia.org")
+        assert adapter._pool_maxsize == 8
+        assert adapter.max_retries.total == 2
+        assert 503 in adapter.max_retries.status_forcelist
+
+    def test_expand_sources(self, corpus):
+        """Test that directories expand to supported files in sorted order."""
+        # Execute
+        expanded = expand_sources([str(corpus), "https://example.com"])
+
+        # Assert
+        assert expanded == [
+            str(corpus / "a.html"),
+            str(corpus / "b" / "notes.txt"),
+            "https://example.com",
+        ]
+
+    def test_load_local_files(self, corpus):
+        """Test loading local HTML and text files."""
+        # Execute
+        html_docs = load_source(str(corpus / "a.html"))
+        text_docs = load_source(str(corpus / "b" / "notes.txt"))
+
+        # Assert
+        assert "RAG is retrieval augmented generation." in html_docs[0].page_content
+        assert html_docs[0].metadata["source"] == str(corpus / "a.html")
+        assert html_docs[0].metadata["title"] == "RAG"
+        assert text_docs[0].page_content == "LLMs generate text."
+
+    def test_load_sources_offline(self, corpus):
+        """Test that a local directory runs through the whole loader stage."""
+        # Execute
+        docs, failed = load_sources([str(corpus)], progress=None)
+
+        # Assert
+        assert failed == []
+        assert [doc.metadata["source"] for doc in docs] == [
+            str(corpus / "a.html"),
+            str(corpus / "b" / "notes.txt"),
+        ]
+
+    @patch("ingestion.loaders.load_source")
+    def test_load_sources_is_concurrent_and_ordered(self, mock_load):
+        """Test that sources load in parallel but come back in source order."""
+        # Setup
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_load(source, session):
+            with lock:
+                active.append(source)
+                peak.append(len(active))
+            # Later sources finish first
+            time.sleep(0.05 * (5 - int(source)))
+            with lock:
+                active.remove(source)
+            return [Document(page_content=source, metadata={"source": source})]
+
+        mock_load.side_effect = slow_load
+        progress = []
+
+        # Execute
+        docs, failed = load_sources(
+            ["0", "1", "2", "3"], max_concurrency=2, progress=lambda *args: progress.append(args)
+        )
+
+        # Assert
+        assert [doc.page_content for doc in docs] == ["0", "1", "2", "3"]
+        assert failed == []
+        assert max(peak) == 2
+        assert [entry[0] for entry in progress] == [1, 2, 3, 4]
+        assert all(entry[1] == 4 for entry in progress)
+
+    @patch("ingestion.loaders.load_source")
+    def test_load_sources_reports_failures(self, mock_load):
+        """Test that failing sources are skipped and reported."""
+        # Setup
+        def load(source, session):
+            if source == "bad":
+                raise ConnectionError("unreachable")
+            return [Document(page_content=source, metadata={"source": source})]
+
+        mock_load.side_effect = load
+
+        # Execute
+        docs, failed = load_sources(["good", "bad"], progress=None)
+
+        # Assert
+        assert [doc.page_content for doc in docs] == ["good"]
+        assert failed == ["bad"]
+
+    @patch("ingestion.loaders.load_source")
+    def test_iter_sources_applies_backpressure(self, mock_load):
+        """Test that only a bounded window of sources is fetched ahead of the consumer."""
+        # Setup
+        mock_load.side_effect = lambda source, session: [Document(page_content=source)]
+        sources = [str(i) for i in range(20)]
+
+        # Execute
+        iterator = iter_sources(sources, max_concurrency=2, progress=None)
+        first = next(iterator)
+        time.sleep(0.05)
+
+        # Assert
+        assert first[0] == "0"
+        assert mock_load.call_count <= 4
+        assert [source for source, _ in iterator] == sources[1:]
+
+    @patch("ingestion.loaders.load_source")
+    def test_iter_sources_skips_sources(self, mock_load):
+        """Test that skipped sources are never fetched."""
+        # Setup
+        mock_load.side_effect = lambda source, session: [Document(page_content=source)]
+
+        # Execute
+        result = list(iter_sources(["a", "b", "c"], progress=None, skip={"b"}))
+
+        # Assert
+        assert [source for source, _ in result] == ["a", "c"]
+        assert mock_load.call_count == 2
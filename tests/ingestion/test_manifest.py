@@ -0,0 +1,137 @@
+"""
+Tests for the ingestion manifest.
+"""
+import pytest
+from langchain.schema import Document
+
+from ingestion.manifest import Manifest, assign_chunk_ids, chunk_id, content_hash, read_version
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """Create a manifest in a temporary directory."""
+    manifest = Manifest(str(tmp_path / "manifest.sqlite3"))
+    yield manifest
+    manifest.close()
+
+
+def make_chunks(*contents, source="https://example.com/rag"):
+    """Build identified chunks from a single source."""
+    return assign_chunk_ids(
+        [Document(page_content=content, metadata={"source": source}) for content in contents]
+    )
+
+
+class TestChunkIds:
+    """Test cases for chunk identification."""
+
+    def test_chunk_id_is_deterministic(self):
+        """Test that the same source and position always give the same ID."""
+        assert chunk_id("https://example.com", 0) == chunk_id("https://example.com", 0)
+        assert chunk_id("https://example.com", 0) != chunk_id("https://example.com", 1)
+        assert chunk_id("https://example.com", 0) != chunk_id("https://example.org", 0)
+
+    def test_assign_chunk_ids_numbers_per_source(self):
+        """Test that chunks are numbered independently for each source."""
+        # Setup
+        chunks = [
+            Document(page_content="a", metadata={"source": "s1"}),
+            Document(page_content="b", metadata={"source": "s2"}),
+            Document(page_content="c", metadata={"source": "s1"}),
+        ]
+
+        # Execute
+        result = assign_chunk_ids(chunks)
+
+        # Assert
+        assert [chunk.id for chunk in result] == [
+            chunk_id("s1", 0), chunk_id("s2", 0), chunk_id("s1", 1)
+        ]
+        assert result[0].metadata["content_hash"] == content_hash("a")
+
+
+class TestManifest:
+    """Test cases for the Manifest class."""
+
+    def test_new_chunks_are_changed(self, manifest):
+        """Test that chunks missing from the manifest need upserting."""
+        chunks = make_chunks("RAG is retrieval augmented generation.", "LLMs generate text.")
+
+        assert manifest.changed(chunks) == chunks
+
+    def test_recorded_chunks_are_unchanged(self, manifest):
+        """Test that recorded chunks with the same content are skipped."""
+        # Setup
+        chunks = make_chunks("RAG is retrieval augmented generation.", "LLMs generate text.")
+        manifest.record(chunks, manifest.begin_run())
+
+        # Execute
+        changed = manifest.changed(make_chunks(
+            "RAG is retrieval augmented generation.", "LLMs generate long text."
+        ))
+
+        # Assert
+        assert len(changed) == 1
+        assert changed[0].page_content == "LLMs generate long text."
+        assert len(manifest) == 2
+
+    def test_stale_ids(self, manifest):
+        """Test that chunks not seen in the latest run are reported as stale."""
+        # Setup
+        first = make_chunks("one", "two", "three")
+        manifest.record(first, manifest.begin_run())
+        second = make_chunks("one", "two")
+        run = manifest.begin_run()
+        manifest.record(second, run)
+
+        # Execute
+        stale = manifest.stale_ids(run)
+
+        # Assert
+        assert stale == [first[2].id]
+        manifest.remove(stale)
+        assert len(manifest) == 2
+
+    def test_stale_ids_of_some_sources(self, manifest):
+        """Test that stale chunks can be restricted to the given sources."""
+        # Setup
+        first = make_chunks("one", "two")
+        manifest.record(first, manifest.begin_run())
+        run = manifest.begin_run()
+
+        # Execute & Assert
+        assert manifest.stale_ids(run, sources={"elsewhere"}) == []
+        assert len(manifest.stale_ids(run, sources={"https://example.com/rag"})) == 2
+
+    def test_manifest_is_persistent(self, tmp_path):
+        """Test that the manifest survives being reopened."""
+        # Setup
+        path = str(tmp_path / "nested" / "manifest.sqlite3")
+        manifest = Manifest(path)
+        chunks = make_chunks("persisted")
+        manifest.record(chunks, manifest.begin_run())
+        manifest.close()
+
+        # Execute
+        reopened = Manifest(path)
+
+        # Assert
+        assert reopened.changed(make_chunks("persisted")) == []
+        assert reopened.begin_run() == 2
+        reopened.close()
+
+    def test_collection_version(self, tmp_path):
+        """Test that the collection version is bumped and readable from outside."""
+        # Setup
+        path = str(tmp_path / "manifest.sqlite3")
+        assert read_version(path) == 0
+        manifest = Manifest(path)
+
+        # Execute
+        manifest.bump_version()
+        manifest.bump_version()
+
+        # Assert
+        assert manifest.version == 2
+        assert read_version(path) == 2
+        manifest.close()
@@ -0,0 +1,344 @@
+"""
+Tests for the ingestion pipeline.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import MagicMock, patch
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.embeddings import CachedEmbeddings, EmbeddingCache
+from ingestion.lexical import LexicalIndex
+from ingestion.manifest import Manifest
+from ingestion.pipeline import ingest, iter_batches
+from ingestion.web_results import write_back
+
+
+@pytest.fixture
+def vectorstore(tmp_path):
+    """Create an empty vector store with fake embeddings."""
+    return Chroma(
+        collection_name="test-ingestion",
+        embedding_function=DeterministicFakeEmbedding(size=8),
+        persist_directory=str(tmp_path / "chroma"),
+    )
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """Create an empty manifest."""
+    manifest = Manifest(str(tmp_path / "manifest.sqlite3"))
+    yield manifest
+    manifest.close()
+
+
+@pytest.fixture(autouse=True)
+def lexical_path(tmp_path):
+    """Keep the default lexical index inside the test directory."""
+    path = str(tmp_path / "lexical.sqlite3")
+    with patch("ingestion.pipeline.LEXICAL_INDEX_PATH", path):
+        yield path
+
+
+@pytest.fixture
+def embedder(tmp_path):
+    """Create a cached embedding stage over fake embeddings."""
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    yield CachedEmbeddings(
+        MagicMock(wraps=DeterministicFakeEmbedding(size=8)),
+        model="fake",
+        cache=cache,
+        length_function=lambda text: len(text.split()),
+    )
+    cache.close()
+
+
+def loaded(failed=(), **pages):
+    """Build the per-source output of the loader stage."""
+    result = [
+        (source, [Document(page_content=text, metadata={"source": source})])
+        for source, text in pages.items()
+    ]
+    return result + [(source, None) for source in failed]
+
+
+def fake_iter_sources(pages):
+    """Build an iter_sources replacement that honours ``skip``."""
+    def iter_sources(sources, max_concurrency, skip=()):
+        for source, docs in pages:
+            if source not in skip:
+                yield source, docs
+    return iter_sources
+
+
+def make_chunks(source, count):
+    """Build ``count`` chunks of one source."""
+    return source, [Document(page_content=f"{source}-{i}", metadata={"source": source}) for i in range(count)]
+
+
+class TestIterBatches:
+    """Test cases for batching chunks across sources."""
+
+    def test_batches_have_fixed_size(self):
+        """Test that chunks are regrouped into fixed-size batches."""
+        # Execute
+        batches = list(iter_batches([make_chunks("a", 3), make_chunks("b", 4)], batch_size=3))
+
+        # Assert
+        assert [len(batch) for batch, _ in batches] == [3, 3, 1]
+
+    def test_batches_report_completed_sources(self):
+        """Test that a source is complete once its last chunk is in a batch."""
+        # Execute
+        batches = list(iter_batches(
+            [make_chunks("a", 3), make_chunks("b", 4), make_chunks("c", 0)], batch_size=3
+        ))
+
+        # Assert
+        assert [completed for _, completed in batches] == [["a"], [], ["b", "c"]]
+
+    def test_batches_are_lazy(self):
+        """Test that batches are produced before the input is exhausted."""
+        # Setup
+        def chunked():
+            yield make_chunks("a", 2)
+            raise RuntimeError("input should not be read this far")
+
+        # Execute
+        first_batch, completed = next(iter_batches(chunked(), batch_size=2))
+
+        # Assert
+        assert len(first_batch) == 2
+        assert completed == ["a"]
+
+
+@patch("ingestion.pipeline.iter_split", side_effect=lambda loaded, max_workers: iter(loaded))
+@patch("ingestion.pipeline.iter_sources")
+class TestIngest:
+    """Test cases for incremental ingestion."""
+
+    def test_first_ingest_upserts_everything(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that an empty store receives every chunk."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+
+        # Execute
+        stats = ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+
+        # Assert
+        assert stats == {"upserted": 2, "unchanged": 0, "deleted": 0, "expired": 0, "failed": 0, "batches": 1}
+        stored = vectorstore.get(include=["embeddings"])
+        assert len(stored["ids"]) == 2
+        assert len(stored["embeddings"][0]) == 8
+
+    def test_reingest_only_touches_changes(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that a pruning re-ingest upserts changed chunks and deletes those of removed sources."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", c="New page."))
+
+        # Execute
+        with patch.object(embedder, "embed_documents", wraps=embedder.embed_documents) as spy:
+            stats = ingest(["a", "c"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, prune=True)
+
+        # Assert
+        assert stats == {"upserted": 1, "unchanged": 1, "deleted": 1, "expired": 0, "failed": 0, "batches": 1}
+        spy.assert_called_once_with(["New page."])
+        stored = vectorstore.get()
+        assert sorted(stored["documents"]) == ["New page.", "RAG combines retrieval with generation."]
+
+    def test_sources_left_out_are_kept(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that without pruning only the chunks of the ingested sources can be stale."""
+        # Setup
+        pages = [
+            ("a", [Document(page_content=text, metadata={"source": "a"}) for text in ("RAG.", "Retrieval.")]),
+            ("b", [Document(page_content="LLMs.", metadata={"source": "b"})]),
+        ]
+        mock_load.side_effect = fake_iter_sources(pages)
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG."))
+
+        # Execute
+        stats = ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+
+        # Assert
+        assert stats["deleted"] == 1
+        assert sorted(vectorstore.get()["documents"]) == ["LLMs.", "RAG."]
+        assert len(manifest) == 2
+
+    def test_unchanged_ingest_is_a_no_op(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that ingesting unchanged sources embeds nothing."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation."))
+        ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+
+        # Execute
+        with patch.object(embedder, "embed_documents") as spy:
+            stats = ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+
+        # Assert
+        assert stats == {"upserted": 0, "unchanged": 1, "deleted": 0, "expired": 0, "failed": 0, "batches": 1}
+        spy.assert_not_called()
+
+    def test_rebuild_reuses_cached_vectors(self, mock_load, mock_split, tmp_path, embedder):
+        """Test that rebuilding the collection from scratch embeds nothing twice."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+        for attempt in range(2):
+            vectorstore = Chroma(
+                collection_name=f"rebuild-{attempt}",
+                embedding_function=DeterministicFakeEmbedding(size=8),
+                persist_directory=str(tmp_path / f"chroma-{attempt}"),
+            )
+            manifest = Manifest(str(tmp_path / f"manifest-{attempt}.sqlite3"))
+
+            # Execute
+            stats = ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+            manifest.close()
+
+            # Assert
+            assert stats["upserted"] == 2
+            assert embedder.embeddings.embed_documents.call_count == 1
+
+    def test_failed_source_keeps_its_chunks(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that a source failing to load does not delete its chunks."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        mock_load.side_effect = fake_iter_sources(loaded(["b"], a="RAG combines retrieval with generation."))
+
+        # Execute
+        stats = ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+
+        # Assert
+        assert stats == {"upserted": 0, "unchanged": 1, "deleted": 0, "expired": 0, "failed": 1, "batches": 1}
+        assert len(vectorstore.get()["ids"]) == 2
+
+    def test_old_web_results_expire(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that web search chunks survive the stale sweep but expire with age."""
+        # Setup
+        write_back([{"url": "https://example.com", "content": "RAG explained."}], vectorstore,
+                   splitter=RecursiveCharacterTextSplitter(), fetched_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation."))
+        ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, web_max_age=0)
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation."))
+
+        # Execute
+        stats = ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, web_max_age=3600)
+
+        # Assert
+        assert len(vectorstore.get()["ids"]) == 1
+        assert stats["expired"] == 1
+
+    def test_embeds_in_bounded_batches(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that chunks are embedded and upserted one batch at a time."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="one", b="two", c="three", d="four", e="five"))
+
+        # Execute
+        with patch.object(embedder, "embed_documents", wraps=embedder.embed_documents) as spy:
+            stats = ingest(list("abcde"), vectorstore=vectorstore, manifest=manifest, embedder=embedder, batch_size=2)
+
+        # Assert
+        assert stats["batches"] == 3
+        assert [len(call.args[0]) for call in spy.call_args_list] == [2, 2, 1]
+        assert len(vectorstore.get()["ids"]) == 5
+
+    def test_resume_skips_committed_sources(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that an interrupted run resumes after its last committed batch."""
+        # Setup
+        def crashing_iter_sources(sources, max_concurrency, skip=()):
+            yield from loaded(a="one", b="two")
+            raise KeyboardInterrupt
+
+        mock_load.side_effect = crashing_iter_sources
+        with pytest.raises(KeyboardInterrupt):
+            ingest(list("abc"), vectorstore=vectorstore, manifest=manifest, embedder=embedder, batch_size=1)
+        mock_load.side_effect = fake_iter_sources(loaded(a="one", b="two", c="three"))
+
+        # Execute
+        stats = ingest(
+            list("abc"), vectorstore=vectorstore, manifest=manifest, embedder=embedder, batch_size=1, resume=True
+        )
+
+        # Assert
+        assert mock_load.call_args.kwargs["skip"] == {"a", "b"}
+        assert stats["upserted"] == 1
+        assert stats["deleted"] == 0
+        assert sorted(vectorstore.get()["documents"]) == ["one", "three", "two"]
+
+    def test_without_resume_starts_over(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that a new run does not skip sources of an interrupted run."""
+        # Setup
+        def crashing_iter_sources(sources, max_concurrency, skip=()):
+            yield from loaded(a="one")
+            raise KeyboardInterrupt
+
+        mock_load.side_effect = crashing_iter_sources
+        with pytest.raises(KeyboardInterrupt):
+            ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, batch_size=1)
+        mock_load.side_effect = fake_iter_sources(loaded(a="one"))
+
+        # Execute
+        stats = ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, batch_size=1)
+
+        # Assert
+        assert mock_load.call_args.kwargs["skip"] == set()
+        assert stats["unchanged"] == 1
+
+    def test_lexical_index_follows_the_store(
+        self, mock_load, mock_split, vectorstore, manifest, embedder, lexical_path
+    ):
+        """Test that upserts and deletions are applied to the lexical index too."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", c="New page."))
+
+        # Execute
+        ingest(["a", "c"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, prune=True)
+
+        # Assert
+        lexical = LexicalIndex(lexical_path)
+        assert len(lexical) == 2
+        assert lexical.search("LLMs") == []
+        assert [doc.page_content for doc in lexical.search("new page")] == ["New page."]
+        lexical.close()
+
+    def test_lexical_index_is_backfilled(self, mock_load, mock_split, vectorstore, manifest, embedder, tmp_path):
+        """Test that a collection ingested without a lexical index gets one."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        lexical = LexicalIndex(str(tmp_path / "new-lexical.sqlite3"))
+
+        # Execute
+        stats = ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, lexical=lexical)
+
+        # Assert
+        assert stats["upserted"] == 0
+        assert len(lexical) == 2
+        assert lexical.search("retrieval")[0].metadata["source"] == "a"
+        lexical.close()
+
+    def test_changes_bump_the_collection_version(self, mock_load, mock_split, vectorstore, manifest, embedder):
+        """Test that only ingests changing the collection bump its version."""
+        # Setup
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation.", b="LLMs."))
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        version = manifest.version
+
+        # Execute
+        ingest(["a", "b"], vectorstore=vectorstore, manifest=manifest, embedder=embedder)
+        unchanged_version = manifest.version
+        mock_load.side_effect = fake_iter_sources(loaded(a="RAG combines retrieval with generation."))
+        ingest(["a"], vectorstore=vectorstore, manifest=manifest, embedder=embedder, prune=True)
+
+        # Assert
+        assert version > 0
+        assert unchanged_version == version
+        assert manifest.version > version
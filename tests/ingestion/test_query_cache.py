@@ -0,0 +1,231 @@
+"""
+Tests for the query-time embedding and result caches.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+from langchain.schema import Document
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.retrievers import BaseRetriever
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from ingestion.query_cache import (
+    CachedQueryEmbeddings,
+    CachedRetriever,
+    QueryCache,
+    TracedEmbeddings,
+    normalize_question,
+)
+
+
+class CountingRetriever(BaseRetriever):
+    """Retriever returning fixed documents and counting its calls."""
+
+    documents: list
+    calls: int = 0
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.calls += 1
+        return self.documents
+
+
+@pytest.fixture
+def vectorstore(tmp_path):
+    """Create a vector store holding two chunks."""
+    vectorstore = Chroma(
+        collection_name="test-query-cache",
+        embedding_function=DeterministicFakeEmbedding(size=8),
+        persist_directory=str(tmp_path / "chroma"),
+    )
+    vectorstore.add_documents(
+        [
+            Document(page_content="first", metadata={"source": "a"}),
+            Document(page_content="second", metadata={"source": "b"}),
+        ],
+        ids=["1", "2"],
+    )
+    return vectorstore
+
+
+class TestQueryCache:
+    """Test cases for the LRU + TTL cache."""
+
+    def test_normalize_question(self):
+        """Test that case and whitespace do not change the key."""
+        assert normalize_question("  What is\tRAG? ") == normalize_question("what is rag?")
+
+    def test_entries_expire(self):
+        """Test that entries expire after their time-to-live."""
+        # Setup
+        cache = QueryCache(maxsize=4, ttl=0.05)
+        cache.put("key", "value")
+
+        # Execute
+        fresh = cache.get("key")
+        time.sleep(0.1)
+        expired = cache.get("key")
+
+        # Assert
+        assert fresh == "value"
+        assert expired is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that a full cache evicts the least recently used entry."""
+        # Setup
+        cache = QueryCache(maxsize=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        # Execute
+        cache.put("c", 3)
+
+        # Assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+
+class TestCachedQueryEmbeddings:
+    """Test cases for cached query embeddings."""
+
+    def test_repeated_question_is_embedded_once(self):
+        """Test that equivalent questions reuse the cached vector."""
+        # Setup
+        inner = MagicMock(wraps=DeterministicFakeEmbedding(size=8))
+        embeddings = CachedQueryEmbeddings(inner, "fake", QueryCache(maxsize=4, ttl=60))
+
+        # Execute
+        first = embeddings.embed_query("What is RAG?")
+        second = embeddings.embed_query("what is  rag?")
+
+        # Assert
+        assert first == second
+        inner.embed_query.assert_called_once_with("What is RAG?")
+
+
+class TestTracedEmbeddings:
+    """Test cases for the embedding span."""
+
+    def test_span_with_and_without_cache(self):
+        """Test that every question gets a span, with a cache hit attribute only when cached."""
+        # Setup
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        inner = DeterministicFakeEmbedding(size=8)
+        cached = TracedEmbeddings(CachedQueryEmbeddings(inner, "fake", QueryCache(maxsize=4, ttl=60)), "fake")
+        uncached = TracedEmbeddings(inner, "fake")
+
+        # Execute
+        with patch("ingestion.query_cache.tracer", provider.get_tracer("test")):
+            uncached.embed_query("What is RAG?")
+            cached.embed_query("What is RAG?")
+            cached.embed_query("what is rag?")
+
+        # Assert
+        spans = exporter.get_finished_spans()
+        assert [span.name for span in spans] == ["embedding query"] * 3
+        assert all(span.attributes["gen_ai.request.model"] == "fake" for span in spans)
+        assert [span.attributes.get("self_rag.cache.hit") for span in spans] == [None, False, True]
+
+
+class TestCachedRetriever:
+    """Test cases for the cached retriever."""
+
+    def make_retriever(self, vectorstore, version, version_ttl=0.0):
+        """Build a cached retriever over a counting retriever."""
+        inner = CountingRetriever(documents=[
+            Document(id="2", page_content="second", metadata={"source": "b"}),
+            Document(id="1", page_content="first", metadata={"source": "a"}),
+        ])
+        retriever = CachedRetriever(
+            retriever=inner,
+            vectorstore=vectorstore,
+            cache=QueryCache(maxsize=4, ttl=60),
+            version=version,
+            version_ttl=version_ttl,
+        )
+        return retriever, inner
+
+    def test_repeated_question_skips_retrieval(self, vectorstore):
+        """Test that a cached result is hydrated in ranking order."""
+        # Setup
+        retriever, inner = self.make_retriever(vectorstore, lambda: 1)
+        first = retriever.invoke("What is RAG?")
+
+        # Execute
+        second = retriever.invoke("what is rag?")
+
+        # Assert
+        assert inner.calls == 1
+        assert [doc.id for doc in second] == [doc.id for doc in first] == ["2", "1"]
+        assert second[0].page_content == "second"
+
+    def test_repeated_question_skips_retrieval_async(self, vectorstore):
+        """Test that async retrieval shares the cache with sync retrieval."""
+        # Setup
+        retriever, inner = self.make_retriever(vectorstore, lambda: 1)
+        retriever.invoke("What is RAG?")
+
+        # Execute
+        cached = asyncio.run(retriever.ainvoke("what is rag?"))
+        fresh = asyncio.run(retriever.ainvoke("What is BM25?"))
+
+        # Assert
+        assert inner.calls == 2
+        assert [doc.id for doc in cached] == ["2", "1"]
+        assert [doc.id for doc in fresh] == ["2", "1"]
+
+    def test_new_collection_version_invalidates(self, vectorstore):
+        """Test that ingesting changes invalidates cached results."""
+        # Setup
+        version = MagicMock(return_value=1)
+        retriever, inner = self.make_retriever(vectorstore, version)
+        retriever.invoke("What is RAG?")
+
+        # Execute
+        version.return_value = 2
+        retriever.invoke("What is RAG?")
+
+        # Assert
+        assert inner.calls == 2
+
+    def test_version_read_is_shared_and_off_the_event_loop(self, vectorstore):
+        """Test that sync and async retrieval reuse a fresh version read, made in a worker thread when async."""
+        # Setup
+        threads = []
+
+        def version():
+            threads.append(threading.current_thread())
+            return 1
+
+        retriever, _ = self.make_retriever(vectorstore, version, version_ttl=60)
+
+        # Execute
+        asyncio.run(retriever.ainvoke("What is RAG?"))
+        retriever.invoke("What is RAG?")
+        asyncio.run(retriever.ainvoke("What is BM25?"))
+
+        # Assert
+        assert len(threads) == 1
+        assert threads[0] is not threading.main_thread()
+
+    def test_deleted_chunks_are_a_miss(self, vectorstore):
+        """Test that results whose chunks disappeared are retrieved again."""
+        # Setup
+        retriever, inner = self.make_retriever(vectorstore, lambda: 1)
+        retriever.invoke("What is RAG?")
+        vectorstore.delete(ids=["1"])
+
+        # Execute
+        retriever.invoke("What is RAG?")
+
+        # Assert
+        assert inner.calls == 2
@@ -0,0 +1,108 @@
+"""
+Tests for the BM25 and hybrid retrievers.
+"""
+import asyncio
+import time
+
+from langchain.schema import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ingestion.lexical import LexicalIndex
+from ingestion.retrievers import HybridRetriever, LexicalRetriever, reciprocal_rank_fusion
+
+
+def doc(chunk_id):
+    """Build a chunk with the given ID."""
+    return Document(id=chunk_id, page_content=f"chunk {chunk_id}")
+
+
+class StaticRetriever(BaseRetriever):
+    """Retriever returning a fixed ranking."""
+
+    documents: list
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self.documents
+
+
+class SlowRetriever(StaticRetriever):
+    """Retriever taking a while to answer asynchronously."""
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        await asyncio.sleep(0.2)
+        return self.documents
+
+
+class TestReciprocalRankFusion:
+    """Test cases for reciprocal rank fusion."""
+
+    def test_documents_in_both_rankings_win(self):
+        """Test that agreement between retrievers outranks a single top rank."""
+        # Execute
+        fused = reciprocal_rank_fusion([[doc("a"), doc("b"), doc("c")], [doc("d"), doc("c"), doc("b")]])
+
+        # Assert
+        assert [d.id for d in fused] == ["b", "c", "a", "d"]
+
+    def test_deduplicates_by_content_without_ids(self):
+        """Test that documents without IDs are matched by content."""
+        # Execute
+        fused = reciprocal_rank_fusion([[Document(page_content="x")], [Document(page_content="x")]])
+
+        # Assert
+        assert len(fused) == 1
+
+
+class TestRetrievers:
+    """Test cases for the retrievers."""
+
+    def test_lexical_retriever(self, tmp_path):
+        """Test that the lexical retriever returns the BM25 top k."""
+        # Setup
+        index = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+        index.upsert([doc("a"), Document(id="b", page_content="BM25 ranking")])
+        retriever = LexicalRetriever(index=index, k=1)
+
+        # Execute
+        results = retriever.invoke("bm25")
+
+        # Assert
+        assert [d.id for d in results] == ["b"]
+        index.close()
+
+    def test_hybrid_retriever_fuses_and_truncates(self):
+        """Test that the hybrid retriever returns the fused top k."""
+        # Setup
+        retriever = HybridRetriever(
+            retrievers=[
+                StaticRetriever(documents=[doc("a"), doc("b")]),
+                StaticRetriever(documents=[doc("c"), doc("b")]),
+            ],
+            k=2,
+        )
+
+        # Execute
+        results = retriever.invoke("question")
+
+        # Assert
+        assert [d.id for d in results] == ["b", "a"]
+
+    def test_hybrid_retriever_queries_retrievers_concurrently_async(self):
+        """Test that async hybrid retrieval waits for the slowest retriever only."""
+        # Setup
+        retriever = HybridRetriever(
+            retrievers=[
+                SlowRetriever(documents=[doc("a"), doc("b")]),
+                SlowRetriever(documents=[doc("c"), doc("b")]),
+            ],
+            k=2,
+        )
+
+        # Execute
+        start = time.perf_counter()
+        results = asyncio.run(retriever.ainvoke("question"))
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert [d.id for d in results] == ["b", "a"]
+        assert elapsed < 0.35
@@ -0,0 +1,85 @@
+"""
+Tests for process-pool chunking.
+"""
+import os
+
+from langchain.schema import Document
+from langchain.text_splitter import CharacterTextSplitter
+
+from ingestion.splitting import iter_split
+
+
+def make_splitter():
+    """Create a splitter that needs no tokenizer download (picklable by reference)."""
+    return CharacterTextSplitter(separator=" ", chunk_size=10, chunk_overlap=0)
+
+
+def make_pid_splitter():
+    """Create a splitter that tags every chunk with the worker's process ID."""
+
+    class PidSplitter(CharacterTextSplitter):
+        def split_documents(self, documents):
+            chunks = super().split_documents(documents)
+            for chunk in chunks:
+                chunk.metadata["pid"] = os.getpid()
+            return chunks
+
+    return PidSplitter(separator=" ", chunk_size=10, chunk_overlap=0)
+
+
+def make_loaded(count):
+    """Create ``count`` loaded sources with a few chunks each."""
+    return [
+        (f"doc-{i}", [Document(page_content=f"source {i} alpha beta gamma delta", metadata={"source": f"doc-{i}"})])
+        for i in range(count)
+    ]
+
+
+class TestIterSplit:
+    """Test cases for iter_split."""
+
+    def test_in_process_split(self):
+        """Test that a single worker splits in-process."""
+        # Execute
+        result = list(iter_split(make_loaded(2), max_workers=1, factory=make_splitter))
+
+        # Assert
+        assert [source for source, _ in result] == ["doc-0", "doc-1"]
+        assert [c.page_content for c in result[0][1]] == ["source 0", "alpha beta", "gamma", "delta"]
+
+    def test_pool_matches_in_process_order(self):
+        """Test that the process pool yields the same chunks in input order."""
+        # Setup
+        loaded = make_loaded(20)
+
+        # Execute
+        serial = list(iter_split(loaded, max_workers=1, factory=make_splitter))
+        parallel = list(iter_split(loaded, max_workers=3, factory=make_splitter))
+
+        # Assert
+        assert [s for s, _ in parallel] == [s for s, _ in serial]
+        assert [[c.page_content for c in chunks] for _, chunks in parallel] == [
+            [c.page_content for c in chunks] for _, chunks in serial
+        ]
+
+    def test_failed_sources_pass_through(self):
+        """Test that sources that failed to load are passed on as None."""
+        # Setup
+        loaded = make_loaded(2)
+        loaded.insert(1, ("broken", None))
+
+        # Execute
+        result = list(iter_split(loaded, max_workers=2, factory=make_splitter))
+
+        # Assert
+        assert [source for source, _ in result] == ["doc-0", "broken", "doc-1"]
+        assert result[1][1] is None
+
+    def test_work_runs_in_worker_processes(self):
+        """Test that splitting happens outside the parent process."""
+        # Execute
+        result = list(iter_split(make_loaded(4), max_workers=2, factory=make_pid_splitter))
+
+        # Assert
+        pids = {c.metadata["pid"] for _, chunks in result for c in chunks}
+        assert os.getpid() not in pids
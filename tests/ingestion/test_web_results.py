@@ -0,0 +1,170 @@
+"""
+Tests for the write-back of web search results.
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.lexical import LexicalIndex
+from ingestion.manifest import Manifest, chunk_id, read_version
+from ingestion.web_results import WEB_ORIGIN, expire, web_result_chunks, write_back
+
+FETCHED_AT = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+RESULTS = [
+    {
+        "title": "RAG",
+        "url": "https://en.wikipedia.org/wiki/RAG",
+        "content": "RAG grounds answers in documents.",
+        "score": 0.9,
+    },
+    {"title": "Noise", "url": "https://en.wikipedia.org/wiki/Noise", "content": "Unrelated text.", "score": 0.1},
+]
+
+
+@pytest.fixture
+def splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=0)
+
+
+@pytest.fixture
+def vectorstore(tmp_path):
+    return Chroma(
+        collection_name="test-web",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=DeterministicFakeEmbedding(size=8),
+    )
+
+
+class TestWebResultChunks:
+    """Test cases for turning search results into chunks."""
+
+    def test_chunks_are_tagged(self, splitter):
+        """Test that chunks carry their source, title, origin and fetch time."""
+        # Execute
+        chunks = web_result_chunks(RESULTS[:1], splitter, fetched_at=FETCHED_AT)
+
+        # Assert
+        assert len(chunks) == 1
+        assert chunks[0].metadata["source"] == "https://en.wikipedia.org/wiki/RAG"
+        assert chunks[0].metadata["title"] == "RAG"
+        assert chunks[0].metadata["origin"] == WEB_ORIGIN
+        assert chunks[0].metadata["fetched_at"] == "2024-05-01T12:00:00+00:00"
+        assert chunks[0].metadata["content_hash"]
+
+    def test_ids_do_not_collide_with_ingested_chunks(self, splitter):
+        """Test that IDs are stable per URL but distinct from ingestion IDs."""
+        # Execute
+        first = web_result_chunks(RESULTS[:1], splitter)
+        second = web_result_chunks(RESULTS[:1], splitter)
+
+        # Assert
+        assert first[0].id == second[0].id
+        assert first[0].id != chunk_id("https://en.wikipedia.org/wiki/RAG", 0)
+
+    def test_low_scores_and_empty_results_are_skipped(self, splitter):
+        """Test that only useful results become chunks."""
+        # Setup
+        results = RESULTS + [{"url": "https://example.com", "content": "", "score": 1.0}]
+
+        # Execute
+        chunks = web_result_chunks(results, splitter, min_score=0.5)
+
+        # Assert
+        assert [chunk.metadata["title"] for chunk in chunks] == ["RAG"]
+
+
+class TestWriteBack:
+    """Test cases for upserting search results into the knowledge base."""
+
+    def test_results_become_retrievable(self, splitter, vectorstore, tmp_path):
+        """Test that written-back results are stored, indexed and invalidate cached retrievals."""
+        # Setup
+        lexical = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+        manifest = Manifest(str(tmp_path / "manifest.sqlite3"))
+
+        # Execute
+        count = write_back(RESULTS, vectorstore, lexical, manifest, splitter=splitter, min_score=0.5)
+
+        # Assert
+        assert count == 1
+        stored = vectorstore.get()
+        assert stored["metadatas"][0]["origin"] == WEB_ORIGIN
+        assert lexical.search("grounds answers", 4)[0].metadata["source"] == "https://en.wikipedia.org/wiki/RAG"
+        assert read_version(str(tmp_path / "manifest.sqlite3")) == 1
+        assert len(manifest) == 0
+
+    def test_refetched_results_replace_their_chunks(self, splitter, vectorstore):
+        """Test that writing back the same page twice does not duplicate it."""
+        # Execute
+        write_back(RESULTS[:1], vectorstore, splitter=splitter)
+        write_back(RESULTS[:1], vectorstore, splitter=splitter)
+
+        # Assert
+        assert len(vectorstore.get()["ids"]) == 1
+
+    def test_shorter_refetch_drops_leftover_chunks(self, vectorstore, tmp_path):
+        """Test that chunks beyond a refetched page's new length are deleted from both indexes."""
+        # Setup
+        splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0)
+        lexical = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+        long_page = {"url": "https://example.com", "content": "RAG retrieves documents. Then it generates answers."}
+        short_page = {"url": "https://example.com", "content": "RAG retrieves."}
+        write_back([long_page], vectorstore, lexical, splitter=splitter)
+
+        # Execute
+        write_back([short_page], vectorstore, lexical, splitter=splitter)
+
+        # Assert
+        assert vectorstore.get()["documents"] == ["RAG retrieves."]
+        assert len(lexical) == 1
+
+    def test_nothing_useful_writes_nothing(self, splitter):
+        """Test that the store is not touched when no result is useful."""
+        # Setup
+        vectorstore = MagicMock()
+        manifest = MagicMock()
+
+        # Execute
+        count = write_back(RESULTS[1:], vectorstore, manifest=manifest, splitter=splitter, min_score=0.5)
+
+        # Assert
+        assert count == 0
+        vectorstore.add_documents.assert_not_called()
+        manifest.bump_version.assert_not_called()
+
+
+class TestExpire:
+    """Test cases for expiring written-back results."""
+
+    def test_only_old_web_chunks_expire(self, splitter, vectorstore, tmp_path):
+        """Test that web chunks past the maximum age are deleted and other chunks kept."""
+        # Setup
+        manifest = Manifest(str(tmp_path / "manifest.sqlite3"))
+        old = dict(RESULTS[0], url="https://example.com/old")
+        write_back([old], vectorstore, splitter=splitter, fetched_at=FETCHED_AT - timedelta(days=2))
+        write_back(RESULTS[:1], vectorstore, splitter=splitter, fetched_at=FETCHED_AT)
+        vectorstore.add_texts(["Ingested."], metadatas=[{"source": "https://example.com/old"}], ids=["ingested"])
+
+        # Execute
+        expired = expire(vectorstore, manifest=manifest, max_age=24 * 3600, now=FETCHED_AT)
+
+        # Assert
+        assert expired == 1
+        assert sorted(m["source"] for m in vectorstore.get()["metadatas"]) == [
+            "https://en.wikipedia.org/wiki/RAG", "https://example.com/old"
+        ]
+        assert read_version(str(tmp_path / "manifest.sqlite3")) == 1
+
+    def test_zero_max_age_keeps_everything(self, splitter, vectorstore):
+        """Test that expiry is off with a maximum age of 0."""
+        # Setup
+        write_back(RESULTS[:1], vectorstore, splitter=splitter, fetched_at=FETCHED_AT - timedelta(days=365))
+
+        # Execute & Assert
+        assert expire(vectorstore, max_age=0) == 0
+        assert len(vectorstore.get()["ids"]) == 1
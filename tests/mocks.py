@@ -0,0 +1,16 @@
+"""
+Mocks shared by the tests.
+"""
+from unittest.mock import MagicMock
+
+
+def chain_getter() -> MagicMock:
+    """
+    Mock of a chain getter such as ``get_answer_grader``.
+
+    The getter returns itself, so tests configure and assert ``invoke`` and
+    ``ainvoke`` on the object they patched in, as if it were the chain.
+    """
+    getter = MagicMock()
+    getter.return_value = getter
+    return getter
@@ -0,0 +1,55 @@
+"""
+Tests guarding the import-time cold start of the application.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.cold_start import DEFAULT_BUDGET, REPO_ROOT, measure_import
+
+
+class TestColdStart:
+    """Test cases for import-time side effects and cost."""
+
+    @pytest.mark.parametrize("module", ["graph.graph", "main", "server"])
+    def test_import_has_no_side_effects(self, module, tmp_path):
+        """Test that importing needs no network and writes no files."""
+        # Execute (fails if the import opens a network connection)
+        elapsed = measure_import(module, cwd=str(tmp_path))
+
+        # Assert
+        assert os.listdir(tmp_path) == []
+        assert elapsed < DEFAULT_BUDGET * 3
+
+    @pytest.mark.parametrize("module", ["graph.graph", "server"])
+    def test_import_needs_no_api_key(self, module, tmp_path, monkeypatch):
+        """Test that the chains build their OpenAI clients on first use, not at import."""
+        # Setup
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+        # Execute & Assert (fails if a client is built at import)
+        measure_import(module, cwd=str(tmp_path))
+
+    def test_import_does_not_load_the_vector_store(self):
+        """Test that the workflow imports from the ingestion package without loading chromadb."""
+        # Execute
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, graph.graph; sys.exit('chromadb' in sys.modules)"], cwd=REPO_ROOT
+        )
+
+        # Assert
+        assert result.returncode == 0
+
+    def test_graph_is_compiled_lazily(self):
+        """Test that the compiled app is only built on first access."""
+        import graph.graph as graph_module
+
+        graph_module.get_app.cache_clear()
+        assert graph_module.get_app.cache_info().currsize == 0
+
+        app = graph_module.app
+
+        assert graph_module.get_app.cache_info().currsize == 1
+        assert graph_module.get_app() is app
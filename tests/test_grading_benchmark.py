@@ -0,0 +1,45 @@
+"""
+Tests for the relevance grading benchmark.
+"""
+import json
+
+from unittest.mock import patch
+
+from benchmarks.grading import load_cases, run
+
+
+class TestGradingBenchmark:
+    """Test cases for the grading benchmark helpers."""
+
+    def test_load_cases(self, tmp_path):
+        """Test reading questions and documents from JSONL."""
+        # Setup
+        path = tmp_path / "cases.jsonl"
+        path.write_text(json.dumps({"question": "What is RAG?", "documents": ["a", "b"]}) + "\n\n")
+
+        # Execute
+        cases = load_cases(str(path))
+
+        # Assert
+        assert len(cases) == 1
+        assert cases[0][0] == "What is RAG?"
+        assert [doc.page_content for doc in cases[0][1]] == ["a", "b"]
+
+    @patch("benchmarks.grading.grade_relevance")
+    def test_run_reports_every_mode(self, mock_grade):
+        """Test that both modes are summarized and compared."""
+        # Setup
+        mock_grade.side_effect = lambda question, documents, mode: (
+            [True, True] if mode == "concurrent" else [True, False]
+        )
+        cases = [("What is RAG?", ["doc-a", "doc-b"])]
+
+        # Execute
+        results = run(cases, runs=2)
+
+        # Assert
+        assert [r["mode"] for r in results] == ["concurrent", "batch"]
+        assert results[0]["questions"] == 2
+        assert results[0]["agreement"] == 1.0
+        assert results[1]["agreement"] == 0.5
+        assert results[1]["total_tokens_per_question"] == 0
@@ -0,0 +1,48 @@
+"""
+Tests for the generation check benchmark.
+"""
+import json
+
+from unittest.mock import patch
+
+from benchmarks.reflection import load_cases, run
+
+
+class TestReflectionBenchmark:
+    """Test cases for the generation check benchmark helpers."""
+
+    def test_load_cases(self, tmp_path):
+        """Test reading questions, documents and generations from JSONL."""
+        # Setup
+        path = tmp_path / "cases.jsonl"
+        case = {"question": "What is RAG?", "documents": ["a"], "generation": "RAG is RAG."}
+        path.write_text(json.dumps(case) + "\n")
+
+        # Execute
+        cases = load_cases(str(path))
+
+        # Assert
+        assert cases[0][0] == "What is RAG?"
+        assert cases[0][1][0].page_content == "a"
+        assert cases[0][2] == "RAG is RAG."
+
+    @patch("benchmarks.reflection.check_generation")
+    def test_run_compares_routing(self, mock_check):
+        """Test that both paths are summarized and their routing compared."""
+        # Setup
+        def check(question, documents, generation, mode):
+            if mode == "combined" and question == "q2":
+                return False, lambda: True
+            return True, lambda: True
+
+        mock_check.side_effect = check
+        cases = [("q1", [], "g1"), ("q2", [], "g2")]
+
+        # Execute
+        results = run(cases)
+
+        # Assert
+        assert [r["mode"] for r in results] == ["sequential", "combined"]
+        assert results[0]["agreement"] == 1.0
+        assert results[1]["agreement"] == 0.5
+        assert results[1]["generations"] == 2
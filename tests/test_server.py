@@ -0,0 +1,263 @@
+"""
+Tests for the HTTP server.
+"""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from server import AdmissionControl, Coalescer, Saturated, StreamFanout, create_app
+
+
+class FakeGraph:
+    """Compiled-workflow stand-in answering after a delay."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs["question"])
+        await asyncio.sleep(self.delay)
+        return {"generation": f"Answer to {inputs['question']}", "documents": []}
+
+    async def astream(self, inputs, stream_mode):
+        self.calls.append(inputs["question"])
+        await asyncio.sleep(self.delay)
+        yield "updates", {"generate": {"generation": "RAG grounds answers.", "documents": []}}
+
+
+async def post_all(api, bodies, path="/query"):
+    """Send concurrent requests to an endpoint of the application."""
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post(path, json=body) for body in bodies))
+
+
+async def numbers(count, delay=0.01):
+    """Event stream of ``count`` numbered events."""
+    for number in range(count):
+        await asyncio.sleep(delay)
+        yield {"event": "token", "text": str(number)}
+
+
+class TestAdmissionControl:
+    """Test cases for admission control."""
+
+    def test_requests_beyond_the_queue_are_shed(self):
+        """Test that only running and queued requests are admitted."""
+        async def scenario():
+            admission = AdmissionControl(concurrency=1, queue_size=1)
+            release = await admission.acquire()
+            waiting = asyncio.ensure_future(admission.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(Saturated):
+                await admission.acquire()
+            assert (admission.running, admission.queued) == (1, 1)
+            release()
+            release()  # Releasing twice is a no-op
+            (await waiting)()
+            return admission
+
+        # Execute
+        admission = asyncio.run(scenario())
+
+        # Assert
+        assert admission.admitted == 0
+        assert admission.shed == 1
+
+
+class TestCoalescer:
+    """Test cases for in-flight request coalescing."""
+
+    def test_identical_requests_share_one_execution(self):
+        """Test that concurrent requests with the same key run once."""
+        calls = 0
+
+        async def execute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def scenario():
+            coalescer = Coalescer()
+            results = await asyncio.gather(*(coalescer.run("key", execute) for _ in range(3)))
+            return coalescer, results
+
+        # Execute
+        coalescer, results = asyncio.run(scenario())
+
+        # Assert
+        assert calls == 1
+        assert [shared for _, shared in results] == [False, True, True]
+        assert all(result == "answer" for result, _ in results)
+        assert len(coalescer) == 0
+
+
+class TestStreamFanout:
+    """Test cases for sharing streamed executions."""
+
+    def test_late_subscribers_get_the_whole_stream(self):
+        """Test that a request joining a running stream gets its events from the start."""
+        async def collect(events):
+            return [event["text"] async for event in events]
+
+        async def scenario():
+            fanout = StreamFanout()
+            released = []
+            first, _ = fanout.start("key", numbers(5), lambda: released.append(True))
+            first_events = asyncio.ensure_future(collect(first))
+            await asyncio.sleep(0.025)
+            second, _ = fanout.join("key")
+            results = await asyncio.gather(first_events, collect(second))
+            await asyncio.sleep(0)
+            return fanout, released, results
+
+        # Execute
+        fanout, released, results = asyncio.run(scenario())
+
+        # Assert
+        assert results == [["0", "1", "2", "3", "4"]] * 2
+        assert fanout.coalesced == 1
+        assert released == [True]
+        assert len(fanout) == 0
+
+    def test_execution_stops_when_every_subscriber_left(self):
+        """Test that the shared execution is cancelled once nobody listens and its slot is released."""
+        async def scenario():
+            fanout = StreamFanout()
+            released = []
+            first, leave_first = fanout.start("key", numbers(100), lambda: released.append(True))
+            _, leave_second = fanout.join("key")
+            await first.__anext__()
+            leave_first()
+            await asyncio.sleep(0.02)
+            still_running = not released
+            leave_second()
+            await asyncio.sleep(0.02)
+            return fanout, released, still_running
+
+        # Execute
+        fanout, released, still_running = asyncio.run(scenario())
+
+        # Assert
+        assert still_running
+        assert released == [True]
+        assert fanout.join("key") is None
+
+
+class TestServer:
+    """Test cases for the endpoints."""
+
+    def test_duplicate_questions_are_coalesced(self):
+        """Test that identical in-flight questions share one graph execution."""
+        # Setup
+        graph = FakeGraph()
+        api = create_app(graph=graph, warm_up_steps=[])
+        bodies = [{"question": "What is RAG?"}] * 4 + [{"question": "  what is  RAG? "}]
+
+        # Execute
+        responses = asyncio.run(post_all(api, bodies))
+
+        # Assert
+        assert [response.status_code for response in responses] == [200] * 5
+        assert graph.calls == ["What is RAG?"]
+        assert sum(response.json()["coalesced"] for response in responses) == 4
+        assert responses[0].json()["generation"] == "Answer to What is RAG?"
+        assert responses[0].json()["verdict"] == "useful"
+
+    def test_saturated_server_sheds_with_429(self):
+        """Test that requests beyond the slots and queue get 429."""
+        # Setup
+        graph = FakeGraph()
+        api = create_app(graph=graph, concurrency=1, queue_size=1, warm_up_steps=[])
+        bodies = [{"question": f"Question {i}"} for i in range(4)]
+
+        # Execute
+        start = time.perf_counter()
+        responses = asyncio.run(post_all(api, bodies))
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert sorted(response.status_code for response in responses) == [200, 200, 429, 429]
+        assert len(graph.calls) == 2
+        assert elapsed < 0.5
+
+    def test_stream_sends_server_sent_events(self):
+        """Test that the stream endpoint sends the answer and the verdict."""
+        # Setup
+        api = create_app(graph=FakeGraph(delay=0), warm_up_steps=[])
+
+        # Execute
+        with TestClient(api) as client:
+            response = client.post("/stream", json={"question": "What is RAG?"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")
+        ]
+        assert events[0] == {"event": "token", "text": "RAG grounds answers."}
+        assert events[-1] == {
+            "event": "final", "generation": "RAG grounds answers.", "verdict": "useful", "sources": []
+        }
+
+    def test_duplicate_streams_are_coalesced(self):
+        """Test that identical in-flight stream requests share one graph execution and its events."""
+        # Setup
+        graph = FakeGraph()
+        api = create_app(graph=graph, concurrency=1, queue_size=0, warm_up_steps=[])
+        bodies = [{"question": "What is RAG?"}] * 3 + [{"question": "what is rag?"}]
+
+        # Execute
+        responses = asyncio.run(post_all(api, bodies, path="/stream"))
+        with TestClient(api) as client:
+            readiness = client.get("/readyz").json()
+
+        # Assert
+        assert [response.status_code for response in responses] == [200] * 4
+        assert graph.calls == ["What is RAG?"]
+        assert len({response.text for response in responses}) == 1
+        assert '"event": "final"' in responses[0].text
+        assert readiness["coalesced_streams"] == 3
+
+    def test_readiness_follows_warm_up(self):
+        """Test that the server reports ready once every warm-up step succeeded."""
+        # Setup
+        api = create_app(graph=FakeGraph(), warm_up_steps=[("graph", lambda: time.sleep(0.1)), ("index", lambda: None)])
+
+        # Execute
+        with TestClient(api) as client:
+            health = client.get("/healthz")
+            before = client.get("/readyz")
+            time.sleep(0.3)
+            after = client.get("/readyz")
+
+        # Assert
+        assert health.status_code == 200
+        assert before.status_code == 503
+        assert after.status_code == 200
+        assert after.json()["checks"] == {"graph": True, "index": True}
+        assert set(after.json()["prefilter"]) == {"accepted", "rejected", "graded", "llm_calls_saved"}
+
+    def test_failed_warm_up_is_not_ready(self):
+        """Test that a failing warm-up step keeps the server unready with its error."""
+        # Setup
+        def open_index():
+            raise RuntimeError("collection not found")
+
+        api = create_app(graph=FakeGraph(), warm_up_steps=[("index", open_index)])
+
+        # Execute
+        with TestClient(api) as client:
+            time.sleep(0.2)
+            response = client.get("/readyz")
+
+        # Assert
+        assert response.status_code == 503
+        assert response.json()["error"] == "index: collection not found"
@@ -0,0 +1,183 @@
+"""
+Tests for the offline workflow benchmark.
+"""
+import asyncio
+import json
+import random
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.workflow import (
+    Fakes,
+    Latency,
+    Script,
+    ScriptedChatModel,
+    compare,
+    load_questions,
+    run,
+)
+from graph.chains.models import GradeDocumentsBatch, GradeHallucinations
+
+
+def no_latency(**kwargs):
+    """Fakes answering instantly."""
+    return Fakes(llm=Latency(), generation=Latency(), embedding=Latency(), search=Latency(), **kwargs)
+
+
+class TestLatency:
+    """Test cases for latency distributions."""
+
+    def test_parse(self):
+        """Test parsing distributions and their parameters."""
+        # Execute & Assert
+        assert Latency.parse("constant:0.2") == Latency("constant", 0.2)
+        assert Latency.parse("lognormal:0.05:0.5") == Latency("lognormal", 0.05, 0.5)
+        assert str(Latency.parse("uniform:0.1:0.3")) == "uniform:0.1:0.3"
+
+    @pytest.mark.parametrize("spec", ["gamma:1:2", "constant", "uniform:0.1", "normal:-1:0.1"])
+    def test_invalid_specs_are_rejected(self, spec):
+        """Test that unknown distributions and bad parameters raise."""
+        # Execute & Assert
+        with pytest.raises(ValueError):
+            Latency.parse(spec)
+
+    def test_samples_are_seeded_and_non_negative(self):
+        """Test that samples repeat for a seed and are never negative."""
+        # Setup
+        latency = Latency("normal", 0.01, 0.05)
+
+        # Execute
+        first = [latency.sample(random.Random(7)) for _ in range(3)]
+        second = [latency.sample(random.Random(7)) for _ in range(3)]
+        samples = [latency.sample(random.Random(seed)) for seed in range(100)]
+
+        # Assert
+        assert first == second
+        assert min(samples) == 0.0
+
+
+class TestScriptedChatModel:
+    """Test cases for the fake chat model."""
+
+    def test_structured_verdicts_follow_the_script(self):
+        """Test that graders get the scripted verdicts through the structured output parser."""
+        # Setup
+        grader = ScriptedChatModel(script=Script(grounded=0.0)).with_structured_output(GradeHallucinations)
+        always = ScriptedChatModel(script=Script(grounded=1.0)).with_structured_output(GradeHallucinations)
+
+        # Execute & Assert
+        assert grader.invoke("Is it grounded?").binary_score is False
+        assert always.invoke("Is it grounded?").binary_score is True
+
+    def test_batch_verdicts_cover_every_document(self):
+        """Test that a batch grade has one verdict per numbered document."""
+        # Setup
+        grader = ScriptedChatModel(script=Script(relevant=1.0)).with_structured_output(GradeDocumentsBatch)
+
+        # Execute
+        result = grader.invoke("Retrieved documents: \n\n [1] (https://example.com) a\n\n[2] b")
+
+        # Assert
+        assert [(grade.index, grade.binary_score) for grade in result.grades] == [(1, "yes"), (2, "yes")]
+
+    def test_overrides_apply_to_their_question(self):
+        """Test that per-question rates override the defaults."""
+        # Setup
+        script = Script(relevant=1.0, overrides={"Who won?": {"relevant": 0.0}})
+
+        # Execute & Assert
+        assert script.verdict("relevant", "User question: Who won?") is False
+        assert script.verdict("relevant", "User question: What is RAG?") is True
+
+    def test_answers_report_token_usage(self):
+        """Test that plain calls answer deterministically and report usage."""
+        # Setup
+        model = ScriptedChatModel(answer_tokens=5)
+
+        # Execute
+        first = asyncio.run(model.ainvoke([HumanMessage(content="What is retrieval-augmented generation?")]))
+        second = model.invoke([HumanMessage(content="What is retrieval-augmented generation?")])
+
+        # Assert
+        assert first.content == second.content
+        assert len(first.content.split()) == 5
+        assert first.usage_metadata["input_tokens"] > 0
+
+
+class TestRun:
+    """Test cases for benchmarking the workflow."""
+
+    def test_levels_report_latency_usage_and_stages(self):
+        """Test that every concurrency level is summarized with the same scripted usage."""
+        # Setup
+        questions = ["What is retrieval-augmented generation?", "Who won the 2018 FIFA World Cup?"]
+
+        # Execute
+        results = run(questions, concurrency=[1, 2], repeats=2, fakes=no_latency())
+
+        # Assert
+        first, second = results["levels"]
+        assert [first["concurrency"], second["concurrency"]] == [1, 2]
+        assert first["questions"] == 4
+        assert first["latency_p50_s"] <= first["latency_p95_s"] <= first["latency_p99_s"]
+        assert first["llm_calls_per_question"] > 0
+        assert first["llm_calls_per_question"] == second["llm_calls_per_question"]
+        assert first["input_tokens_per_question"] == second["input_tokens_per_question"]
+        assert first["stages"]["node retrieve"]["count"] == 4
+        assert "node generate" in first["stages"]
+        assert first["prefilter"]["graded"] > 0
+        assert results["settings"]["questions"] == 2
+        json.dumps(results)
+
+    def test_irrelevant_documents_lead_to_web_search(self):
+        """Test that scripted verdicts drive the route through web search."""
+        # Execute
+        results = run(["Who won the 2018 FIFA World Cup?"], concurrency=[1],
+                      fakes=no_latency(script=Script(relevant=0.0, grounded=1.0, useful=1.0)))
+
+        # Assert
+        level = results["levels"][0]
+        assert level["web_searches_per_question"] == 1
+        assert level["search"]["searches"] == 1
+
+
+class TestCompare:
+    """Test cases for detecting regressions."""
+
+    def test_regressions_beyond_tolerance_are_reported(self):
+        """Test that slower, less throughput or more tokens count, within tolerance not."""
+        # Setup
+        baseline = {"levels": [
+            {"concurrency": 1, "latency_p95_s": 1.0, "throughput_qps": 10.0, "input_tokens_per_question": 100},
+            {"concurrency": 4, "latency_p95_s": 1.0},
+        ]}
+        results = {"levels": [
+            {"concurrency": 1, "latency_p95_s": 1.05, "throughput_qps": 8.0, "input_tokens_per_question": 120},
+            {"concurrency": 16, "latency_p95_s": 9.0},
+        ]}
+
+        # Execute
+        regressions = compare(baseline, results, tolerance=0.1)
+
+        # Assert
+        assert len(regressions) == 2
+        assert any("throughput_qps" in regression for regression in regressions)
+        assert any("input_tokens_per_question" in regression for regression in regressions)
+
+
+class TestLoadQuestions:
+    """Test cases for reading benchmark questions."""
+
+    def test_questions_and_rates_are_read(self, tmp_path):
+        """Test that questions keep file order and their rate overrides."""
+        # Setup
+        path = tmp_path / "questions.jsonl"
+        path.write_text('{"question": "What is RAG?"}\n{"question": "Who won?", "relevant": 0}\n')
+
+        # Execute
+        script = load_questions(str(path))
+
+        # Assert
+        assert list(script.overrides) == ["What is RAG?", "Who won?"]
+        assert script.overrides["Who won?"] == {"relevant": 0.0}